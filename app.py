@@ -1,3 +1,5 @@
+import time
+_IMPORT_STARTED = time.perf_counter()  # para o relatório de cold start
 from flask import Flask, render_template, jsonify
 import gspread
 from datetime import datetime
@@ -6,30 +8,78 @@ from dotenv import load_dotenv
 
 load_dotenv()
 import requests
-from flask import request
+from mirror_store import mirror, MIRROR_SYNC_SECONDS, TIMESTAMP_COLUMN
+from tracing import tracer, TracedWorksheet
+from lazy import Lazy, startup_report
+from numeric_columns import NumericColumns, NUMERIC_FIELDS, GROUP_FIELDS, parse_money
+from startup_search import StartupSearchIndex, TEXT_FIELDS as SEARCH_TEXT_FIELDS
+from rate_limit import sheets_limiter, serper_limiter, limiter_stats, CircuitOpenError, status_of, retry_after_of
+from flask import request, Response
 import re
+import heapq
+import hashlib
+import gzip
+import json
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+
+try:
+    import brotli  # opcional: com ele o payload do dashboard também sai em 'br'
+except ImportError:
+    brotli = None
 
 app = Flask(__name__)
 
-# Configuração do Google Sheets
-print("Tentando conectar ao Google Sheets...")
-try:
-    gc = gspread.service_account(filename='credentials.json')
-    spreadsheet = gc.open("Base de Startups NVIDIA")
-    worksheet = spreadsheet.sheet1
-    print("Conexão com a planilha bem-sucedida.")
-except FileNotFoundError:
-    print("Erro: O arquivo 'credentials.json' não foi encontrado. Certifique-se de que ele está no diretório correto.")
-    worksheet = None
-except gspread.exceptions.APIError as api_error:
-    print(f"Erro na API do Google Sheets: {api_error}")
-    worksheet = None
-except Exception as e:
-    print(f"Erro inesperado ao conectar com a planilha: {e}")
-    worksheet = None
+# Tempo (em segundos) que um snapshot da planilha é considerado fresco
+SNAPSHOT_TTL_SECONDS = float(os.getenv('SNAPSHOT_TTL_SECONDS', '60'))
+# Intervalo mínimo entre tentativas de refresh após um erro na planilha
+SNAPSHOT_ERROR_BACKOFF_SECONDS = float(os.getenv('SNAPSHOT_ERROR_BACKOFF_SECONDS', '10'))
+
+# Configuração do Google Sheets (conecta no primeiro uso, uma vez por processo; ver warm_up)
+def connect_worksheet():
+    """Abre a planilha. Retorna None se não for possível (o app segue com o espelho ou dados de exemplo)."""
+    print("Tentando conectar ao Google Sheets...")
+    try:
+        gc = gspread.service_account(filename='credentials.json')
+        spreadsheet = gc.open("Base de Startups NVIDIA")
+        worksheet = TracedWorksheet(spreadsheet.sheet1, limiter=sheets_limiter)
+        print("Conexão com a planilha bem-sucedida.")
+        return worksheet
+    except FileNotFoundError:
+        print("Erro: O arquivo 'credentials.json' não foi encontrado. Certifique-se de que ele está no diretório correto.")
+    except gspread.exceptions.APIError as api_error:
+        print(f"Erro na API do Google Sheets: {api_error}")
+    except Exception as e:
+        print(f"Erro inesperado ao conectar com a planilha: {e}")
+    return None
+
+
+sheet_connection = Lazy('sheets', connect_worksheet)
+
+
+def get_worksheet():
+    """Worksheet compartilhado do processo (ou None se a conexão falhou)."""
+    return sheet_connection.get()
+
+def fetch_startups_records():
+    """Busca as colunas do snapshot (SNAPSHOT_COLUMNS) no espelho local, sincronizando com a planilha quando necessário"""
+    worksheet = get_worksheet()
+    if worksheet:
+        try:
+            report = mirror.sync_if_due(worksheet, MIRROR_SYNC_SECONDS)
+            if report:
+                print(f"🔄 Espelho local sincronizado com a planilha: {report}")
+        except Exception as e:
+            # Planilha indisponível (ou com cota estourada): segue com o que já está no espelho
+            if not mirror.count():
+                raise
+            print(f"⚠️  Falha ao sincronizar com a planilha ({e}). Usando o espelho local.")
+    if mirror.count():
+        all_records = mirror.all_records(SNAPSHOT_COLUMNS)
+        print(f"✅ {len(all_records)} registros carregados do espelho local.")
+        return all_records
 
-def get_startups_data():
-    """Busca todos os dados das startups da planilha"""
     if not worksheet:
         print("⚠️  Conexão com o Google Sheets não estabelecida. Usando dados de exemplo.")
         return [
@@ -83,55 +133,681 @@ def get_startups_data():
             }
         ]
 
+    return []
+
+
+class StartupSnapshotCache:
+    """Cache de processo para os registros da planilha.
+
+    Serve o snapshot enquanto estiver dentro do TTL; depois disso devolve o
+    snapshot antigo e atualiza em segundo plano (stale-while-revalidate). Só
+    uma busca à planilha acontece por vez, mesmo com muitas requisições
+    simultâneas. Sem snapshot, quem esperava por uma busca que falhou recebe
+    o mesmo erro em vez de repetir a busca, e novas tentativas respeitam
+    SNAPSHOT_ERROR_BACKOFF_SECONDS.
+    """
+
+    def __init__(self, loader, ttl):
+        self._loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()          # protege o estado abaixo
+        self._refresh_lock = threading.Lock()  # single-flight da busca
+        self._records = None
+        self._fetched_at = 0.0
+        self._last_error_at = 0.0
+        self._last_error = None
+        self._finished = 0                     # buscas concluídas (com sucesso ou não)
+        self._refreshing = False
+        self._listeners = []
+        self.version = 0
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stale_hits': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'shared_errors': 0,
+            'last_refresh_ms': None,
+            'total_refresh_ms': 0.0,
+        }
+
+    def get(self):
+        """Retorna a lista de registros, buscando na planilha só quando necessário."""
+        with self._lock:
+            records = self._records
+            now = time.monotonic()
+            if records is not None and now - self._fetched_at < self.ttl:
+                self.stats['hits'] += 1
+                return records
+            if records is None:
+                self.stats['misses'] += 1
+                version = self.version
+                attempt = self._finished
+                if self._last_error is not None and now - self._last_error_at < SNAPSHOT_ERROR_BACKOFF_SECONDS:
+                    # Falhou há pouco: não martela a planilha a cada requisição
+                    self.stats['shared_errors'] += 1
+                    print(f"❌ Planilha indisponível (última falha há {now - self._last_error_at:.1f}s): "
+                          f"{self._last_error}")
+                    return []
+            else:
+                self.stats['stale_hits'] += 1
+                start_background = (not self._refreshing
+                                    and now - self._last_error_at >= SNAPSHOT_ERROR_BACKOFF_SECONDS)
+                if start_background:
+                    self._refreshing = True
+
+        if records is not None:
+            if start_background:
+                threading.Thread(target=self._background_refresh, daemon=True).start()
+            return records
+
+        # Sem nenhum snapshot: a primeira requisição busca e as demais aguardam o resultado
+        self.refresh(min_version=version, min_attempt=attempt)
+        with self._lock:
+            return self._records if self._records is not None else []
+
+    def refresh(self, min_version=None, min_attempt=None):
+        """Busca a planilha agora. Se outra thread já atualizou além de `min_version`, não busca de novo.
+
+        Com `min_attempt` (buscas concluídas quando esta thread começou a esperar), uma busca de outra
+        thread que terminou nesse meio-tempo vale como resultado: se ela falhou, devolve False com o
+        mesmo erro sem chamar a planilha de novo.
+        """
+        with self._refresh_lock:
+            if min_version is not None and self.version > min_version:
+                return True
+            with self._lock:
+                if min_attempt is not None and self._finished > min_attempt:
+                    self.stats['shared_errors'] += 1
+                    print(f"❌ Erro ao ler dados da planilha (mesma falha da busca em andamento): {self._last_error}")
+                    return False
+            start = time.perf_counter()
+            try:
+                records = self._loader()
+            except Exception as e:
+                print(f"❌ Erro ao ler dados da planilha: {e}")
+                with self._lock:
+                    self.stats['refresh_errors'] += 1
+                    self._last_error = e
+                    self._last_error_at = time.monotonic()
+                    self._finished += 1
+                return False
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._records = records
+                self._fetched_at = time.monotonic()
+                self._last_error = None
+                self._finished += 1
+                self.version += 1
+                self.stats['refreshes'] += 1
+                self.stats['last_refresh_ms'] = round(elapsed_ms, 2)
+                self.stats['total_refresh_ms'] += elapsed_ms
+                version = self.version
+            for listener in self._listeners:
+                try:
+                    listener(records, version)
+                except Exception as e:
+                    print(f"⚠️  Erro ao processar novo snapshot: {e}")
+            return True
+
+    def add_listener(self, listener):
+        """Registra uma função chamada com (records, version) a cada novo snapshot."""
+        self._listeners.append(listener)
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def invalidate(self):
+        """Marca o snapshot atual como expirado."""
+        with self._lock:
+            self._fetched_at = 0.0
+            self._last_error_at = 0.0
+            self._last_error = None
+
+    def snapshot_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            served = stats['hits'] + stats['stale_hits'] + stats['misses']
+            stats['hit_rate'] = round((stats['hits'] + stats['stale_hits']) / served, 4) if served else None
+            stats['avg_refresh_ms'] = (round(stats['total_refresh_ms'] / stats['refreshes'], 2)
+                                       if stats['refreshes'] else None)
+            stats['total_refresh_ms'] = round(stats['total_refresh_ms'], 2)
+            stats['version'] = self.version
+            stats['ttl_seconds'] = self.ttl
+            stats['records'] = len(self._records) if self._records is not None else 0
+            stats['age_seconds'] = (round(time.monotonic() - self._fetched_at, 2)
+                                    if self._records is not None else None)
+            return stats
+
+
+snapshot_cache = StartupSnapshotCache(fetch_startups_records, SNAPSHOT_TTL_SECONDS)
+
+
+def get_startups_data():
+    """Busca todos os dados das startups (via cache de snapshot)"""
+    return snapshot_cache.get()
+
+# Dimensões contadas pelo motor de estatísticas (chave da resposta -> coluna da planilha)
+STATS_DIMENSIONS = {
+    'sectors': 'Setor de Atuação',
+    'countries': 'País',
+    'funding_statuses': 'Status de financiamento',
+    'investors': 'Nome do Investidor (VC)',
+}
+STATS_TOP_N = 5
+TIMESTAMP_HEAP_SLACK = 2  # o heap de datas é reconstruído quando passa desse múltiplo das datas vivas
+
+# spreadsheet_tool grava a data de atualização na coluna logo após as 25 colunas de dados (coluna Z)
+TIMESTAMP_HEADERS = ('Última Atualização', 'Data de Atualização', 'Atualizado em', 'Timestamp', '')
+TIMESTAMP_COLUMN_INDEX = 25
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_row_timestamp(row):
+    """Extrai a data de atualização gravada pelo spreadsheet_tool (ou None)."""
+    value = None
+    for header in TIMESTAMP_HEADERS:
+        if row.get(header):
+            value = row[header]
+            break
+    if value is None:
+        values = list(row.values())
+        if len(values) > TIMESTAMP_COLUMN_INDEX:
+            value = values[TIMESTAMP_COLUMN_INDEX]
+    if not value:
+        return None
     try:
-        print("🔄 Lendo dados reais da planilha...")
-        all_records = worksheet.get_all_records()
-        print(f"✅ {len(all_records)} registros carregados da planilha.")
-        return all_records
-    except Exception as e:
-        print(f"❌ Erro ao ler dados da planilha: {e}")
-        return []
+        return datetime.strptime(str(value).strip(), TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+def format_relative_time(moment, now=None):
+    """Formata uma data como 'há X min' / 'há X h' / 'há X dias'."""
+    if moment is None:
+        return 'N/A'
+    seconds = ((now or datetime.now()) - moment).total_seconds()
+    if seconds < 60:
+        return 'agora mesmo'
+    if seconds < 3600:
+        return f'há {int(seconds // 60)} min'
+    if seconds < 86400:
+        return f'há {int(seconds // 3600)} h'
+    days = int(seconds // 86400)
+    return f'há {days} dia' if days == 1 else f'há {days} dias'
+
+
+class StatisticsEngine:
+    """Contadores agregados das startups, mantidos de forma incremental.
+
+    Cada snapshot é comparado com o anterior e só as linhas adicionadas,
+    alteradas ou removidas mexem nos contadores. O top-N é calculado com heap
+    e guardado até a próxima mudança, então uma requisição não recalcula nada.
+    """
+
+    def __init__(self, dimensions, top_n=STATS_TOP_N):
+        self.dimensions = dimensions
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._rows = {}  # chave da linha -> (valores das dimensões, timestamp)
+        self._counters = {name: Counter() for name in dimensions}
+        self._timestamps = Counter()
+        self._timestamp_heap = []  # max-heap (negativo) com remoção preguiçosa
+        self._summary = None
+        self.version = 0
+        self.last_diff = {'added': 0, 'changed': 0, 'removed': 0}
+
+    def _entry(self, row):
+        values = tuple(row.get(column, 'N/A') for column in self.dimensions.values())
+        return values, parse_row_timestamp(row)
+
+    def _add(self, entry):
+        values, timestamp = entry
+        for name, value in zip(self.dimensions, values):
+            if value and value != 'N/A':
+                self._counters[name][value] += 1
+        if timestamp is not None:
+            self._timestamps[timestamp] += 1
+            if self._timestamps[timestamp] == 1:
+                heapq.heappush(self._timestamp_heap, (-timestamp.timestamp(), timestamp))
+                self._compact_timestamp_heap()
+
+    def _compact_timestamp_heap(self):
+        """Descarta as entradas removidas abaixo do topo, que a remoção preguiçosa nunca alcança."""
+        live = len(self._timestamps)
+        if len(self._timestamp_heap) > TIMESTAMP_HEAP_SLACK * live + 16:
+            self._timestamp_heap = [(-moment.timestamp(), moment) for moment in self._timestamps]
+            heapq.heapify(self._timestamp_heap)
+
+    def _remove(self, entry):
+        values, timestamp = entry
+        for name, value in zip(self.dimensions, values):
+            if value and value != 'N/A':
+                counter = self._counters[name]
+                counter[value] -= 1
+                if counter[value] <= 0:
+                    del counter[value]
+        if timestamp is not None:
+            self._timestamps[timestamp] -= 1
+            if self._timestamps[timestamp] <= 0:
+                del self._timestamps[timestamp]
+
+    def upsert_row(self, key, row):
+        """Adiciona ou substitui uma linha. Retorna 'added', 'changed' ou None (sem mudança)."""
+        with self._lock:
+            return self._upsert(key, self._entry(row))
+
+    def _upsert(self, key, entry):
+        previous = self._rows.get(key)
+        if previous == entry:
+            return None
+        if previous is not None:
+            self._remove(previous)
+        self._add(entry)
+        self._rows[key] = entry
+        self._summary = None
+        return 'changed' if previous is not None else 'added'
+
+    def remove_row(self, key):
+        with self._lock:
+            return self._remove_key(key)
+
+    def _remove_key(self, key):
+        previous = self._rows.pop(key, None)
+        if previous is None:
+            return False
+        self._remove(previous)
+        self._summary = None
+        return True
+
+    def apply_snapshot(self, records, version=None):
+        """Aplica um snapshot completo, mexendo apenas nas linhas que mudaram."""
+        diff = {'added': 0, 'changed': 0, 'removed': 0}
+        seen = Counter()
+        keys = set()
+        with self._lock:
+            for row in records:
+                name = str(row.get('Nome da Startup', '')).strip()
+                seen[name] += 1
+                # Nomes repetidos na planilha recebem um sufixo para não se sobrescreverem
+                key = name if seen[name] == 1 else f'{name}#{seen[name]}'
+                keys.add(key)
+                result = self._upsert(key, self._entry(row))
+                if result:
+                    diff[result] += 1
+            for key in [k for k in self._rows if k not in keys]:
+                self._remove_key(key)
+                diff['removed'] += 1
+            self.last_diff = diff
+            self.version = version if version is not None else self.version + 1
+
+    def top(self, dimension, n=None):
+        counter = self._counters[dimension]
+        items = heapq.nlargest(n or self.top_n, counter.items(), key=lambda item: item[1])
+        return [{'name': name, 'count': count} for name, count in items]
+
+    def last_update(self):
+        while self._timestamp_heap:
+            moment = self._timestamp_heap[0][1]
+            if self._timestamps.get(moment):
+                return moment
+            heapq.heappop(self._timestamp_heap)
+        return None
+
+    def summary(self):
+        """Estatísticas prontas para a API (recalculadas só quando os dados mudam)."""
+        with self._lock:
+            if self._summary is None:
+                last_update = self.last_update()
+                self._summary = {
+                    'total_startups': len(self._rows),
+                    'last_update_at': last_update.strftime(TIMESTAMP_FORMAT) if last_update else None,
+                    'top_sectors': self.top('sectors'),
+                    'top_countries': self.top('countries'),
+                    'top_funding_statuses': self.top('funding_statuses'),
+                    'top_investors': self.top('investors'),
+                }
+            summary = dict(self._summary)
+        # O texto relativo depende do horário da requisição, por isso fica fora do cache
+        last_update = summary['last_update_at']
+        summary['last_update'] = (format_relative_time(datetime.strptime(last_update, TIMESTAMP_FORMAT))
+                                  if last_update else 'N/A')
+        return summary
+
+
+statistics_engine = StatisticsEngine(STATS_DIMENSIONS)
+snapshot_cache.add_listener(statistics_engine.apply_snapshot)
+
+
+# Campos da tabela do dashboard (chave da API -> coluna da planilha)
+TABLE_FIELDS = {
+    'nome': 'Nome da Startup',
+    'investidor': 'Nome do Investidor (VC)',
+    'status': 'Status de financiamento',
+    'pais': 'País',
+    'tam': 'TAM',
+    'setor': 'Setor de Atuação',
+}
+# Campos com índice secundário para filtros em /api/startups
+FILTER_FIELDS = ('setor', 'pais', 'status', 'investidor')
+PAGE_QUERY_PARAMS = ('page', 'limit', 'sort', 'order') + FILTER_FIELDS
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def format_startup_row(startup):
+    return {key: startup.get(column, 'N/A') for key, column in TABLE_FIELDS.items()}
+
+
+def _index_key(value):
+    return str(value).strip().casefold()
+
+
+def _numeric_sort_key(value):
+    """Ordena valores como '2,843.18' ou 'US$ 1B' numericamente (em USD); textos vão para o fim."""
+    amount = parse_money(value)
+    if amount != amount:  # NaN: nenhum número no texto
+        return (1, 0.0, _index_key(value))
+    return (0, amount, '')
+
+
+def content_digest(value) -> str:
+    """Hash do conteúdo (JSON canônico): igual em todos os workers para os mesmos dados."""
+    encoded = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()[:16]
+
+
+class StartupIndex:
+    """Linhas formatadas da tabela e índices secundários de um snapshot.
+
+    Construído uma vez por snapshot: cada filtro vira uma consulta em
+    dicionário e cada ordenação é calculada uma única vez e reutilizada.
+    `digest` identifica o conteúdo das linhas (não o contador do snapshot,
+    que é de cada processo e avança a cada refresh mesmo sem mudança).
+    """
+
+    def __init__(self, records=(), version=0):
+        self.version = version
+        self.rows = [format_startup_row(startup) for startup in records]
+        self.digest = content_digest(self.rows)
+        self.by_field = {field: {} for field in FILTER_FIELDS}
+        for position, row in enumerate(self.rows):
+            for field in FILTER_FIELDS:
+                self.by_field[field].setdefault(_index_key(row[field]), []).append(position)
+        self._sort_orders = {}
+        self._lock = threading.Lock()
+
+    def sort_order(self, field, descending=False):
+        """Posições ordenadas pelo campo (calculadas sob demanda e guardadas).
+
+        No campo numérico, valores sem número ficam no fim nas duas direções.
+        """
+        with self._lock:
+            order = self._sort_orders.get((field, descending))
+            if order is None:
+                if field == 'tam':
+                    keys = [_numeric_sort_key(row[field]) for row in self.rows]
+                    order = sorted(range(len(self.rows)), key=keys.__getitem__)
+                    if descending:
+                        numeric = [position for position in order if keys[position][0] == 0]
+                        order = numeric[::-1] + order[len(numeric):]
+                else:
+                    order = sorted(range(len(self.rows)), key=lambda position: _index_key(self.rows[position][field]))
+                    if descending:
+                        order = order[::-1]
+                self._sort_orders[(field, descending)] = order
+            return order
+
+    def query(self, filters=None, sort=None, descending=False, offset=0, limit=None):
+        """Retorna (total, linhas da página) aplicando filtros e ordenação."""
+        selected = None
+        for field, values in (filters or {}).items():
+            index = self.by_field[field]
+            matches = set()
+            for value in values:
+                matches.update(index.get(_index_key(value), ()))
+            selected = matches if selected is None else selected & matches
+            if not selected:
+                return 0, []
+
+        if sort:
+            order = self.sort_order(sort, descending)
+            positions = order if selected is None else [p for p in order if p in selected]
+        else:
+            positions = range(len(self.rows)) if selected is None else sorted(selected)
+            if descending:
+                positions = positions[::-1]
+
+        total = len(positions)
+        end = total if limit is None else offset + limit
+        return total, [self.rows[p] for p in positions[offset:end]]
+
+
+startup_index = StartupIndex()
+
+
+def _rebuild_startup_index(records, version):
+    global startup_index
+    startup_index = StartupIndex(records, version)
+
+
+snapshot_cache.add_listener(_rebuild_startup_index)
+
+# Colunas NumPy dos campos numéricos, para as agregações de /api/analytics
+DEFAULT_HISTOGRAM_BINS = 20
+MAX_HISTOGRAM_BINS = 200
+DEFAULT_PERCENTILES = (25, 50, 75, 90, 99)
+analytics_columns = NumericColumns()
+
+
+def _rebuild_numeric_columns(records, version):
+    global analytics_columns
+    start = time.perf_counter()
+    columns = NumericColumns(records, version)
+    columns.build_ms = round((time.perf_counter() - start) * 1000, 2)
+    analytics_columns = columns
+
+
+snapshot_cache.add_listener(_rebuild_numeric_columns)
+
+# Colunas carregadas no snapshot: as da tabela, das estatísticas e das análises, mais a data de atualização.
+# Os textos longos (dinâmica do setor, riscos, concorrentes, fontes) ficam no espelho e são lidos por
+# startup em /api/startups/<nome>.
+SNAPSHOT_COLUMNS = list(dict.fromkeys(
+    list(TABLE_FIELDS.values()) + list(STATS_DIMENSIONS.values())
+    + [column for column, _ in NUMERIC_FIELDS.values()] + list(GROUP_FIELDS.values()) + [TIMESTAMP_COLUMN]))
+
+# Payload do dashboard e atualizações por Server-Sent Events
+DASHBOARD_DELTA_HISTORY = int(os.getenv('DASHBOARD_DELTA_HISTORY', '20'))  # deltas guardados para reconexões
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_RETRY_MS = 5000  # espera do navegador antes de reconectar
+# Cada stream aberto ocupa uma thread do worker (gthread) enquanto a aba estiver aberta. Acima deste
+# limite por processo o stream responde 503 e o dashboard passa a revalidar /api/dashboard periodicamente,
+# deixando as outras threads livres para a API.
+SSE_MAX_CONNECTIONS = int(os.getenv('SSE_MAX_CONNECTIONS', str(max(1, int(os.getenv('GUNICORN_THREADS', '8')) // 2))))
+SSE_POLL_SECONDS = 60  # intervalo sugerido aos clientes recusados
+
+
+def _row_keys(rows):
+    """Chave estável por linha da tabela: o nome, com sufixo '#n' para nomes repetidos."""
+    seen = Counter()
+    for row in rows:
+        name = str(row.get('nome', '')).strip()
+        seen[name] += 1
+        yield name if seen[name] == 1 else f'{name}#{seen[name]}'
+
+
+def _sse_event(event, version, data):
+    return f"id: {version}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+class DashboardFeed:
+    """Payload do dashboard (estatísticas + tabela) montado uma vez por versão dos dados.
+
+    A cada snapshot que muda alguma linha ou estatística, o payload completo é
+    serializado e comprimido uma única vez, e o delta em relação à versão
+    anterior vira um evento SSE pronto. Clientes conectados ao stream só
+    recebem esses deltas; enquanto nada muda, recebem apenas um heartbeat.
+    Com clientes conectados, uma única thread mantém o snapshot atualizado.
+
+    A versão é um hash do conteúdo (linhas e estatísticas), não o contador do
+    snapshot: com vários workers, o payload e o stream podem vir de processos
+    diferentes e precisam concordar sobre a versão.
+    """
+
+    def __init__(self, history=DASHBOARD_DELTA_HISTORY):
+        self.history = history
+        self._cond = threading.Condition()
+        self._rows = {}           # chave -> linha da tabela
+        self._statistics = None
+        self._encoded = {}        # content-encoding -> corpo
+        self._deltas = OrderedDict()  # versão de origem -> (versão nova, evento SSE)
+        self._poller = None
+        self.version = None
+        self.subscribers = 0
+        self.stats = {'builds': 0, 'unchanged_snapshots': 0, 'deltas_sent': 0, 'resets_sent': 0,
+                      'heartbeats': 0, 'payloads_served': 0, 'not_modified': 0, 'streams_rejected': 0}
+
+    def apply_snapshot(self, records, version):
+        """Listener do snapshot: monta o payload e o delta se algo mudou."""
+        index = startup_index
+        rows = OrderedDict(zip(_row_keys(index.rows), index.rows))
+        statistics = statistics_engine.summary()
+        statistics.pop('last_update', None)  # texto relativo: o cliente calcula a partir de last_update_at
+        version = content_digest([index.digest, statistics])
+        with self._cond:
+            if version == self.version:
+                self.stats['unchanged_snapshots'] += 1
+                return
+            upserted = [dict(row, key=key) for key, row in rows.items() if self._rows.get(key) != row]
+            removed = [key for key in self._rows if key not in rows]
+            body = json.dumps({
+                'version': version,
+                'statistics': statistics,
+                'startups': [dict(row, key=key) for key, row in rows.items()],
+            }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            encoded = {'identity': body, 'gzip': gzip.compress(body, compresslevel=6)}
+            if brotli is not None:
+                encoded['br'] = brotli.compress(body)
+            if self.version is not None:
+                self._deltas.pop(self.version, None)  # conteúdo que voltou a uma versão antiga: vale o delta novo
+                self._deltas[self.version] = (version, _sse_event('delta', version, {
+                    'version': version, 'base_version': self.version, 'statistics': statistics,
+                    'upserted': upserted, 'removed': removed,
+                }))
+                while len(self._deltas) > self.history:
+                    self._deltas.popitem(last=False)
+            self._rows = rows
+            self._statistics = statistics
+            self._encoded = encoded
+            self.version = version
+            self.stats['builds'] += 1
+            self._cond.notify_all()
+
+    def count(self, stat: str):
+        with self._cond:
+            self.stats[stat] += 1
+
+    def payload(self, accepted_encodings):
+        """(versão, encoding, corpo) na melhor compressão aceita pelo cliente."""
+        with self._cond:
+            for encoding in ('br', 'gzip'):
+                if encoding in self._encoded and accepted_encodings[encoding]:
+                    return self.version, encoding, self._encoded[encoding]
+            return self.version, 'identity', self._encoded.get('identity', b'{}')
+
+    def _events_since(self, since):
+        """Eventos que levam `since` à versão atual; None se for preciso recarregar o payload."""
+        if since == self.version:
+            return []
+        events = []
+        current = since
+        while current != self.version:
+            step = self._deltas.get(current)
+            if step is None or len(events) > len(self._deltas):
+                return None
+            current, event = step
+            events.append(event)
+        return events
+
+    def subscribe(self, limit=SSE_MAX_CONNECTIONS) -> bool:
+        """Reserva uma vaga de stream; False se já houver `limit` clientes conectados."""
+        with self._cond:
+            if self.subscribers >= limit:
+                self.stats['streams_rejected'] += 1
+                return False
+            self.subscribers += 1
+        self._ensure_poller()
+        return True
+
+    def unsubscribe(self):
+        with self._cond:
+            self.subscribers = max(self.subscribers - 1, 0)
+
+    def events(self, since=None):
+        """Gera o stream SSE de um cliente (com vaga reservada por subscribe) a partir da versão `since`."""
+        yield f'retry: {SSE_RETRY_MS}\n\n'
+        while True:
+            with self._cond:
+                if since == self.version:
+                    self._cond.wait(timeout=SSE_HEARTBEAT_SECONDS)
+                events = self._events_since(since)
+                version = self.version
+                if events is None:
+                    self.stats['resets_sent'] += 1
+                elif events:
+                    self.stats['deltas_sent'] += len(events)
+                else:
+                    self.stats['heartbeats'] += 1
+            if events is None:
+                # Versão desconhecida (de outro conteúdo ou anterior ao histórico): o cliente recarrega
+                yield _sse_event('reset', version, {'version': version, 'unknown_version': since})
+            elif events:
+                yield ''.join(events)
+            else:
+                yield ': heartbeat\n\n'
+            since = version
+
+    def _ensure_poller(self):
+        with self._cond:
+            if self._poller is not None and self._poller.is_alive():
+                return
+            self._poller = threading.Thread(target=self._poll_loop, name='dashboard-feed', daemon=True)
+            self._poller.start()
+
+    def _poll_loop(self):
+        # Uma única atualização periódica do snapshot para todos os clientes conectados
+        while True:
+            time.sleep(max(SNAPSHOT_TTL_SECONDS, 1))
+            with self._cond:
+                if not self.subscribers:
+                    self._poller = None
+                    return
+            snapshot_cache.get()
+
+    def snapshot_stats(self):
+        with self._cond:
+            stats = dict(self.stats)
+            stats['version'] = self.version
+            stats['subscribers'] = self.subscribers
+            stats['bytes'] = {encoding: len(body) for encoding, body in self._encoded.items()}
+            stats['deltas_kept'] = len(self._deltas)
+            return stats
+
+
+dashboard_feed = DashboardFeed()
+snapshot_cache.add_listener(dashboard_feed.apply_snapshot)
+
 
 def get_statistics():
     """Calcula estatísticas dos dados"""
-    startups = get_startups_data()
-    
-    if not startups:
-        return {
-            'total_startups': 0,
-            'last_update': 'N/A',
-            'top_sectors': [],
-            'top_countries': []
-        }
-    
-    # Conta setores
-    sectors = {}
-    countries = {}
-    
-    for startup in startups:
-        sector = startup.get('Setor de Atuação', 'N/A')
-        country = startup.get('País', 'N/A')
-        
-        if sector and sector != 'N/A':
-            sectors[sector] = sectors.get(sector, 0) + 1
-        
-        if country and country != 'N/A':
-            countries[country] = countries.get(country, 0) + 1
-    
-    # Top 5 setores
-    top_sectors = sorted(sectors.items(), key=lambda x: x[1], reverse=True)[:5]
-    top_sectors = [{'name': name, 'count': count} for name, count in top_sectors]
-    
-    # Top 5 países
-    top_countries = sorted(countries.items(), key=lambda x: x[1], reverse=True)[:5]
-    top_countries = [{'name': name, 'count': count} for name, count in top_countries]
-    
-    return {
-        'total_startups': len(startups),
-        'last_update': 'há 30 min',  # Simulado baseado na imagem
-        'top_sectors': top_sectors,
-        'top_countries': top_countries
-    }
+    # Garante que o snapshot está carregado; os contadores são atualizados a cada refresh
+    get_startups_data()
+    return statistics_engine.summary()
 
 @app.route('/favicon.ico')
 def favicon():
@@ -148,25 +824,116 @@ def insights():
     """Página de insights com chatbot"""
     return render_template('insights.html')
 
+def _parse_startups_query(args):
+    """Valida os parâmetros de /api/startups. Retorna (consulta, erro)."""
+    try:
+        page = max(int(args.get('page', 1)), 1)
+        limit = min(max(int(args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return None, "'page' e 'limit' devem ser números inteiros"
+    sort = args.get('sort') or None
+    if sort and sort not in TABLE_FIELDS:
+        return None, f"'sort' deve ser um de: {', '.join(TABLE_FIELDS)}"
+    order = args.get('order', 'asc').lower()
+    if order not in ('asc', 'desc'):
+        return None, "'order' deve ser 'asc' ou 'desc'"
+    filters = {}
+    for field in FILTER_FIELDS:
+        # Aceita ?setor=Fintech&setor=Edtech ou ?setor=Fintech,Edtech
+        values = [v.strip() for raw in args.getlist(field) for v in raw.split(',') if v.strip()]
+        if values:
+            filters[field] = values
+    return {'page': page, 'limit': limit, 'sort': sort, 'order': order, 'filters': filters}, None
+
+
 @app.route('/api/startups')
 def api_startups():
-    """API para buscar dados das startups"""
-    startups = get_startups_data()
-    
-    # Formata os dados para a tabela
-    formatted_startups = []
-    for startup in startups:
-        formatted_startup = {
-            'nome': startup.get('Nome da Startup', 'N/A'),
-            'investidor': startup.get('Nome do Investidor (VC)', 'N/A'),
-            'status': startup.get('Status de financiamento', 'N/A'),
-            'pais': startup.get('País', 'N/A'),
-            'tam': startup.get('TAM', 'N/A'),
-            'setor': startup.get('Setor de Atuação', 'N/A')
-        }
-        formatted_startups.append(formatted_startup)
-    
-    return jsonify(formatted_startups)
+    """API para buscar dados das startups (com paginação, filtros e ordenação opcionais)"""
+    get_startups_data()
+    index = startup_index
+    paged = any(param in request.args for param in PAGE_QUERY_PARAMS)
+    query = None
+    if paged:
+        query, error = _parse_startups_query(request.args)
+        if error:
+            return jsonify({'error': error}), 400
+
+    # O conteúdo depende só das linhas do snapshot e da consulta, então o ETag sai antes de montar a resposta
+    canonical_query = repr(sorted(query.items())) if query else ''
+    etag = f"{index.digest}-{hashlib.sha1(canonical_query.encode('utf-8')).hexdigest()[:16]}"
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    if not paged:
+        # Sem parâmetros: mantém o formato antigo (lista completa)
+        response = jsonify(index.rows)
+    else:
+        offset = (query['page'] - 1) * query['limit']
+        total, items = index.query(filters=query['filters'], sort=query['sort'],
+                                   descending=query['order'] == 'desc',
+                                   offset=offset, limit=query['limit'])
+        pages = (total + query['limit'] - 1) // query['limit']
+        response = jsonify({
+            'items': items,
+            'total': total,
+            'page': query['page'],
+            'limit': query['limit'],
+            'pages': pages,
+            'next_page': query['page'] + 1 if query['page'] < pages else None,
+        })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/startups/<path:name>')
+def api_startup_detail(name):
+    """Todas as colunas de uma startup, incluindo os textos longos que ficam fora do snapshot"""
+    records = mirror.find('Nome da Startup', name.strip())
+    if not records:
+        return jsonify({'error': f"Startup '{name}' não encontrada"}), 404
+    response = jsonify(records[0])
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.route('/api/dashboard')
+def api_dashboard():
+    """Payload completo do dashboard (pré-serializado e comprimido, com ETag por versão)"""
+    get_startups_data()
+    version, encoding, body = dashboard_feed.payload(request.accept_encodings)
+    etag = f'dashboard-{version}'
+    if request.if_none_match.contains(etag):
+        dashboard_feed.count('not_modified')
+        response = app.response_class(status=304)
+    else:
+        dashboard_feed.count('payloads_served')
+        response = app.response_class(body, mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/dashboard/stream')
+def api_dashboard_stream():
+    """Server-Sent Events com os deltas do dashboard a partir da versão do cliente"""
+    get_startups_data()
+    since = (request.headers.get('Last-Event-ID') or request.args.get('since') or '').strip() or None
+    if not dashboard_feed.subscribe():
+        # Sem vaga: o cliente revalida /api/dashboard (ETag) em vez de prender mais uma thread
+        response = jsonify({'error': 'Too many open dashboard streams', 'poll': '/api/dashboard',
+                            'poll_seconds': SSE_POLL_SECONDS})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(SSE_POLL_SECONDS)
+        return response
+    response = Response(dashboard_feed.events(since), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Libera a vaga quando o servidor fecha a resposta (cliente desconectado), mesmo sem o gerador ter começado
+    response.call_on_close(dashboard_feed.unsubscribe)
+    return response
 
 @app.route('/api/debug')
 def api_debug():
@@ -187,119 +954,477 @@ def api_statistics():
     """API para buscar estatísticas"""
     return jsonify(get_statistics())
 
+def _parse_analytics_query(args):
+    """Valida os parâmetros comuns de /api/analytics/*. Retorna (campo, seleção, erro)."""
+    field = args.get('field', 'tam')
+    if field not in NUMERIC_FIELDS:
+        return None, None, f"'field' deve ser um de: {', '.join(NUMERIC_FIELDS)}"
+    selection = {'filters': {}}
+    for group in GROUP_FIELDS:
+        values = [v.strip() for raw in args.getlist(group) for v in raw.split(',') if v.strip()]
+        if values:
+            selection['filters'][group] = values
+    try:
+        # 'min' e 'max' aceitam o mesmo formato da planilha ('1B', 'US$ 500M')
+        for param, key in (('min', 'minimum'), ('max', 'maximum')):
+            if args.get(param):
+                bound = parse_money(args[param]) if NUMERIC_FIELDS[field][1] == 'money' else float(args[param])
+                if bound != bound:
+                    raise ValueError(param)
+                selection[key] = bound
+    except ValueError:
+        return None, None, "'min' e 'max' devem ser números"
+    return field, selection, None
+
+
+def _analytics_response(columns, field, result, start):
+    result.update({'field': field, 'column': NUMERIC_FIELDS[field][0], 'version': columns.version,
+                   'elapsed_ms': round((time.perf_counter() - start) * 1000, 3)})
+    return jsonify(result)
+
+@app.route('/api/analytics')
+def api_analytics():
+    """Campos numéricos disponíveis e quantas linhas têm valor em cada um"""
+    get_startups_data()
+    columns = analytics_columns
+    return jsonify({
+        'version': columns.version,
+        'records': columns.size,
+        'build_ms': columns.build_ms,
+        'fields': {field: {'column': column, 'kind': kind} for field, (column, kind) in NUMERIC_FIELDS.items()},
+        'coverage': columns.coverage(),
+        'groups': list(GROUP_FIELDS),
+    })
+
+@app.route('/api/analytics/histogram')
+def api_analytics_histogram():
+    """Histograma de um campo numérico (?field=tam&bins=20&log=1, com filtros opcionais)"""
+    get_startups_data()
+    start = time.perf_counter()
+    field, selection, error = _parse_analytics_query(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        bins = min(max(int(request.args.get('bins', DEFAULT_HISTOGRAM_BINS)), 1), MAX_HISTOGRAM_BINS)
+    except ValueError:
+        return jsonify({'error': "'bins' deve ser um número inteiro"}), 400
+    log = request.args.get('log', '').lower() in ('1', 'true', 'sim')
+    columns = analytics_columns
+    result = columns.histogram(field, bins=bins, log=log, **selection)
+    return _analytics_response(columns, field, result, start)
+
+@app.route('/api/analytics/percentiles')
+def api_analytics_percentiles():
+    """Percentis de um campo numérico (?field=cac&q=50,90,99, com filtros opcionais)"""
+    get_startups_data()
+    start = time.perf_counter()
+    field, selection, error = _parse_analytics_query(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        quantiles = tuple(float(q) for q in request.args['q'].split(',')) if request.args.get('q') \
+            else DEFAULT_PERCENTILES
+    except ValueError:
+        return jsonify({'error': "'q' deve ser uma lista de números entre 0 e 100"}), 400
+    if not all(0 <= q <= 100 for q in quantiles):
+        return jsonify({'error': "'q' deve ser uma lista de números entre 0 e 100"}), 400
+    columns = analytics_columns
+    result = columns.percentiles(field, quantiles=quantiles, **selection)
+    return _analytics_response(columns, field, result, start)
+
+@app.route('/api/analytics/sum-by-sector')
+def api_analytics_sum_by_sector():
+    """Soma, contagem e média de um campo por setor (ou ?by=pais|status)"""
+    get_startups_data()
+    start = time.perf_counter()
+    field, selection, error = _parse_analytics_query(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    by = request.args.get('by', 'setor')
+    if by not in GROUP_FIELDS:
+        return jsonify({'error': f"'by' deve ser um de: {', '.join(GROUP_FIELDS)}"}), 400
+    try:
+        top = int(request.args['top']) if request.args.get('top') else None
+    except ValueError:
+        return jsonify({'error': "'top' deve ser um número inteiro"}), 400
+    columns = analytics_columns
+    result = columns.sum_by(field, by=by, top=top, **selection)
+    result['by'] = by
+    return _analytics_response(columns, field, result, start)
+
+@app.route('/api/cache/stats')
+def api_cache_stats():
+    """API com contadores dos caches (snapshot, respostas do chat e espelho local) e dos limites de taxa"""
+    return jsonify({
+        'snapshot': snapshot_cache.snapshot_stats(),
+        'chat': chat_cache.snapshot_stats(),
+        'chat_local': {**search_index.snapshot_stats(), 'last_update': search_index_updater.last_update},
+        'dashboard': dashboard_feed.snapshot_stats(),
+        'mirror': {'records': mirror.count(), 'last_sync': mirror.last_report},
+        'rate_limit': limiter_stats(),
+        'startup': startup_report(IMPORT_MS),
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Spans do app (planilha, Serper) no formato OpenMetrics"""
+    return tracer.openmetrics(), 200, {'Content-Type': 'application/openmetrics-text; version=1.0.0; charset=utf-8'}
+
+@app.route('/api/cache/invalidate', methods=['POST'])
+def api_cache_invalidate():
+    """Invalida o snapshot e recarrega a planilha imediatamente"""
+    snapshot_cache.invalidate()
+    mirror.mark_due()
+    refreshed = snapshot_cache.refresh()
+    status = 200 if refreshed else 502
+    return jsonify({'refreshed': refreshed, 'cache': snapshot_cache.snapshot_stats()}), status
+
+
+# Sessão HTTP compartilhada (keep-alive) para a Serper
+SERPER_URL = os.getenv('SERPER_URL', 'https://google.serper.dev/search')
+SERPER_TIMEOUT_SECONDS = float(os.getenv('SERPER_TIMEOUT_SECONDS', '20'))
+SERPER_POOL_SIZE = int(os.getenv('SERPER_POOL_SIZE', '10'))
+serper_session = requests.Session()
+serper_session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=SERPER_POOL_SIZE))
+
+# Cache das respostas do chat (pergunta normalizada -> {answer, sources, raw})
+CHAT_CACHE_TTL_SECONDS = float(os.getenv('CHAT_CACHE_TTL_SECONDS', '900'))
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv('CHAT_CACHE_MAX_ENTRIES', '256'))
+
+
+def normalize_chat_query(message):
+    """Normaliza a pergunta para a chave do cache (caixa, espaços e pontuação final)."""
+    text = unicodedata.normalize('NFKC', message).casefold()
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text.rstrip(' ?!.')
+
+
+class _InFlightRequest:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ChatResponseCache:
+    """Cache LRU com TTL para respostas do chat.
+
+    Perguntas idênticas que chegam ao mesmo tempo aguardam a mesma chamada à
+    Serper em vez de abrir uma chamada cada.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # chave -> (expira_em, resposta)
+        self._in_flight = {}
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'errors': 0}
+
+    def get_or_compute(self, key, compute):
+        """Retorna (resposta, origem) com origem 'hit', 'coalesced' ou 'miss'."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1], 'hit'
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _InFlightRequest()
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, 'coalesced'
+
+        try:
+            call.value = compute()
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self.stats['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                if call.error is None:
+                    self._entries[key] = (time.monotonic() + self.ttl, call.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.stats['evictions'] += 1
+            call.done.set()
+        return call.value, 'miss'
+
+    def snapshot_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+            stats['in_flight'] = len(self._in_flight)
+            stats['ttl_seconds'] = self.ttl
+            return stats
+
+
+chat_cache = ChatResponseCache(CHAT_CACHE_TTL_SECONDS, CHAT_CACHE_MAX_ENTRIES)
+
+# Perguntas que a própria base responde ("quais fintechs no México levantaram Seed?") não vão para a Serper
+CHAT_LOCAL_ANSWERS = os.getenv('CHAT_LOCAL_ANSWERS', '1') not in ('0', 'false', 'False')
+CHAT_LOCAL_MIN_CONFIDENCE = float(os.getenv('CHAT_LOCAL_MIN_CONFIDENCE', '0.6'))
+# Colunas lidas do espelho para o índice (inclui os textos longos que ficam fora do snapshot)
+SEARCH_COLUMNS = list(dict.fromkeys(['Nome da Startup', 'Site', *SEARCH_TEXT_FIELDS]))
+
+
+class SearchIndexUpdater:
+    """Mantém o índice de busca do chat em dia com o snapshot, em uma thread de fundo.
+
+    A cada snapshot, só as linhas cuja data de atualização mudou são relidas
+    do espelho e reindexadas; linhas que sumiram saem do índice. Enquanto o
+    primeiro índice não fica pronto, o chat segue usando a Serper.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._lock = threading.Lock()
+        self._pending = None
+        self._running = False
+        self.last_update = None
+
+    def apply_snapshot(self, records, version):
+        with self._lock:
+            self._pending = (records, version)
+            if self._running:
+                return
+            self._running = True
+        threading.Thread(target=self._run, name='indice-chat', daemon=True).start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                pending, self._pending = self._pending, None
+                if pending is None:
+                    self._running = False
+                    return
+            try:
+                self.last_update = self._update(*pending)
+            except Exception as e:
+                print(f"⚠️  Erro ao atualizar o índice de busca do chat: {e}")
+
+    def _update(self, records, version):
+        start = time.perf_counter()
+        if mirror.count():
+            stamps = mirror.row_stamps()
+
+            def load(keys):
+                return mirror.keyed_records(SEARCH_COLUMNS, keys)
+        else:
+            # Sem espelho (dados de exemplo): indexa o próprio snapshot
+            keyed = dict(zip(_row_keys(format_startup_row(r) for r in records), records))
+            stamps = {key: repr(sorted(record.items())) for key, record in keyed.items()}
+
+            def load(keys):
+                return {key: keyed[key] for key in (keyed if keys is None else keys)}
+        indexed = self.index.stamps
+        changed = [key for key, stamp in stamps.items() if key not in indexed or indexed[key] != stamp]
+        removed = [key for key in indexed if key not in stamps]
+        for key in removed:
+            self.index.remove(key)
+        if changed:
+            # Muitas linhas novas (primeira carga): uma leitura só do espelho
+            loaded = load(None if len(changed) > len(stamps) // 2 else changed)
+            for key in changed:
+                if key in loaded:
+                    self.index.upsert(key, loaded[key], stamps[key])
+        self.index.version = version
+        return {'version': version, 'reindexed': len(changed), 'removed': len(removed),
+                'ms': round((time.perf_counter() - start) * 1000, 1)}
+
+
+search_index = StartupSearchIndex()
+search_index_updater = SearchIndexUpdater(search_index)
+snapshot_cache.add_listener(search_index_updater.apply_snapshot)
+
+
+def build_chat_answer(result):
+    """Monta (answer, sources) a partir da resposta da Serper"""
+    # Tentar extrair uma resposta direta (campo 'answer') ou montar um texto a partir dos resultados orgânicos
+    answer = None
+    if isinstance(result, dict):
+        # Primeiro, campo 'answer' (pode conter resposta direta ou snippet)
+        if 'answer' in result and result.get('answer'):
+            a = result.get('answer')
+            if isinstance(a, dict):
+                answer = a.get('answer') or a.get('snippet') or a.get('text')
+            else:
+                answer = str(a)
+
+        # Se não houver resposta direta, tente compor uma resposta mais completa a partir dos snippets orgânicos
+        if not answer:
+            organic = result.get('organic', [])
+            snippets = []
+            if organic and isinstance(organic, list):
+                # colete até 3 snippets/titles para compor uma resposta maior
+                for item in organic[:3]:
+                    s = item.get('snippet') or item.get('title') or ''
+                    if s:
+                        snippets.append(s)
+
+            # também verifique se existe algum 'knowledge' ou 'rich_snippet'
+            if not snippets and result.get('knowledge'):
+                k = result.get('knowledge')
+                if isinstance(k, dict):
+                    ks = k.get('snippets') or k.get('answers') or []
+                    for it in ks[:3]:
+                        if isinstance(it, dict):
+                            s = it.get('text') or it.get('snippet') or ''
+                        else:
+                            s = str(it)
+                        if s:
+                            snippets.append(s)
+
+            # junte e limpe as reticências artificiais
+            if snippets:
+                def normalize_snippets(parts):
+                    cleaned = []
+                    seen = set()
+                    for p in parts:
+                        # remove reticências e múltiplos espaços
+                        s = re.sub(r'\.{2,}', ' ', p)
+                        s = s.replace('\n', ' ').strip()
+                        # remove leading/trailing ellipses or dashes
+                        s = re.sub(r'^[\s\-\u2026]+|[\s\-\u2026]+$', '', s)
+                        if not s:
+                            continue
+                        # simple dedupe: skip if substring already present
+                        key = s.lower()
+                        if key in seen:
+                            continue
+                        if any(key in prev for prev in seen):
+                            continue
+                        seen.add(key)
+                        # ensure ends with punctuation for nicer joining
+                        if not re.search(r'[\.\!\?]$', s):
+                            s = s.rstrip(' ,;:')
+                            s = s + '.'
+                        cleaned.append(s)
+
+                    # join with space to form continuous prose
+                    text = ' '.join(cleaned)
+                    # normalize spaces
+                    text = re.sub(r'\s{2,}', ' ', text).strip()
+                    return text
+
+                answer = normalize_snippets(snippets)
+
+    if not answer:
+        answer = 'Desculpe, não consegui encontrar uma resposta precisa para isso.'
+
+    # Extrair fontes (links) dos resultados orgânicos
+    sources = []
+    if isinstance(result, dict):
+        organic = result.get('organic', [])
+        if organic and isinstance(organic, list):
+            for item in organic[:5]:
+                title = item.get('title') or item.get('serpapi_title') or ''
+                link = item.get('link') or item.get('url') or item.get('source') or ''
+                if link:
+                    sources.append({'title': title, 'link': link})
+
+    return answer, sources
+
+
+def query_serper(message, serper_key):
+    """Consulta a Serper (sessão com keep-alive, limite de taxa e backoff) e retorna {answer, sources, raw}"""
+    headers = {
+        'X-API-KEY': serper_key,
+        'Content-Type': 'application/json'
+    }
+    payload = {'q': message}
+
+    def post():
+        resp = serper_session.post(SERPER_URL, headers=headers, json=payload, timeout=SERPER_TIMEOUT_SECONDS)
+        resp.raise_for_status()
+        return resp
+
+    with tracer.span('serper', 'chat') as span:
+        resp = serper_limiter.call(post, span=span)
+    result = resp.json()
+    answer, sources = build_chat_answer(result)
+    return {'answer': answer, 'sources': sources, 'raw': result}
+
 
 @app.route('/api/chat', methods=['POST'])
 def api_chat():
-    """Recebe uma mensagem do frontend, consulta a Serper API e retorna uma resposta"""
+    """Recebe uma mensagem do frontend e responde pela base local ou, sem confiança suficiente, pela Serper API"""
     data = request.get_json() or {}
     message = data.get('message', '').strip()
     if not message:
         return jsonify({'error': 'No message provided'}), 400
+    # 'include_raw': false omite o payload bruto da Serper (bem maior que a resposta)
+    include_raw = data.get('include_raw', True) not in (False, 'false', '0', 0)
+
+    # 'local': false força a busca na web mesmo quando a base teria resposta
+    if CHAT_LOCAL_ANSWERS and data.get('local', True) not in (False, 'false', '0', 0):
+        get_startups_data()
+        with tracer.span('chat_local') as span:
+            local = search_index.answer(message, CHAT_LOCAL_MIN_CONFIDENCE)
+            span['cache_hit'] = local is not None  # respondida sem chamar a Serper
+        if local:
+            payload = {'answer': local['answer'], 'sources': local['sources'], 'cached': False, 'origin': 'local',
+                       'confidence': local['confidence']}
+            if include_raw:
+                payload['raw'] = {key: local[key] for key in ('matches', 'filters', 'total', 'mode')}
+            return jsonify(payload)
 
     serper_key = os.getenv('SERPER_API_KEY')
     if not serper_key:
         return jsonify({'error': 'SERPER_API_KEY not configured on server'}), 500
 
-    # Chamada à API Serper
+    # Chamada à API Serper (ou resposta em cache para a mesma pergunta)
     try:
-        url = 'https://google.serper.dev/search'
-        headers = {
-            'X-API-KEY': serper_key,
-            'Content-Type': 'application/json'
-        }
-        payload = {'q': message}
-        resp = requests.post(url, headers=headers, json=payload, timeout=20)
-        resp.raise_for_status()
-        result = resp.json()
-
+        response, origin = chat_cache.get_or_compute(
+            normalize_chat_query(message), lambda: query_serper(message, serper_key))
+    except CircuitOpenError as e:
+        return jsonify({'error': 'Serper API temporarily unavailable', 'details': str(e)}), 503, \
+            {'Retry-After': str(int(e.retry_after) + 1)}
+    except requests.RequestException as e:
+        if status_of(e) == 429:
+            # Limite da Serper esgotado mesmo após o backoff: repassa o Retry-After ao cliente
+            retry_after = retry_after_of(e)
+            headers = {'Retry-After': str(int(retry_after) + 1)} if retry_after is not None else {}
+            return jsonify({'error': 'Serper API rate limit exceeded', 'details': str(e)}), 429, headers
+        return jsonify({'error': 'Failed to contact Serper API', 'details': str(e)}), 502
 
-        # Tentar extrair uma resposta direta (campo 'answer') ou montar um texto a partir dos resultados orgânicos
-        answer = None
-        if isinstance(result, dict):
-            # Primeiro, campo 'answer' (pode conter resposta direta ou snippet)
-            if 'answer' in result and result.get('answer'):
-                a = result.get('answer')
-                if isinstance(a, dict):
-                    answer = a.get('answer') or a.get('snippet') or a.get('text')
-                else:
-                    answer = str(a)
-
-            # Se não houver resposta direta, tente compor uma resposta mais completa a partir dos snippets orgânicos
-            if not answer:
-                organic = result.get('organic', [])
-                snippets = []
-                if organic and isinstance(organic, list):
-                    # colete até 3 snippets/titles para compor uma resposta maior
-                    for item in organic[:3]:
-                        s = item.get('snippet') or item.get('title') or ''
-                        if s:
-                            snippets.append(s)
+    payload = {'answer': response['answer'], 'sources': response['sources'], 'cached': origin != 'miss',
+               'origin': 'serper'}
+    if include_raw:
+        payload['raw'] = response['raw']
+    return jsonify(payload)
 
-                # também verifique se existe algum 'knowledge' ou 'rich_snippet'
-                if not snippets and result.get('knowledge'):
-                    k = result.get('knowledge')
-                    if isinstance(k, dict):
-                        ks = k.get('snippets') or k.get('answers') or []
-                        for it in ks[:3]:
-                            if isinstance(it, dict):
-                                s = it.get('text') or it.get('snippet') or ''
-                            else:
-                                s = str(it)
-                            if s:
-                                snippets.append(s)
-
-                # junte e limpe as reticências artificiais
-                if snippets:
-                    def normalize_snippets(parts):
-                        cleaned = []
-                        seen = set()
-                        for p in parts:
-                            # remove reticências e múltiplos espaços
-                            s = re.sub(r'\.{2,}', ' ', p)
-                            s = s.replace('\n', ' ').strip()
-                            # remove leading/trailing ellipses or dashes
-                            s = re.sub(r'^[\s\-\u2026]+|[\s\-\u2026]+$', '', s)
-                            if not s:
-                                continue
-                            # simple dedupe: skip if substring already present
-                            key = s.lower()
-                            if key in seen:
-                                continue
-                            if any(key in prev for prev in seen):
-                                continue
-                            seen.add(key)
-                            # ensure ends with punctuation for nicer joining
-                            if not re.search(r'[\.\!\?]$', s):
-                                s = s.rstrip(' ,;:')
-                                s = s + '.'
-                            cleaned.append(s)
-
-                        # join with space to form continuous prose
-                        text = ' '.join(cleaned)
-                        # normalize spaces
-                        text = re.sub(r'\s{2,}', ' ', text).strip()
-                        return text
-
-                    answer = normalize_snippets(snippets)
+IMPORT_MS = (time.perf_counter() - _IMPORT_STARTED) * 1000
 
-        if not answer:
-            answer = 'Desculpe, não consegui encontrar uma resposta precisa para isso.'
 
-        # Extrair fontes (links) dos resultados orgânicos
-        sources = []
-        if isinstance(result, dict):
-            organic = result.get('organic', [])
-            if organic and isinstance(organic, list):
-                for item in organic[:5]:
-                    title = item.get('title') or item.get('serpapi_title') or ''
-                    link = item.get('link') or item.get('url') or item.get('source') or ''
-                    if link:
-                        sources.append({'title': title, 'link': link})
+def warm_up():
+    """Conecta à planilha e carrega o snapshot antes da primeira requisição.
 
-        return jsonify({'answer': answer, 'raw': result, 'sources': sources})
+    Chamar uma vez por processo; com vários workers, depois do fork (ver
+    gunicorn.conf.py). Retorna o relatório de cold start.
+    """
+    get_worksheet()
+    start = time.perf_counter()
+    snapshot_cache.get()
+    report = startup_report(IMPORT_MS)
+    report['resources_ms']['snapshot'] = round((time.perf_counter() - start) * 1000, 1)
+    report['cold_start_ms'] = round(report['cold_start_ms'] + report['resources_ms']['snapshot'], 1)
+    print(f"[Startup] Cold start: {report}")
+    return report
 
-    except requests.RequestException as e:
-        return jsonify({'error': 'Failed to contact Serper API', 'details': str(e)}), 502
 
 if __name__ == '__main__':
+    warm_up()
     app.run(debug=True, host='0.0.0.0', port=5000)
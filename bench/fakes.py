@@ -0,0 +1,323 @@
+"""Substitutos locais da planilha (gspread) e da Serper para medições offline.
+
+FakeWorksheet guarda as linhas em memória, conta as chamadas por método e
+pode simular latência e erros de cota (429). FakeSerperServer é um servidor
+HTTP local com a mesma rota da Serper, também com latência e cota
+configuráveis. install_fake_gspread() troca gspread.service_account para que
+app.py e main.py conectem na planilha falsa quando abrirem a conexão.
+
+mirror_store é importado só dentro das funções: o caminho do espelho
+(MIRROR_DB_PATH) é lido na importação dele, e o runner só o define depois de
+importar este módulo. O arquivo em si só é aberto no primeiro uso.
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SHEET_NAME = 'Página1'
+
+PAISES = ['Brasil', 'México', 'Argentina', 'Colômbia', 'Chile', 'Peru', 'Uruguai', 'Equador']
+SETORES = ['Fintech', 'Edtech', 'Healthtech', 'Agtech', 'Logtech', 'Retailtech', 'HR Tech', 'Proptech']
+STATUS = ['Pré-seed', 'Seed', 'Série A', 'Série B', 'Série C', 'Bootstrapped']
+INVESTIDORES = ['Kaszek', 'Monashees', 'Canary', 'Valor Capital Group', 'Antler', 'Bossanova Investimentos']
+
+
+class FakeResponse:
+    """Resposta HTTP mínima (status e cabeçalhos) para as exceções falsas."""
+
+    def __init__(self, status_code: int, headers: dict = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeAPIError(Exception):
+    """Erro da API da planilha falsa; expõe `response` como o gspread.exceptions.APIError."""
+
+    def __init__(self, status_code: int, retry_after: float = None):
+        headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+        super().__init__(f'Fake Sheets API error {status_code}')
+        self.response = FakeResponse(status_code, headers)
+
+
+def column_index(letters: str) -> int:
+    """'A' -> 0, 'Z' -> 25, 'AA' -> 26."""
+    index = 0
+    for char in letters:
+        index = index * 26 + ord(char) - ord('A') + 1
+    return index - 1
+
+
+def parse_range(a1: str):
+    """'A2:Z' -> (linha inicial, linha final ou None, coluna inicial, coluna final), 1-based nas linhas."""
+    a1 = a1.split('!')[-1]
+    parts = a1.split(':')
+    start = re.fullmatch(r'([A-Z]+)(\d*)', parts[0])
+    end = re.fullmatch(r'([A-Z]+)(\d*)', parts[-1])
+    first_row = int(start.group(2)) if start.group(2) else 1
+    last_row = int(end.group(2)) if end.group(2) else None
+    return first_row, last_row, column_index(start.group(1)), column_index(end.group(1))
+
+
+def generate_rows(count: int, seed: int = 42, invalid_ratio: float = 0.0) -> list:
+    """`count` linhas de startups sintéticas (com data de atualização), determinísticas pela `seed`.
+
+    Uma fração `invalid_ratio` vem dos EUA ou do setor de Venture Capital,
+    para medir a limpeza.
+    """
+    from mirror_store import REQUIRED_ORDER
+
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        row = {header: f'{header} {i}' for header in REQUIRED_ORDER}
+        row.update({
+            'Nome da Startup': f'Startup {i:06d}',
+            'Site': f'https://startup{i}.example',
+            'País': rng.choice(PAISES),
+            'Setor de Atuação': rng.choice(SETORES),
+            'Status de financiamento': rng.choice(STATUS),
+            'Nome do Investidor (VC)': rng.choice(INVESTIDORES),
+            'Ano de Fundação': str(rng.randint(2005, 2025)),
+            'TAM': f'{rng.uniform(10, 5000):,.2f}',
+            'SAM': f'{rng.uniform(1, 1000):,.2f}',
+            'SOM': f'{rng.uniform(0.1, 100):,.2f}',
+            'Valor da Última Rodada': f'US$ {rng.uniform(0.5, 80):.1f}M',
+            'CAC': f'R$ {rng.uniform(50, 5000):,.2f}'.replace(',', '_').replace('.', ',').replace('_', '.'),
+            'Churn Rate': f'{rng.uniform(0.5, 12):.1f}%',
+        })
+        if rng.random() < invalid_ratio:
+            if rng.random() < 0.5:
+                row['País'] = 'Estados Unidos'
+            else:
+                row['Setor de Atuação'] = 'Venture Capital'
+        values = [row[header] for header in REQUIRED_ORDER]
+        values.append(f'2026-01-{1 + i % 28:02d} 12:00:00')
+        rows.append(values)
+    return rows
+
+
+class FakeWorksheet:
+    """Worksheet em memória com a parte da API do gspread usada pelo projeto."""
+
+    def __init__(self, rows=(), latency: float = 0.0, quota_per_minute: int = None, error_rate: float = 0.0,
+                 seed: int = 0):
+        self.id = 0
+        self.title = SHEET_NAME
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.error_rate = error_rate
+        self.calls = Counter()
+        self.errors = Counter()
+        self._rng = random.Random(seed)
+        self._window = []  # instantes das chamadas aceitas no último minuto
+        self._lock = threading.RLock()
+        self.load(rows)
+
+    def load(self, rows):
+        """Substitui o conteúdo da planilha (a linha 1 é o cabeçalho)."""
+        from mirror_store import SHEET_COLUMNS
+
+        with self._lock:
+            self._values = [list(SHEET_COLUMNS)] + [list(row) for row in rows]
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls.clear()
+            self.errors.clear()
+            self._window = []
+
+    @property
+    def api_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def _call(self, method: str):
+        """Conta a chamada, aplica a latência e, se configurado, falha com 429/503."""
+        with self._lock:
+            self.calls[method] += 1
+            now = time.monotonic()
+            if self.quota_per_minute is not None:
+                self._window = [t for t in self._window if now - t < 60]
+                if len(self._window) >= self.quota_per_minute:
+                    self.errors[method] += 1
+                    raise FakeAPIError(429, retry_after=max(0.0, 60 - (now - self._window[0])))
+                self._window.append(now)
+            failed = self.error_rate and self._rng.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if failed:
+            with self._lock:
+                self.errors[method] += 1
+            raise FakeAPIError(503)
+
+    def _slice(self, a1: str) -> list:
+        first_row, last_row, first_col, last_col = parse_range(a1)
+        last_row = last_row or len(self._values)
+        result = []
+        for values in self._values[first_row - 1:last_row]:
+            cells = values[first_col:last_col + 1]
+            while cells and cells[-1] == '':
+                cells.pop()
+            result.append(cells)
+        while result and not result[-1]:
+            result.pop()
+        return result
+
+    # --- Leitura ---
+
+    def get_all_values(self):
+        self._call('get_all_values')
+        with self._lock:
+            return [list(values) for values in self._values]
+
+    def get_all_records(self):
+        self._call('get_all_records')
+        with self._lock:
+            header = self._values[0]
+            return [dict(zip(header, values)) for values in self._values[1:]]
+
+    def batch_get(self, ranges):
+        self._call('batch_get')
+        with self._lock:
+            return [self._slice(a1) for a1 in ranges]
+
+    # --- Escrita ---
+
+    def batch_update(self, data):
+        self._call('batch_update')
+        with self._lock:
+            for item in data:
+                first_row, _, first_col, _ = parse_range(item['range'])
+                for offset, cells in enumerate(item['values']):
+                    row_index = first_row - 1 + offset
+                    while len(self._values) <= row_index:
+                        self._values.append([''] * len(self._values[0]))
+                    row = self._values[row_index]
+                    for col, value in enumerate(cells, start=first_col):
+                        while len(row) <= col:
+                            row.append('')
+                        row[col] = value
+        return {'totalUpdatedCells': sum(len(cells) for item in data for cells in item['values'])}
+
+    def append_rows(self, rows, **kwargs):
+        self._call('append_rows')
+        with self._lock:
+            first_row = len(self._values) + 1
+            self._values.extend(list(row) for row in rows)
+            last_row = len(self._values)
+        return {'updates': {'updatedRange': f"'{self.title}'!A{first_row}:Z{last_row}", 'updatedRows': len(rows)}}
+
+    def append_row(self, row, **kwargs):
+        return self.append_rows([row], **kwargs)
+
+    def delete_dimension_rows(self, start_index: int, end_index: int):
+        """deleteDimension de ROWS com índices 0-based e fim exclusivo (via FakeSpreadsheet.batch_update)."""
+        with self._lock:
+            del self._values[start_index:end_index]
+
+
+class FakeSpreadsheet:
+    """Spreadsheet falso com uma única aba."""
+
+    def __init__(self, worksheet: FakeWorksheet):
+        self.sheet1 = worksheet
+
+    def batch_update(self, body):
+        self.sheet1._call('spreadsheet.batch_update')
+        for request in body.get('requests', []):
+            target = request.get('deleteDimension', {}).get('range', {})
+            if target.get('dimension') == 'ROWS':
+                self.sheet1.delete_dimension_rows(target['startIndex'], target['endIndex'])
+        return {'replies': [{} for _ in body.get('requests', [])]}
+
+
+class FakeClient:
+    def __init__(self, spreadsheet: FakeSpreadsheet):
+        self._spreadsheet = spreadsheet
+
+    def open(self, name):
+        return self._spreadsheet
+
+
+def install_fake_gspread(worksheet: FakeWorksheet) -> FakeSpreadsheet:
+    """Faz gspread.service_account devolver um cliente ligado à planilha falsa."""
+    import gspread
+
+    spreadsheet = FakeSpreadsheet(worksheet)
+    gspread.service_account = lambda *args, **kwargs: FakeClient(spreadsheet)
+    return spreadsheet
+
+
+class FakeSerperServer:
+    """Servidor HTTP local que imita o POST /search da Serper.
+
+    `latency` em segundos por requisição; `quota_per_second` limita as
+    requisições aceitas por segundo (as demais recebem 429 com Retry-After).
+    """
+
+    def __init__(self, latency: float = 0.0, quota_per_second: float = None, results: int = 5):
+        self.latency = latency
+        self.quota_per_second = quota_per_second
+        self.results = results
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        self._accepted = []
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/search'
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                status, headers, payload = fake.respond(json.loads(body or b'{}'))
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def respond(self, payload: dict):
+        """(status, cabeçalhos, corpo) da resposta a uma consulta."""
+        with self._lock:
+            now = time.monotonic()
+            if self.quota_per_second:
+                self._accepted = [t for t in self._accepted if now - t < 1]
+                if len(self._accepted) >= self.quota_per_second:
+                    self.requests['429'] += 1
+                    return 429, {'Retry-After': '1'}, {'message': 'Too many requests'}
+                self._accepted.append(now)
+            self.requests['200'] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        query = payload.get('q', '')
+        organic = [{'title': f'{query} - resultado {i}', 'link': f'https://example.com/{i}',
+                    'snippet': f'Resumo {i} sobre {query}.'} for i in range(self.results)]
+        return 200, {}, {'searchParameters': {'q': query}, 'answerBox': {'answer': f'Resposta para {query}'},
+                         'organic': organic}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-serper', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,347 @@
+"""Benchmarks offline do app e do pipeline, contra a planilha e a Serper falsas.
+
+Mede latência (p50/p95) e vazão de /api/startups e /api/statistics com
+1k/10k/100k linhas, o /api/chat contra a Serper falsa e o número de
+chamadas à API da planilha feitas por merge_and_write e
+clean_invalid_startups. Cada execução é salva em bench/results/ e comparada
+com a anterior (ou com --baseline), apontando as métricas que pioraram.
+
+    python -m bench.run
+    python -m bench.run --sizes 1000 10000 --requests 100 --fail-on-regression 20
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from bench.fakes import FakeSerperServer, FakeWorksheet, generate_rows, install_fake_gspread
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+APP_ENDPOINTS = {
+    'startups_full': '/api/startups',
+    'startups_page': '/api/startups?page=1&limit=50',
+    'startups_filtered': '/api/startups?setor=Fintech,Edtech&sort=tam&order=desc&limit=50',
+    'statistics': '/api/statistics',
+    'dashboard': '/api/dashboard',
+    'analytics_histogram': '/api/analytics/histogram?field=tam&bins=30&log=1',
+    'analytics_percentiles': '/api/analytics/percentiles?field=cac&setor=Fintech',
+    'analytics_sum_by_sector': '/api/analytics/sum-by-sector?field=rodada',
+}
+
+
+def percentile(values, q: float):
+    from tracing import percentile as _percentile
+    value = _percentile(values, q)
+    return round(value, 3) if value is not None else None
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def configure_environment(workdir: str, serper_url: str):
+    """Isola caches, espelho e traces em `workdir` e aponta o app para a Serper falsa."""
+    os.environ.update({
+        'MIRROR_DB_PATH': os.path.join(workdir, 'mirror.db'),
+        'SEARCH_CACHE_PATH': os.path.join(workdir, 'search_cache.db'),
+        'TRACE_DIR': os.path.join(workdir, 'traces'),
+        'SERPER_URL': serper_url,
+        'SERPER_API_KEY': os.environ.get('SERPER_API_KEY') or 'bench',
+        # Cada medição recarrega o snapshot explicitamente
+        'SNAPSHOT_TTL_SECONDS': '3600',
+        'MIRROR_SYNC_SECONDS': '3600',
+    })
+    # Sem limite de taxa local: mede o app, não o token bucket (a cota fica a cargo dos fakes)
+    for backend in ('SHEETS', 'SERPER', 'LLM'):
+        os.environ.setdefault(f'{backend}_RATE_PER_SECOND', '0')
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool = True):
+    """Silencia os prints do app durante as medições."""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def measure(client_factory, path: str, requests: int, concurrency: int) -> dict:
+    """Dispara `requests` GETs em `concurrency` threads. Retorna p50/p95 (ms) e vazão."""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    per_thread = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+
+    def worker(count):
+        client = client_factory()
+        local, failed = [], 0
+        for _ in range(count):
+            start = time.perf_counter()
+            response = client.get(path)
+            local.append((time.perf_counter() - start) * 1000)
+            failed += response.status_code >= 400
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=worker, args=(count,)) for count in per_thread if count]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+    }
+
+
+def bench_app(app_module, fake: FakeWorksheet, sizes, requests: int, concurrency: int) -> dict:
+    results = {}
+    client_factory = app_module.app.test_client
+    for size in sizes:
+        print(f'[bench] app: {size} linhas')
+        fake.load(generate_rows(size))
+        fake.reset_counters()
+        size_results = {}
+        start = time.perf_counter()
+        app_module.mirror.sync(app_module.get_worksheet(), full=True)
+        size_results['mirror_full_sync_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        start = time.perf_counter()
+        app_module.snapshot_cache.refresh()
+        size_results['snapshot_refresh_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        for name, path in APP_ENDPOINTS.items():
+            # A lista completa cresce com a planilha: menos requisições nas maiores
+            count = max(concurrency, requests * 1000 // size) if name in ('startups_full', 'dashboard') else requests
+            size_results[name] = measure(client_factory, path, count, concurrency)
+        size_results['sheet_api_calls'] = fake.api_calls
+        results[str(size)] = size_results
+    return results
+
+
+def bench_chat(app_module, serper: FakeSerperServer, requests: int, concurrency: int, distinct: int) -> dict:
+    """/api/chat com `distinct` perguntas diferentes repetidas até `requests` chamadas."""
+    print('[bench] chat')
+    serper.requests.clear()
+    latencies, statuses = [], []
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        client = app_module.app.test_client()
+        for i in counter:
+            start = time.perf_counter()
+            response = client.post('/api/chat', json={'message': f'startups de ia pergunta {i % distinct}',
+                                                      'include_raw': False})
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': len(latencies),
+        'errors': sum(status >= 400 for status in statuses),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'serper_requests': sum(serper.requests.values()),
+        'serper_429': serper.requests['429'],
+    }
+
+
+def bench_pipeline(fake: FakeWorksheet, startups: int, clean_rows: int) -> dict:
+    """Chamadas à API feitas por merge_and_write (em lote) e clean_invalid_startups."""
+    print('[bench] pipeline')
+    os.environ.setdefault('OPENAI_API_KEY', 'bench')
+    fake.load(generate_rows(clean_rows))
+    try:
+        import main
+    except ImportError as e:
+        return {'skipped': f'main.py não importável neste ambiente: {e}'}
+
+    results = {}
+    main.get_sheet_writer().invalidate_index()
+    fake.reset_counters()
+    new_rows = generate_rows(startups, seed=7)
+    start = time.perf_counter()
+    for i, values in enumerate(new_rows):
+        record = dict(zip(main.REQUIRED_ORDER, values))
+        # Metade atualiza startups existentes, metade é nova
+        name = f'Startup {i:06d}' if i % 2 else f'Nova Startup {i:06d}'
+        record['Nome da Startup'] = name
+        output = '```json\n' + json.dumps(record, ensure_ascii=False) + '\n```'
+        main.merge_and_write(name, [output])
+    main.get_sheet_writer().flush()
+    results['merge_and_write'] = {
+        'startups': startups,
+        'api_calls': fake.api_calls,
+        'api_calls_per_startup': round(fake.api_calls / startups, 3) if startups else None,
+        'total_ms': round((time.perf_counter() - start) * 1000, 1),
+    }
+
+    fake.load(generate_rows(clean_rows, seed=11, invalid_ratio=0.1))
+    main.get_sheet_writer().invalidate_index()
+    main.mirror.sync(main.get_worksheet(), full=True)
+    fake.reset_counters()
+    start = time.perf_counter()
+    report = main.clean_invalid_startups()
+    results['clean_invalid_startups'] = {
+        'rows': clean_rows,
+        'removed': len(report['rows']),
+        'ranges': len(report['ranges']),
+        'api_calls': fake.api_calls,
+        'total_ms': round((time.perf_counter() - start) * 1000, 1),
+    }
+    return results
+
+
+def flatten(results: dict, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}.{key}' if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def lower_is_better(metric: str):
+    """True/False conforme a direção da métrica; None para métricas só informativas."""
+    leaf = metric.rsplit('.', 1)[-1]
+    if leaf == 'rps':
+        return False
+    if leaf.endswith('_ms') or 'api_calls' in leaf or leaf in ('errors', 'serper_requests', 'serper_429'):
+        return True
+    return None
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """[(métrica, antes, depois, variação %)] das métricas que pioraram mais que `threshold` %."""
+    regressions = []
+    before, after = flatten(baseline.get('results', {})), flatten(current.get('results', {}))
+    for metric, new in sorted(after.items()):
+        old = before.get(metric)
+        direction = lower_is_better(metric)
+        if old in (None, 0) or direction is None:
+            continue
+        change = (new - old) / old * 100
+        worse = change if direction else -change
+        if worse > threshold:
+            regressions.append((metric, old, new, round(change, 1)))
+    return regressions
+
+
+def latest_result(exclude: str = None):
+    paths = sorted(p for p in glob.glob(os.path.join(RESULTS_DIR, '*.json')) if p != exclude)
+    return paths[-1] if paths else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks offline com planilha e Serper falsas.')
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES), help='linhas da planilha')
+    parser.add_argument('--requests', type=int, default=200, help='requisições por endpoint')
+    parser.add_argument('--concurrency', type=int, default=4, help='clientes simultâneos')
+    parser.add_argument('--sheet-latency', type=float, default=0.0, help='latência da planilha falsa (s)')
+    parser.add_argument('--sheet-quota', type=int, default=None, help='chamadas por minuto antes do 429')
+    parser.add_argument('--serper-latency', type=float, default=0.05, help='latência da Serper falsa (s)')
+    parser.add_argument('--serper-quota', type=float, default=None, help='requisições por segundo antes do 429')
+    parser.add_argument('--chat-distinct', type=int, default=20, help='perguntas diferentes no /api/chat')
+    parser.add_argument('--pipeline-startups', type=int, default=100, help='startups gravadas por merge_and_write')
+    parser.add_argument('--clean-rows', type=int, default=1000, help='linhas da planilha na limpeza')
+    parser.add_argument('--skip', nargs='*', default=[], choices=['app', 'chat', 'pipeline'])
+    parser.add_argument('--baseline', help='arquivo de resultados para comparar (padrão: o mais recente)')
+    parser.add_argument('--threshold', type=float, default=10.0, help='piora (%%) reportada como regressão')
+    parser.add_argument('--fail-on-regression', type=float, default=None, metavar='PCT',
+                        help='sai com erro se alguma métrica piorar mais que PCT %%')
+    parser.add_argument('--verbose', action='store_true', help='mostra os prints do app')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='inception-bench-')
+    serper = FakeSerperServer(latency=args.serper_latency, quota_per_second=args.serper_quota).start()
+    configure_environment(workdir, serper.url)
+    fake = FakeWorksheet(latency=args.sheet_latency, quota_per_minute=args.sheet_quota)
+    install_fake_gspread(fake)
+
+    results = {}
+    try:
+        with quiet(not args.verbose):
+            import app as app_module
+        if 'app' not in args.skip:
+            with quiet(not args.verbose):
+                results['app'] = bench_app(app_module, fake, args.sizes, args.requests, args.concurrency)
+        if 'chat' not in args.skip:
+            with quiet(not args.verbose):
+                results['chat'] = bench_chat(app_module, serper, args.requests, args.concurrency,
+                                             args.chat_distinct)
+        if 'pipeline' not in args.skip:
+            with quiet(not args.verbose):
+                results['pipeline'] = bench_pipeline(fake, args.pipeline_startups, args.clean_rows)
+    finally:
+        serper.stop()
+
+    commit = git_commit()
+    document = {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'args': vars(args),
+        'results': results,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    baseline_path = args.baseline or latest_result()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    print(f'[bench] Resultados em {path}')
+
+    if not baseline_path:
+        return 0
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(document, baseline, args.threshold)
+    print(f"[bench] Comparado com {os.path.basename(baseline_path)} (commit {baseline.get('commit')}):")
+    ignored = ('baseline', 'threshold', 'fail_on_regression', 'verbose', 'skip')
+    changed = [k for k, v in vars(args).items() if k not in ignored and baseline.get('args', {}).get(k) != v]
+    if changed:
+        print(f"[bench] Aviso: parâmetros diferentes da referência ({', '.join(changed)}); compare com cautela.")
+    if not regressions:
+        print(f'[bench] Nenhuma métrica piorou mais de {args.threshold}%.')
+    for metric, old, new, change in regressions:
+        print(f'[bench] REGRESSÃO {metric}: {old} -> {new} ({change:+}%)')
+    if args.fail_on_regression is not None and any(
+            abs(change) > args.fail_on_regression for *_, change in regressions):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,26 @@
+"""Configuração do gunicorn: importa o app uma vez no master e conecta em cada worker.
+
+    gunicorn app:app -c gunicorn.conf.py
+
+A importação do app não abre conexões, então o preload é barato e os workers
+nascem por fork; cada um conecta à planilha e carrega o snapshot no post_fork.
+
+Cada stream SSE do dashboard (/api/dashboard/stream) prende uma thread do
+worker enquanto a aba estiver aberta. O app aceita no máximo
+SSE_MAX_CONNECTIONS streams por worker (padrão: metade de GUNICORN_THREADS);
+acima disso os dashboards revalidam /api/dashboard periodicamente e as
+demais threads ficam livres para a API.
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+preload_app = True
+
+
+def post_fork(server, worker):
+    import app
+
+    app.warm_up()
@@ -0,0 +1,148 @@
+"""Extração de objetos JSON das respostas dos agentes.
+
+Os modelos às vezes cercam o JSON com texto, blocos ```json, repetem o
+objeto (um exemplo e depois a resposta) ou deixam vírgula sobrando. Em vez
+de um json.loads no texto todo seguido de uma regex gulosa, o texto é
+varrido uma única vez contando chaves (fora de strings) e cada objeto de
+nível mais externo é decodificado separadamente, com pequenos reparos; se
+um par não decodifica, valem os objetos de dentro dele.
+"""
+import json
+import re
+
+# Aspas tipográficas que os modelos às vezes usam no lugar de aspas retas
+_SMART_QUOTES = str.maketrans({'“': '"', '”': '"', '„': '"', '″': '"'})
+_TRAILING_COMMA = re.compile(r',(\s*[}\]])')
+_PYTHON_LITERALS = re.compile(r'(?<=[:\[,\s])(True|False|None)(?=\s*[,}\]])')
+_PYTHON_JSON = {'True': 'true', 'False': 'false', 'None': 'null'}
+# Strings JSON (a última pode estar aberta, numa resposta cortada): os reparos não mexem dentro delas
+_STRING = re.compile(r'("(?:\\.|[^"\\])*"?)')
+MAX_TRUNCATED_ATTEMPTS = 8  # objetos abertos até o fim do texto que tentamos fechar
+
+
+def _object_spans(text: str):
+    """Todos os pares {...} do texto, em uma passada: (fechados, abertos).
+
+    `fechados` tem (início, fim) de cada par, de qualquer profundidade;
+    `abertos` tem o início dos objetos que ficaram abertos até o fim do
+    texto (resposta truncada), do mais externo para o mais interno.
+    """
+    closed = []
+    stack = []
+    in_string = False
+    escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"' and stack:
+            in_string = True
+        elif char == '{':
+            stack.append(i)
+        elif char == '}' and stack:
+            closed.append((stack.pop(), i + 1))
+    return closed, stack
+
+
+def _repair_outside_strings(segment: str) -> str:
+    segment = _TRAILING_COMMA.sub(r'\1', segment)
+    return _PYTHON_LITERALS.sub(lambda m: _PYTHON_JSON[m.group(1)], segment)
+
+
+def _repair(fragment: str) -> str:
+    """Reparos mínimos: aspas tipográficas, vírgula final e literais do Python (fora das strings)."""
+    parts = _STRING.split(fragment.translate(_SMART_QUOTES))
+    # split com grupo: posições ímpares são as strings, que ficam como estão
+    return ''.join(part if i % 2 else _repair_outside_strings(part) for i, part in enumerate(parts))
+
+
+def _close_truncated(fragment: str) -> str:
+    """Fecha string, listas e objetos deixados abertos por uma resposta cortada."""
+    stack = []
+    in_string = False
+    escaped = False
+    for char in fragment:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]' and stack:
+            stack.pop()
+    closed = fragment + ('"' if in_string else '')
+    closed = re.sub(r'[,:\s]+$', '', closed)
+    return closed + ''.join(reversed(stack))
+
+
+def _decode(fragment: str):
+    for attempt in (fragment, _repair(fragment)):
+        try:
+            return json.loads(attempt)
+        except ValueError:
+            continue
+    return None
+
+
+def extract_json_objects(raw) -> list:
+    """Todos os objetos JSON (dicts) encontrados em `raw`, na ordem em que aparecem."""
+    if isinstance(raw, dict):
+        return [raw]
+    if not isinstance(raw, str) or not raw.strip():
+        return []
+    whole = _decode(raw.strip())
+    if isinstance(whole, dict):
+        return [whole]
+    closed, unclosed = _object_spans(raw)
+    # Candidatos na ordem do texto; um par que não decodifica (uma '{' solta que engoliu o objeto
+    # real) cede a vez aos pares de dentro, que vêm logo depois na ordenação
+    candidates = sorted(closed + [(start, None) for start in unclosed])
+    objects = []
+    covered = 0  # fim do último objeto aceito: os pares dentro dele não contam
+    truncated_attempts = 0
+    for start, end in candidates:
+        if start < covered:
+            continue
+        if end is None:
+            if truncated_attempts >= MAX_TRUNCATED_ATTEMPTS:
+                continue
+            truncated_attempts += 1
+            value = _decode(_close_truncated(_repair(raw[start:])))
+        else:
+            value = _decode(raw[start:end])
+        if isinstance(value, dict):
+            objects.append(value)
+            covered = end if end is not None else len(raw)
+    return objects
+
+
+def best_json_object(raw, keys) -> dict:
+    """Mescla os objetos de `raw` que têm alguma das `keys`; valores vazios não sobrescrevem.
+
+    Objetos sem nenhuma chave esperada (exemplos, metadados) são ignorados.
+    Retorna {} se nada for aproveitável.
+    """
+    expected = set(keys)
+    merged = {}
+    for obj in extract_json_objects(raw):
+        if not expected & obj.keys():
+            continue
+        for key, value in obj.items():
+            if value not in (None, '') or key not in merged:
+                merged[key] = value
+    return merged
+
+
+def missing_keys(obj: dict, keys) -> list:
+    """Chaves esperadas que não vieram no objeto (string vazia conta como resposta)."""
+    return [key for key in keys if key not in obj]
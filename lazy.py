@@ -0,0 +1,58 @@
+"""Recursos criados sob demanda (conexões, ferramentas e agentes).
+
+Nada é conectado na importação: cada recurso é criado na primeira chamada a
+get(), uma única vez por processo, mesmo com várias threads pedindo ao mesmo
+tempo. Depois de um fork (ex.: workers do gunicorn) o filho cria o seu
+próprio recurso em vez de herdar conexões do processo pai. O tempo de criação
+de cada recurso fica registrado para o relatório de cold start.
+"""
+import os
+import threading
+import time
+
+_registry = []
+
+
+class Lazy:
+    """Valor construído por `factory()` no primeiro get() de cada processo."""
+
+    def __init__(self, name: str, factory):
+        self.name = name
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value = None
+        self._pid = None
+        self.load_ms = None
+        _registry.append(self)
+
+    @property
+    def loaded(self) -> bool:
+        return self._pid == os.getpid()
+
+    def get(self):
+        if self._pid == os.getpid():
+            return self._value
+        with self._lock:
+            if self._pid != os.getpid():
+                start = time.perf_counter()
+                self._value = self._factory()
+                self.load_ms = round((time.perf_counter() - start) * 1000, 1)
+                self._pid = os.getpid()
+        return self._value
+
+    def reset(self):
+        """Descarta o valor; o próximo get() cria de novo."""
+        with self._lock:
+            self._value = None
+            self._pid = None
+            self.load_ms = None
+
+
+def startup_report(import_ms: float = None) -> dict:
+    """Tempo de importação e de criação (ms) de cada recurso já carregado neste processo."""
+    resources = {lazy.name: lazy.load_ms for lazy in _registry if lazy.loaded}
+    report = {'pid': os.getpid(), 'resources_ms': resources}
+    if import_ms is not None:
+        report['import_ms'] = round(import_ms, 1)
+        report['cold_start_ms'] = round(import_ms + sum(resources.values()), 1)
+    return report
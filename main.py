@@ -1,13 +1,23 @@
+import time
+_IMPORT_STARTED = time.perf_counter()  # para o relatório de cold start
+
 # Carrega as chaves secretas do arquivo .env
 from dotenv import load_dotenv
 load_dotenv()
 
 # Importações padrão e de bibliotecas
 import os
+import sys
 import json
+import argparse
 import re
+import atexit
+import threading
+import unicodedata
 import gspread
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
 
 # Importações do CrewAI e ferramentas
 from crewai import Agent, Task, Crew, Process
@@ -21,97 +31,446 @@ except ImportError:  # Fallback simples para não quebrar execução
             fn.tool_name = name
             return fn
         return decorator
-from crewai_tools import SerperDevTool, WebsiteSearchTool
+from search_cache import CachedSerperDevTool, CachedWebsiteSearchTool, get_search_cache
+from mirror_store import mirror, REQUIRED_ORDER, TIMESTAMP_COLUMN, TIMESTAMP_LETTER
+from run_journal import RunJournal
+from json_extract import best_json_object, missing_keys
+from rules import lista_paises_latam, classify, classify_rows, match_rejected_sector, PAIS_EUA, PAIS_FORA_LATAM
+from tracing import tracer, add_tokens, crew_agent, TracedWorksheet
+from lazy import Lazy, startup_report
+from prospect_shards import ShardScheduler, build_shards
+from rate_limit import sheets_limiter, llm_limiter, limiter_stats, is_retryable, is_rate_limited, CircuitOpenError
 
 # --- CONFIGURAÇÃO DAS FERRAMENTAS ---
-search_tool = SerperDevTool()
-website_tool = WebsiteSearchTool()
+# Buscas repetidas (entre tentativas e entre execuções) são respondidas pelo cache local em SQLite.
+# As ferramentas (o WebsiteSearchTool inicializa um backend de embeddings) só são criadas no primeiro uso.
+_search_tool = Lazy('search_tool', CachedSerperDevTool)
+_website_tool = Lazy('website_tool', CachedWebsiteSearchTool)
+
+def get_search_tool():
+    return _search_tool.get()
+
+def get_website_tool():
+    return _website_tool.get()
 
 # --- CONEXÃO COM A PLANILHA (Google Sheets) ---
-try:
+def open_spreadsheet():
+    """Conecta à planilha. Lança exceção se não for possível (o fluxo principal encerra)."""
     gc = gspread.service_account(filename='credentials.json')
-    spreadsheet = gc.open("Base de Startups NVIDIA")
-    worksheet = spreadsheet.sheet1
+    # Cada chamada à API da planilha vira um span (etapa 'sheets') e passa pelo limite de taxa.
+    # O batch_update da planilha apaga linhas por índice: repetido após um timeout que já foi
+    # aplicado, apagaria as startups erradas, então só é retentado em 429.
+    spreadsheet = TracedWorksheet(gc.open("Base de Startups NVIDIA"), limiter=sheets_limiter,
+                                  non_idempotent=('batch_update',))
     print("Conexão com a planilha bem-sucedida.")
-except Exception as e:
-    print(f"Erro ao conectar com a planilha: {e}")
-    exit()
+    return spreadsheet
+
+_spreadsheet = Lazy('sheets', open_spreadsheet)
+_worksheet = Lazy('worksheet', lambda: TracedWorksheet(get_spreadsheet().sheet1, limiter=sheets_limiter))
+
+def get_spreadsheet():
+    return _spreadsheet.get()
+
+def get_worksheet():
+    return _worksheet.get()
+
+# --- ESCRITA EM LOTE NA PLANILHA ---
+SHEET_WRITE_BATCH_SIZE = int(os.getenv('SHEET_WRITE_BATCH_SIZE', '20'))  # linhas pendentes que disparam um flush
+SHEET_WRITE_FLUSH_SECONDS = float(os.getenv('SHEET_WRITE_FLUSH_SECONDS', '30'))  # idade máxima de uma linha pendente
+
+class SheetWriter:
+    """Buffer de escrita (write-behind) para a planilha.
+
+    Mantém localmente o índice nome -> linha (vindo do espelho local, após uma
+    sincronização incremental), agrupa upserts da mesma startup e grava tudo
+    com um batch_update para as linhas existentes e um append_rows para as
+    novas, ao atingir o tamanho ou a idade máxima do lote. As linhas gravadas
+    também vão para o espelho.
+    """
+
+    def __init__(self, worksheet, batch_size, flush_seconds):
+        self.worksheet = worksheet
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._lock = threading.RLock()
+        self._row_index = None  # nome da startup -> número da linha
+        self._pending = {}      # nome da startup -> linha completa (a última versão vence)
+        self._oldest_pending_at = None
+        self._wake = threading.Event()
+        self._closed = False
+        self._flusher = None
+        self.flushes = []
+
+    def _load_index(self):
+        # As posições precisam estar corretas para escrever: sincroniza antes de ler o espelho
+        mirror.sync(self.worksheet)
+        self._row_index = mirror.row_index()
+
+    def known_names(self):
+        """Nomes já presentes na planilha (carrega o índice na primeira chamada)."""
+        with self._lock:
+            if self._row_index is None:
+                self._load_index()
+            return set(self._row_index)
+
+    def names_by_row(self) -> list:
+        """Nomes da planilha na ordem das linhas (as mais recentes no fim)."""
+        with self._lock:
+            if self._row_index is None:
+                self._load_index()
+            return sorted(self._row_index, key=self._row_index.get)
+
+    def invalidate_index(self):
+        """Descarta o índice local (ex.: depois de remover linhas da planilha)."""
+        with self._lock:
+            self.flush()
+            self._row_index = None
+
+    def upsert(self, row_data):
+        """Enfileira a linha (gravada no próximo flush). Retorna True se a startup já existe na planilha."""
+        name = row_data[0]
+        with self._lock:
+            if self._row_index is None:
+                self._load_index()
+            exists = name in self._row_index
+            self._pending[name] = row_data
+            if self._oldest_pending_at is None:
+                self._oldest_pending_at = time.monotonic()
+            self._ensure_flusher()
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+        return exists
+
+    def _ensure_flusher(self):
+        if self._flusher is None and self.flush_seconds > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name='sheet-writer', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_seconds / 2)
+            self._wake.clear()
+            with self._lock:
+                due = (self._oldest_pending_at is not None
+                       and time.monotonic() - self._oldest_pending_at >= self.flush_seconds)
+                if due:
+                    self.flush()
+
+    def flush(self):
+        """Grava tudo o que está pendente (no máximo duas chamadas à API)."""
+        with self._lock:
+            if not self._pending:
+                return None
+            if self._row_index is None:
+                self._load_index()
+            pending = self._pending
+            self._pending = {}
+            self._oldest_pending_at = None
+            updates = [(self._row_index[name], row) for name, row in pending.items() if name in self._row_index]
+            inserts = [row for name, row in pending.items() if name not in self._row_index]
+            start = time.perf_counter()
+            calls = 0
+            appending = False
+            try:
+                with tracer.span('sheet_write', 'flush', updated=len(updates), appended=len(inserts)):
+                    if updates:
+                        self.worksheet.batch_update([{'range': f'A{row}', 'values': [data]} for row, data in updates])
+                        calls += 1
+                        mirror.upsert_rows(updates)
+                    if inserts:
+                        appending = True
+                        response = self.worksheet.append_rows(inserts)
+                        calls += 1
+                        self._register_appended(inserts, response)
+            except Exception as e:
+                # Devolve ao buffer o que não foi confirmado, sem sobrescrever versões mais novas
+                for name, row in pending.items():
+                    self._pending.setdefault(name, row)
+                if self._pending and self._oldest_pending_at is None:
+                    self._oldest_pending_at = time.monotonic()
+                print(f"[SheetWriter] Erro ao gravar lote de {len(pending)} linha(s): {e}")
+                if appending and not is_rate_limited(e) and not isinstance(e, CircuitOpenError):
+                    # O append pode ter sido aplicado (timeout, 5xx): a próxima escrita sincroniza o índice
+                    # antes, e as linhas que já chegaram à planilha viram atualizações em vez de duplicatas
+                    self._row_index = None
+                return None
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            report = {'updated': len(updates), 'appended': len(inserts), 'api_calls': calls,
+                      'latency_ms': round(elapsed_ms, 1)}
+            self.flushes.append(report)
+            print(f"[SheetWriter] Lote gravado: {report['updated']} atualizada(s), {report['appended']} nova(s), "
+                  f"{calls} chamada(s) em {report['latency_ms']} ms")
+            return report
+
+    def write_cells(self, cells_by_name: dict) -> tuple:
+        """Grava células de startups já existentes: {nome: {cabeçalho: valor}}.
+
+        A linha de cada nome é procurada no índice recém-sincronizado (não na
+        posição lida antes da pesquisa), então linhas apagadas ou inseridas no
+        meio tempo não desviam a gravação para outra startup. Nomes que não
+        estão mais na planilha são ignorados. Retorna ({nome: linha}, ignorados).
+        """
+        with self._lock:
+            self.flush()
+            self._load_index()
+            rows = {name: self._row_index[name] for name in cells_by_name if name in self._row_index}
+            skipped = [name for name in cells_by_name if name not in rows]
+            data = [{'range': f'{column_letter(header)}{rows[name]}', 'values': [[value]]}
+                    for name, cells in cells_by_name.items() if name in rows for header, value in cells.items()]
+            if data:
+                with tracer.span('sheet_write', 'cells', cells=len(data)):
+                    self.worksheet.batch_update(data)
+                for name, row in rows.items():
+                    mirror.update_cells(row, cells_by_name[name])
+            return rows, skipped
+
+    def _register_appended(self, rows, response):
+        """Atualiza o índice local com as linhas recém-adicionadas."""
+        updated_range = (response or {}).get('updates', {}).get('updatedRange', '')
+        match = re.search(r'![A-Z]+(\d+)', updated_range)
+        if not match:
+            # Sem a faixa na resposta, recarrega o índice na próxima escrita
+            self._row_index = None
+            return
+        first_row = int(match.group(1))
+        for offset, row in enumerate(rows):
+            self._row_index[row[0]] = first_row + offset
+        mirror.upsert_rows([(first_row + offset, row) for offset, row in enumerate(rows)])
+
+    def close(self):
+        """Grava o que estiver pendente e encerra a thread de flush."""
+        self._closed = True
+        self._wake.set()
+        self.flush()
+
+    def summary(self):
+        with self._lock:
+            total_ms = sum(f['latency_ms'] for f in self.flushes)
+            return {
+                'flushes': len(self.flushes),
+                'rows_updated': sum(f['updated'] for f in self.flushes),
+                'rows_appended': sum(f['appended'] for f in self.flushes),
+                'api_calls': sum(f['api_calls'] for f in self.flushes),
+                'avg_flush_ms': round(total_ms / len(self.flushes), 1) if self.flushes else None,
+                'pending': len(self._pending),
+            }
+
+def _create_sheet_writer():
+    writer = SheetWriter(get_worksheet(), SHEET_WRITE_BATCH_SIZE, SHEET_WRITE_FLUSH_SECONDS)
+    atexit.register(writer.close)
+    return writer
+
+_sheet_writer = Lazy('sheet_writer', _create_sheet_writer)
+
+def get_sheet_writer() -> SheetWriter:
+    return _sheet_writer.get()
+
+# Diário da execução atual (definido no fluxo principal; None fora dele)
+run_journal = None
 
 # --- FERRAMENTA PERSONALIZADA PARA O GOOGLE SHEETS ---
+SHEET_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"  # coluna 'Última Atualização'
+
+def sheet_value(value):
+    """Valor como vai para a célula: ausências viram 'Não disponível'/'Não encontrado'."""
+    if value in (None, 'N/A', 'n/a', 'NA'):
+        return 'Não disponível'
+    return value or 'Não encontrado'
+
 @tool("Spreadsheet Update Tool")
 def spreadsheet_tool(data_json: str) -> str:
     """Atualiza ou insere uma linha da startup. Exige pelo menos 'Nome da Startup'."""
-    REQUIRED_ORDER = [
-        'Nome da Startup','Site','Setor de Atuação','País','Legalmente Instituída','Ano de Fundação',
-        'Tecnologias Utilizadas','Nome do Investidor (VC)','Valor da Última Rodada','Status de financiamento',
-        'Liderança Técnica (Nome)','Liderança Técnica (LinkedIn)','Integrantes do Time','Tamanho da Startup',
-        'Base de Clientes','TAM','SAM','SOM','Dinâmica do Setor','Principais Concorrentes',
-        'Previsões de Mercado','Análise de Riscos Ambientais','CAC','Churn Rate','Fontes da Análise de Mercado'
-    ]
     try:
         data = json.loads(data_json)
         if not data.get('Nome da Startup'):
             return "Erro: campo 'Nome da Startup' ausente no JSON enviado ao spreadsheet_tool." 
-        # Normaliza valores
-        normalized = {k: (v if v not in (None, 'N/A', 'n/a', 'NA') else 'Não disponível') for k, v in data.items()}
-        cell = worksheet.find(normalized['Nome da Startup'])
-        row_data = [normalized.get(k, '') or 'Não encontrado' for k in REQUIRED_ORDER]
-        row_data.append(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-        if cell:
-            worksheet.update(f'A{cell.row}', [row_data])
-            return f"Dados da startup '{normalized['Nome da Startup']}' atualizados com sucesso."
-        worksheet.append_row(row_data)
-        return f"Nova startup '{normalized['Nome da Startup']}' adicionada com sucesso."
+        normalized = {k: sheet_value(v) for k, v in data.items()}
+        row_data = [normalized.get(k, 'Não encontrado') for k in REQUIRED_ORDER]
+        row_data.append(datetime.now().strftime(SHEET_TIMESTAMP_FORMAT))
+        # A gravação acontece em lote (ver SheetWriter): a linha ainda não está na planilha ao retornar
+        name = normalized['Nome da Startup']
+        if get_sheet_writer().upsert(row_data):
+            return (f"Dados da startup '{name}' enfileirados para atualização; a gravação na planilha "
+                    "está pendente e acontece no próximo lote.")
+        return (f"Nova startup '{name}' enfileirada para inserção; a gravação na planilha está pendente "
+                "e acontece no próximo lote.")
     except Exception as e:
         return f"Ocorreu um erro ao interagir com a planilha: {str(e)}"
 
 # --- EQUIPE DE AGENTES ESPECIALISTAS ---
-prospector_agent = Agent(role='Prospector de Startups de IA', goal='Gerar uma lista massiva de nomes de startups de IA', backstory='Especialista em prospecção digital, encontra o máximo de nomes de startups possível.', verbose=True, allow_delegation=False, tools=[search_tool, website_tool])
-qualifier_agent = Agent(role='Qualificador de Leads de Startups', goal='Filtrar uma lista, mantendo EXCLUSIVAMENTE startups de tecnologia da América Latina. REJEITAR TOTALMENTE qualquer startup dos Estados Unidos, EUA, USA, US ou United States. REJEITAR empresas dos setores: Venture Capital, VC, Venture Builder, Investment, Investor, Fund, Capital, Private Equity. ACEITAR APENAS startups de tecnologia/produto da América Latina.', backstory='Analista extremamente rigoroso que verifica meticulosamente a localização geográfica e o setor de cada empresa, rejeitando qualquer startup fora da América Latina ou que seja empresa de investimento.', verbose=True, allow_delegation=False, tools=[search_tool])
-data_analyst_agent = Agent(role='Analista de Dados de Startups', goal='Coletar informações detalhadas sobre uma única startup.', backstory='Pesquisador persistente que mergulha fundo para encontrar dados essenciais.', verbose=True, allow_delegation=True, tools=[search_tool])
-market_strategist_agent = Agent(role='Estrategista de Mercado de Tecnologia', goal='Realizar uma análise de mercado aprofundada para uma startup.', backstory='Especialista em interpretar dados para avaliar o potencial de mercado, sempre citando fontes.', verbose=True, allow_delegation=True, tools=[search_tool])
+# Criados no primeiro uso (com as ferramentas); get_agent('prospector'), get_agent('qualifier'), ...
+_agents = {
+    'prospector': Lazy('agent:prospector', lambda: Agent(role='Prospector de Startups de IA', goal='Gerar uma lista massiva de nomes de startups de IA', backstory='Especialista em prospecção digital, encontra o máximo de nomes de startups possível.', verbose=True, allow_delegation=False, tools=[get_search_tool(), get_website_tool()])),
+    'qualifier': Lazy('agent:qualifier', lambda: Agent(role='Qualificador de Leads de Startups', goal='Filtrar uma lista, mantendo EXCLUSIVAMENTE startups de tecnologia da América Latina. REJEITAR TOTALMENTE qualquer startup dos Estados Unidos, EUA, USA, US ou United States. REJEITAR empresas dos setores: Venture Capital, VC, Venture Builder, Investment, Investor, Fund, Capital, Private Equity. ACEITAR APENAS startups de tecnologia/produto da América Latina.', backstory='Analista extremamente rigoroso que verifica meticulosamente a localização geográfica e o setor de cada empresa, rejeitando qualquer startup fora da América Latina ou que seja empresa de investimento.', verbose=True, allow_delegation=False, tools=[get_search_tool()])),
+    'data_analyst': Lazy('agent:data_analyst', lambda: Agent(role='Analista de Dados de Startups', goal='Coletar informações detalhadas sobre uma única startup.', backstory='Pesquisador persistente que mergulha fundo para encontrar dados essenciais.', verbose=True, allow_delegation=True, tools=[get_search_tool()])),
+    'market_strategist': Lazy('agent:market_strategist', lambda: Agent(role='Estrategista de Mercado de Tecnologia', goal='Realizar uma análise de mercado aprofundada para uma startup.', backstory='Especialista em interpretar dados para avaliar o potencial de mercado, sempre citando fontes.', verbose=True, allow_delegation=True, tools=[get_search_tool()])),
+}
+
+def get_agent(name: str) -> Agent:
+    return _agents[name].get()
 # Removido database_manager_agent porque o decorator @tool desta versão não converte a função em BaseTool automaticamente.
 
 # --- LISTAS DE FONTES PARA PROSPECÇÃO ---
 lista_vcs = ["Sequoia Capital", "Andreessen Horowitz", "SoftBank", "Kaszek", "Valor Capital Group", "Tiger Global", "Canary", "Bossa Invest", "Monashees", "Latitud", "New Enterprise Associates", "Accel", "Lightspeed Venture Partners", "Bessemer Venture Partners", "Canary", "Igah Ventures", "Bossanova Investimentos"]
 lista_plataformas = ["crunchbase.com", "pitchbook.com", "latamlist.com", "slinghub.com.br", "distrito.me"]
-lista_paises_latam = ["Brasil", "Brazil", "México", "Mexico", "Argentina", "Colômbia", "Colombia", "Chile", "Peru", "Perú", "Bolívia", "Bolivia", "Equador", "Ecuador", "Guiana", "Guyana", "Paraguai", "Paraguay", "Suriname", "Uruguai", "Uruguay", "Venezuela", "Belize", "Costa Rica", "El Salvador", "Guatemala", "Honduras", "Nicarágua", "Nicaragua", "Panamá", "Panama", "Cuba", "Haiti", "República Dominicana", "Dominican Republic"]
-
-# Lista de setores rejeitados (empresas de investimento, não startups)
-setores_rejeitados_global = [
-    'venture capital', 'vc', 'venture builder', 'investment', 'investor', 'fund', 'capital', 
-    'private equity', 'asset management', 'investment management', 'investment fund',
-    'venture fund', 'growth capital', 'seed fund', 'accelerator fund', 'incubator fund',
-    'investment company', 'investment firm', 'capital management', 'wealth management',
-    'investment banking', 'merchant banking', 'development finance', 'investment vehicle'
-]
 
 # --- CONFIG PROSPECÇÃO DINÂMICA ---
 MAX_PROSPECTION_ATTEMPTS = 8
 MIN_NEW_STARTUPS_REQUIRED = 3  # parar cedo se já conseguimos pelo menos isso de novos nomes
+MAX_EMPTY_ATTEMPTS = int(os.getenv('MAX_EMPTY_ATTEMPTS', '3'))  # tentativas seguidas sem nome novo antes de desistir
+AVOID_LIST_SIZE = int(os.getenv('AVOID_LIST_SIZE', '50'))  # nomes a evitar enviados no prompt do prospector
+PROSPECTION_WORKERS = int(os.getenv('PROSPECTION_WORKERS', '3'))  # shards prospectados/qualificados em paralelo
+QUALIFY_BATCH_CHARS = int(os.getenv('QUALIFY_BATCH_CHARS', '1500'))  # tamanho máximo da lista de nomes por lote
+QUALIFY_BATCH_MAX_NAMES = int(os.getenv('QUALIFY_BATCH_MAX_NAMES', '25'))  # nomes por lote do qualificador
+QUALIFY_WORKERS = int(os.getenv('QUALIFY_WORKERS', '4'))  # lotes qualificados em paralelo (entre todos os shards)
+
+# --- PRÉ-FILTRO DETERMINÍSTICO (antes do qualificador) ---
+# Sufixos societários removidos ao comparar nomes ("Nubank S.A." == "nubank")
+SUFIXOS_SOCIETARIOS = [
+    'ltda', 'ltda me', 'me', 'epp', 'eireli', 's a', 'sa', 's a s', 'sas', 'sa de cv', 's a de c v', 'de cv',
+    's de rl', 'spa', 's p a', 'srl', 's r l', 'sapi de cv', 's a p i de c v', 'sapi', 's a p i', 'inc', 'llc',
+    'ltd', 'limited', 'corp', 'corporation', 'co', 'gmbh', 'plc'
+]
+MAX_PALAVRAS_NOME = 6  # acima disso é frase do modelo, não nome de startup
+
+def _sequencias_de_tokens(termos):
+    return sorted((tuple(t.split()) for t in termos), key=len, reverse=True)
+
+_SUFIXOS_TOKENS = _sequencias_de_tokens(SUFIXOS_SOCIETARIOS)
+
+def normalize_startup_name(name: str) -> str:
+    """Nome comparável: sem acentos, caixa, pontuação e sufixos societários."""
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    tokens = re.sub(r'[^\w\s]', ' ', text).split()
+    stripped = True
+    while stripped and len(tokens) > 1:
+        stripped = False
+        for suffix in _SUFIXOS_TOKENS:
+            if len(suffix) < len(tokens) and tuple(tokens[-len(suffix):]) == suffix:
+                tokens = tokens[:-len(suffix)]
+                stripped = True
+                break
+    return ' '.join(tokens)
+
+class CandidatePrefilter:
+    """Filtro local aplicado aos nomes prospectados antes do qualificador (LLM + busca).
 
-def build_prospect_task(existing_names: set, attempt: int):
+    Descarta duplicatas da planilha e do próprio lote (comparando nomes
+    normalizados), nomes de VCs conhecidos e nomes com termos de investimento
+    de `setores_rejeitados_global`. Cada nome descartado é uma verificação a
+    menos para o qualificador.
+    """
+
+    def __init__(self, known_names=()):
+        self._known = set()
+        self._vcs = {normalize_startup_name(vc) for vc in lista_vcs}
+        self.stats = {'recebidos': 0, 'duplicados_planilha': 0, 'duplicados_lote': 0,
+                      'rejeitados_regra': 0, 'enviados_llm': 0}
+        self.add_known(known_names)
+
+    def add_known(self, names):
+        self._known.update(normalize_startup_name(n) for n in names if n)
+
+    def _rejection_reason(self, normalized: str):
+        tokens = normalized.split()
+        if not tokens or len(tokens) > MAX_PALAVRAS_NOME:
+            return 'nome inválido'
+        if normalized in self._vcs:
+            return 'é um VC da lista de fontes'
+        termo = match_rejected_sector(normalized)
+        if termo:
+            return f"termo de investimento '{termo}'"
+        return None
+
+    def filter(self, candidates):
+        """Retorna os candidatos que ainda precisam do qualificador e registra os demais como conhecidos."""
+        accepted = []
+        batch = set()
+        for name in candidates:
+            self.stats['recebidos'] += 1
+            normalized = normalize_startup_name(name)
+            if normalized in self._known:
+                self.stats['duplicados_planilha'] += 1
+                continue
+            if normalized in batch:
+                self.stats['duplicados_lote'] += 1
+                continue
+            batch.add(normalized)
+            reason = self._rejection_reason(normalized)
+            if reason:
+                self.stats['rejeitados_regra'] += 1
+                print(f"[Pré-filtro] '{name}' rejeitado: {reason}")
+                continue
+            accepted.append(name)
+        self._known.update(batch)
+        self.stats['enviados_llm'] += len(accepted)
+        return accepted
+
+    def forget(self, names):
+        """Volta a aceitar nomes que não chegaram a ser qualificados (ex.: lote com falha)."""
+        self._known.difference_update(normalize_startup_name(n) for n in names if n)
+
+    def calls_avoided(self) -> int:
+        """Verificações (LLM + busca) evitadas: uma por nome descartado."""
+        return self.stats['recebidos'] - self.stats['enviados_llm']
+
+class AvoidList:
+    """Nomes que o prospector deve evitar, ordenados do mais recente para o mais antigo.
+
+    O prompt recebe só os `max_size` mais recentes, que são os que o modelo
+    tem mais chance de repetir (últimas linhas da planilha e últimas tentativas).
+    """
+
+    def __init__(self, names=(), max_size: int = AVOID_LIST_SIZE):
+        self.max_size = max_size
+        self._names = OrderedDict()
+        self.add(names)
+
+    def add(self, names):
+        for name in names:
+            if name:
+                self._names.pop(name, None)
+                self._names[name] = None
+
+    def sample(self) -> list:
+        recent = []
+        for name in reversed(self._names):
+            if len(recent) >= self.max_size:
+                break
+            recent.append(name)
+        return recent
+
+def build_prospect_task(avoid_names: list, attempt: int, shard=None):
+    """Task do prospector; com `shard`, as buscas ficam restritas a uma fonte e uma região."""
     avoid_clause = ''
-    if existing_names:
-        # Limita a lista a 50 primeiros para não poluir prompt
-        sample = list(existing_names)[:50]
+    if avoid_names:
         avoid_clause = ("Evite listar novamente estas startups já conhecidas (NÃO repita nenhuma delas; busque outras): "
-                        + ", ".join(sample) + ".")
+                        + ", ".join(avoid_names) + ".")
+    if shard is None:
+        sources = (f"Use portfólios de VCs: {', '.join(lista_vcs)}. "
+                   f"Use sites especializados com 'site:': {', '.join(lista_plataformas)}. "
+                   f"Foque em países: {', '.join(lista_paises_latam)}. ")
+    elif shard.kind == 'vc':
+        sources = (f"Pesquise apenas o portfólio do VC {shard.source} (site do fundo, notícias de rodadas e anúncios de investimento). "
+                   f"Foque em startups sediadas em: {', '.join(shard.countries)}. ")
+    else:
+        sources = (f"Pesquise apenas em {shard.source} usando 'site:{shard.source}'. "
+                   f"Foque em startups sediadas em: {', '.join(shard.countries)}. ")
     return Task(
         description=(
             f"[TENTATIVA {attempt}] Sua missão é gerar a maior lista possível de NOMES NOVOS de startups de tecnologia (não repetir as já conhecidas). "
             "Combine as fontes abaixo em múltiplas buscas no Google. "
-            f"Use portfólios de VCs: {', '.join(lista_vcs)}. "
-            f"Use sites especializados com 'site:': {', '.join(lista_plataformas)}. "
-            f"Foque em países: {', '.join(lista_paises_latam)}. "
+            + sources +
             "NÃO adicione explicações, apenas nomes separados por vírgula. "
             "Varie buscas (mínimo 10). " + avoid_clause
         ),
         expected_output="Uma única string contendo apenas nomes de startups separados por vírgula.",
-        agent=prospector_agent
+        agent=get_agent('prospector')
     )
 
 def build_qualify_task(raw_names: str):
+    """Task do qualificador para um lote de nomes (o tamanho do lote é limitado em batch_names)."""
     return Task(
         description=(
             "INSTRUÇÕES CRÍTICAS DE FILTRAGEM:\n"
@@ -122,85 +481,86 @@ def build_qualify_task(raw_names: str):
             "5. ACEITAR APENAS startups que desenvolvem produtos ou serviços tecnológicos\n\n"
             "Para cada nome da lista, pesquise e verifique rigorosamente a localização da sede e o setor de atuação. "
             "Responda APENAS com os nomes que atendem TODOS os critérios, separados por vírgula, sem texto adicional.\n\n"
-            "Lista para verificar: " + raw_names[:6000]
+            "Lista para verificar: " + raw_names
         ),
         expected_output="Nomes de startups de tecnologia da América Latina aprovados, separados por vírgula.",
-        agent=qualifier_agent
+        agent=get_agent('qualifier')
     )
 
+# Chaves esperadas em cada task de análise (validadas na extração do JSON)
+DATA_KEYS = [
+    'Nome da Startup','Site','Setor de Atuação','País','Legalmente Instituída','Ano de Fundação',
+    'Tecnologias Utilizadas','Nome do Investidor (VC)','Valor da Última Rodada','Status de financiamento',
+    'Liderança Técnica (Nome)','Liderança Técnica (LinkedIn)','Integrantes do Time','Tamanho da Startup',
+    'Base de Clientes'
+]
+MARKET_KEYS = [
+    'Nome da Startup','TAM','SAM','SOM','Dinâmica do Setor','Principais Concorrentes','Previsões de Mercado',
+    'Análise de Riscos Ambientais','CAC','Churn Rate','Fontes da Análise de Mercado'
+]
+ANALYSIS_KEYS = {'dados': DATA_KEYS, 'mercado': MARKET_KEYS}
+# Re-pergunta só as chaves que faltaram (em vez de refazer a análise inteira)
+REASK_MISSING_KEYS = os.getenv('REASK_MISSING_KEYS', '1') not in ('0', 'false', 'False')
+
 JSON_SCHEMA_GUIDE = (
     "Responda APENAS em JSON puro (sem texto antes/depois) com as chaves exatas: "
-    "['Nome da Startup','Site','Setor de Atuação','País','Legalmente Instituída','Ano de Fundação',"
-    "'Tecnologias Utilizadas','Nome do Investidor (VC)','Valor da Última Rodada','Status de financiamento',"
-    "'Liderança Técnica (Nome)','Liderança Técnica (LinkedIn)','Integrantes do Time','Tamanho da Startup',"
-    "'Base de Clientes'] . Use string vazia se não encontrar."
+    f"{DATA_KEYS} . Use string vazia se não encontrar."
 )
 MARKET_SCHEMA_GUIDE = (
-    "Responda APENAS em JSON puro com as chaves: ['Nome da Startup','TAM','SAM','SOM','Dinâmica do Setor',"
-    "'Principais Concorrentes','Previsões de Mercado','Análise de Riscos Ambientais','CAC','Churn Rate',"
-    "'Fontes da Análise de Mercado'] . 'Fontes da Análise de Mercado' deve ser uma lista de URLs ou uma string com URLs separadas por ponto e vírgula."
+    f"Responda APENAS em JSON puro com as chaves: {MARKET_KEYS} . "
+    "'Fontes da Análise de Mercado' deve ser uma lista de URLs ou uma string com URLs separadas por ponto e vírgula."
 )
 
-def build_data_task(startup_name: str):
+def build_data_task(startup_name: str, agent: Agent = None):
     return Task(
         description=(f"Para a startup '{startup_name}', encontre os dados fundamentais. IMPORTANTE: Verifique se a startup está realmente localizada na América Latina. Se descobrir que está nos EUA ou fora da América Latina, inclua essa informação no campo 'País'. {JSON_SCHEMA_GUIDE}"),
         expected_output=f"JSON válido com dados fundamentais da startup '{startup_name}', incluindo verificação de localização",
-        agent=data_analyst_agent
+        agent=agent or get_agent('data_analyst')
     )
 
-def build_market_task(startup_name: str):
+def build_market_task(startup_name: str, agent: Agent = None):
     return Task(
         description=(f"Para a startup '{startup_name}', faça análise de mercado. {MARKET_SCHEMA_GUIDE}"),
         expected_output=f"JSON válido com análise de mercado da startup '{startup_name}'",
-        agent=market_strategist_agent
+        agent=agent or get_agent('market_strategist')
+    )
+
+def build_reask_task(startup_name: str, keys: list, agent: Agent):
+    """Task curta que pede só as chaves que faltaram na resposta anterior."""
+    return Task(
+        description=(f"Para a startup '{startup_name}', sua resposta anterior não trouxe as chaves {keys}. "
+                     f"Responda APENAS em JSON puro com 'Nome da Startup' e exatamente essas chaves. "
+                     "Use string vazia se não encontrar."),
+        expected_output=f"JSON válido com as chaves que faltaram da startup '{startup_name}'",
+        agent=agent
     )
 
 def merge_and_write(startup_name: str, outputs: list):
     """Tenta extrair JSON de cada saída, mesclar e enviar à planilha. Retorna mensagem."""
     merged = {'Nome da Startup': startup_name}
-    json_blocks = []
     for raw in outputs:
-        if not raw:
-            continue
-        candidate = None
-        # Primeiro tentativa direta
-        try:
-            if isinstance(raw, str):
-                candidate = json.loads(raw)
-        except Exception:
-            candidate = None
-        if candidate is None:
-            # Procura primeiro bloco JSON com regex
-            try:
-                match = re.search(r'\{.*\}', raw, re.DOTALL)
-                if match:
-                    candidate = json.loads(match.group(0))
-            except Exception:
-                candidate = None
-        if isinstance(candidate, dict):
-            json_blocks.append(candidate)
-    for block in json_blocks:
+        # Extrai os objetos JSON da saída (blocos ```json, texto em volta, vários objetos)
+        block = best_json_object(raw, REQUIRED_ORDER)
         for k,v in block.items():
             if v not in (None, '', 'Não encontrado'):
                 merged[k] = v
     
-    # VALIDAÇÃO FINAL: Rejeitar startups dos EUA
-    pais = merged.get('País', '').lower()
-    if any(termo in pais for termo in ['estados unidos', 'eua', 'usa', 'us', 'united states', 'silicon valley']):
-        print(f"[MERGE] {startup_name}: REJEITADA - Startup dos EUA detectada: {merged.get('País', 'N/A')}")
-        return f"Startup '{startup_name}' rejeitada - localizada nos EUA."
-    
-    # Validar se está na América Latina
-    paises_latam_lower = [p.lower() for p in lista_paises_latam]
-    if pais and not any(pais_latam in pais for pais_latam in paises_latam_lower):
-        print(f"[MERGE] {startup_name}: REJEITADA - País fora da América Latina: {merged.get('País', 'N/A')}")
-        return f"Startup '{startup_name}' rejeitada - não está na América Latina."
-    
-    # VALIDAÇÃO FINAL: Rejeitar setores de investimento
-    setor = merged.get('Setor de Atuação', '').lower()
-    if any(termo in setor for termo in setores_rejeitados_global):
-        print(f"[MERGE] {startup_name}: REJEITADA - Setor de investimento detectado: {merged.get('Setor de Atuação', 'N/A')}")
-        return f"Startup '{startup_name}' rejeitada - setor de investimento: {merged.get('Setor de Atuação', 'N/A')}."
+    # VALIDAÇÃO FINAL: EUA, fora da América Latina e setores de investimento
+    reasons = classify(merged.get('País', ''), merged.get('Setor de Atuação', ''))
+    if reasons:
+        reason = reasons[0]
+        if reason['regra'] == PAIS_EUA:
+            print(f"[MERGE] {startup_name}: REJEITADA - Startup dos EUA detectada: {merged.get('País', 'N/A')}")
+            result = f"Startup '{startup_name}' rejeitada - localizada nos EUA."
+        elif reason['regra'] == PAIS_FORA_LATAM:
+            print(f"[MERGE] {startup_name}: REJEITADA - País fora da América Latina: {merged.get('País', 'N/A')}")
+            result = f"Startup '{startup_name}' rejeitada - não está na América Latina."
+        else:
+            print(f"[MERGE] {startup_name}: REJEITADA - Setor de investimento detectado: {merged.get('Setor de Atuação', 'N/A')}")
+            result = f"Startup '{startup_name}' rejeitada - setor de investimento: {merged.get('Setor de Atuação', 'N/A')}."
+        if run_journal:
+            run_journal.record('merge', startup=startup_name, dados=None, resultado=result)
+        return result
     
     # Normaliza fontes: pode vir lista
     fontes = merged.get('Fontes da Análise de Mercado')
@@ -209,143 +569,703 @@ def merge_and_write(startup_name: str, outputs: list):
     # Envia para sheet
     result = spreadsheet_tool(json.dumps(merged))
     print(f"[MERGE] {startup_name}: {result} | Keys: {list(merged.keys())}")
+    if run_journal:
+        run_journal.record('merge', startup=startup_name, dados=merged, resultado=result)
     return result
 
-def clean_invalid_startups():
-    """Remove startups dos EUA e do setor Venture Capital da planilha."""
-    print("🧹 Iniciando limpeza de startups inválidas...")
+def contiguous_row_ranges(rows):
+    """Agrupa números de linha em faixas contíguas (início, fim), da última para a primeira."""
+    ranges = []
+    for row in sorted(set(rows)):
+        if ranges and row == ranges[-1][1] + 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return [tuple(r) for r in reversed(ranges)]
+
+def clean_invalid_startups(dry_run: bool = False):
+    """Remove startups dos EUA e do setor Venture Capital da planilha.
+
+    Todas as linhas inválidas são removidas em um único batch_update (faixas
+    contíguas, de baixo para cima). Com dry_run=True só relata o que seria
+    removido e quantas chamadas à API seriam feitas.
+    """
+    print("🧹 Iniciando limpeza de startups inválidas..." + (" (dry-run)" if dry_run else ""))
+    report = {'rows': [], 'ranges': [], 'api_calls': 0, 'sync_api_calls': 0, 'api_calls_per_row': 0}
     
     try:
-        # Busca todos os registros da planilha
-        all_records = worksheet.get_all_records()
+        # Grava escritas pendentes antes: as posições das linhas vão mudar
+        get_sheet_writer().flush()
+        # Sincroniza o espelho local (só baixa linhas novas/alteradas) e lê os registros dele
+        sync_report = mirror.sync(get_worksheet())
+        sheet_rows = mirror.rows(['Nome da Startup', 'País', 'Setor de Atuação'])
         rows_to_delete = []
         
-        paises_rejeitados = ['estados unidos', 'eua', 'usa', 'us', 'united states', 'silicon valley']
-        
-        for i, record in enumerate(all_records, start=2):  # start=2 porque linha 1 é cabeçalho
-            startup_name = record.get('Nome da Startup', '').strip()
-            pais = record.get('País', '').lower().strip()
-            setor = record.get('Setor de Atuação', '').lower().strip()
-            
-            # Verifica se é dos EUA
-            is_usa = any(termo in pais for termo in paises_rejeitados)
-            
-            # Verifica se é do setor venture capital
-            is_vc = any(termo in setor for termo in setores_rejeitados_global)
-            
-            if is_usa or is_vc:
-                reason = "EUA" if is_usa else "Venture Capital"
-                print(f"❌ Marcando para remoção: {startup_name} - Motivo: {reason} (País: {pais}, Setor: {setor})")
+        # Classifica todas as linhas em uma passada (só EUA e setor de investimento)
+        classified = classify_rows([record for _, record in sheet_rows], check_latam=False)
+        for (i, _), (record, reasons) in zip(sheet_rows, classified):
+            if reasons:
+                startup_name = str(record.get('Nome da Startup', '')).strip()
+                reason = "EUA" if reasons[0]['regra'] == PAIS_EUA else "Venture Capital"
+                details = ', '.join(f"{r['campo']}: {r['valor']} (termo '{r['termo']}')" for r in reasons)
+                print(f"❌ Marcando para remoção: {startup_name} - Motivo: {reason} ({details})")
                 rows_to_delete.append(i)
         
-        # Remove as linhas (de trás para frente para não alterar os índices)
+        ranges = contiguous_row_ranges(rows_to_delete)
+        report['rows'] = sorted(rows_to_delete)
+        report['ranges'] = ranges
+        # Leituras da sincronização (nomes/timestamps + um batch_get por bloco de linhas
+        # alteradas) + 1 batch_update (contra 1 leitura + 1 delete_rows por linha antes)
+        report['sync_api_calls'] = sync_report['api_calls']
+        report['api_calls'] = sync_report['api_calls'] + (1 if ranges else 0)
+        report['api_calls_per_row'] = 1 + len(rows_to_delete)
+
+        if dry_run:
+            print(f"🔎 [dry-run] {len(rows_to_delete)} linha(s) seriam removidas em {len(ranges)} faixa(s): {ranges}")
+            print(f"🔎 [dry-run] Chamadas à API estimadas: {report['api_calls']}, "
+                  f"{report['sync_api_calls']} delas da sincronização "
+                  f"(remoção linha a linha: {report['api_calls_per_row']})")
+            return report
+
         if rows_to_delete:
-            print(f"🗑️  Removendo {len(rows_to_delete)} startups inválidas...")
-            for row_index in sorted(rows_to_delete, reverse=True):
-                worksheet.delete_rows(row_index)
+            print(f"🗑️  Removendo {len(rows_to_delete)} startups inválidas em {len(ranges)} faixa(s)...")
+            # As faixas vão de baixo para cima, então cada remoção não desloca as seguintes
+            delete_requests = [{
+                'deleteDimension': {
+                    'range': {
+                        'sheetId': get_worksheet().id,
+                        'dimension': 'ROWS',
+                        'startIndex': start - 1,  # índice 0-based, fim exclusivo
+                        'endIndex': end,
+                    }
+                }
+            } for start, end in ranges]
+            get_spreadsheet().batch_update({'requests': delete_requests})
             print(f"✅ Limpeza concluída! {len(rows_to_delete)} startups removidas.")
+            # As linhas mudaram de posição: o índice nome -> linha precisa ser recarregado
+            get_sheet_writer().invalidate_index()
         else:
             print("✅ Nenhuma startup inválida encontrada na planilha.")
             
     except Exception as e:
         print(f"❌ Erro durante a limpeza: {e}")
+    return report
 
-def safe_kickoff(crew: Crew, label: str, retries: int = 2):
-    """Executa crew.kickoff com retentativas se não houver outputs válidos."""
-    for attempt in range(1, retries+2):  # primeira + retries
-        try:
-            result = crew.kickoff()
-            if result and getattr(result, 'tasks_output', None):
-                # Verifica se algum task_output tem raw não vazio
-                raws = [getattr(t, 'raw', '') for t in result.tasks_output]
-                if any(r.strip() for r in raws):
+def safe_kickoff(crew: Crew, label: str, retries: int = 2, stage: str = 'crew'):
+    """Executa crew.kickoff com retentativas se não houver outputs válidos (um span por chamada).
+
+    Cada tentativa passa pelo limite de taxa do LLM e as retentativas esperam
+    o backoff (com jitter); com o disjuntor aberto desiste na hora.
+    """
+    with tracer.span(stage, label, agent=crew_agent(crew)) as span:
+        span['retries'] = 0
+        attempts = 0
+        for attempt in range(1, retries+2):  # primeira + retries
+            try:
+                llm_limiter.acquire(span)
+            except CircuitOpenError as e:
+                print(f"[safe_kickoff] '{label}' não executado: {e}")
+                break
+            error = None
+            attempts += 1
+            try:
+                result = crew.kickoff()
+                add_tokens(span, result)
+                if result and getattr(result, 'tasks_output', None):
+                    # Verifica se algum task_output tem raw não vazio
+                    raws = [getattr(t, 'raw', '') for t in result.tasks_output]
+                    if any(r.strip() for r in raws):
+                        llm_limiter.breaker.record_success()
+                        return result
+                if result and getattr(result, 'raw', None) and result.raw.strip():
+                    llm_limiter.breaker.record_success()
                     return result
-            if result and getattr(result, 'raw', None) and result.raw.strip():
-                return result
-            print(f"[safe_kickoff] '{label}' tentativa {attempt} sem outputs válidos.")
+                print(f"[safe_kickoff] '{label}' tentativa {attempt} sem outputs válidos.")
+                llm_limiter.breaker.record_success()
+            except Exception as e:
+                error = e
+                print(f"[safe_kickoff] Erro em '{label}' tentativa {attempt}: {e}")
+                if is_retryable(e):
+                    llm_limiter.record_failure()
+                else:
+                    llm_limiter.breaker.record_success()
+            if attempt <= retries:
+                print(f"[safe_kickoff] Retentando '{label}'...")
+                llm_limiter.wait_before_retry(attempt, error, span)
+        span['status'] = 'failed'
+        print(f"[safe_kickoff] Falha definitiva em '{label}' após {attempts} tentativa(s).")
+        return None
+
+# --- ANÁLISE CONCORRENTE ---
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '4'))  # startups analisadas em paralelo
+
+def collect_outputs(result) -> list:
+    """Extrai os textos brutos de cada task de um resultado de crew."""
+    outputs = []
+    try:
+        if result and getattr(result, 'tasks_output', None):
+            outputs = [t.raw for t in result.tasks_output if getattr(t,'raw', None)]
+        else:
+            if getattr(result, 'raw', None):
+                outputs = [result.raw]
+    except Exception as e:
+        print(f"Falha ao coletar outputs: {e}")
+    return outputs
+
+def run_analysis_task(build_task, agent: Agent, startup_name: str, task_label: str) -> list:
+    """Roda uma task de análise em uma crew própria, com uma cópia do agente (seguro entre threads)."""
+    if run_journal and task_label in run_journal.analysis.get(startup_name, {}):
+        print(f"[Retomada] Reutilizando output de '{task_label}' de '{startup_name}' do diário.")
+        return run_journal.analysis[startup_name][task_label]
+    worker_agent = agent.copy()
+    crew = Crew(
+        agents=[worker_agent],
+        tasks=[build_task(startup_name, worker_agent)],
+        process=Process.sequential,
+        verbose=True
+    )
+    with tracer.span(task_label, startup_name, agent=crew_agent(crew)) as span:
+        result = llm_limiter.call(crew.kickoff, span=span)
+        add_tokens(span, result)
+    outputs = collect_outputs(result)
+    keys = ANALYSIS_KEYS.get(task_label)
+    if REASK_MISSING_KEYS and keys and outputs:
+        extracted = {}
+        for raw in outputs:
+            extracted.update(best_json_object(raw, keys))
+        missing = missing_keys(extracted, keys)
+        if missing:
+            outputs.extend(reask_missing_keys(worker_agent, startup_name, task_label, missing))
+    if run_journal and outputs:
+        run_journal.record('analise_task', startup=startup_name, task=task_label, outputs=outputs)
+    return outputs
+
+def reask_missing_keys(agent: Agent, startup_name: str, task_label: str, missing: list) -> list:
+    """Pede ao mesmo agente só as chaves que faltaram. Retorna os outputs da nova resposta."""
+    print(f"[Análise] '{task_label}' de '{startup_name}' sem as chaves {missing}; pedindo só elas.")
+    crew = Crew(
+        agents=[agent],
+        tasks=[build_reask_task(startup_name, missing, agent)],
+        process=Process.sequential,
+        verbose=True
+    )
+    try:
+        with tracer.span(f'{task_label}_reask', startup_name, agent=crew_agent(crew), missing=len(missing)) as span:
+            result = llm_limiter.call(crew.kickoff, span=span)
+            add_tokens(span, result)
+    except Exception as e:
+        print(f"[Análise] Falha ao repetir as chaves de '{startup_name}': {e}")
+        return []
+    return collect_outputs(result)
+
+def analyze_startup(startup_name: str) -> list:
+    """Executa a task de dados e a de mercado lado a lado e devolve os outputs das duas."""
+    print(f"\n>>> Iniciando análise profunda para: {startup_name} <<<")
+    outputs = []
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [
+            pool.submit(run_analysis_task, build_data_task, get_agent('data_analyst'), startup_name, 'dados'),
+            pool.submit(run_analysis_task, build_market_task, get_agent('market_strategist'), startup_name, 'mercado'),
+        ]
+        for future in futures:
+            try:
+                outputs.extend(future.result())
+            except Exception as e:
+                print(f"[Análise] Erro em uma das tasks de '{startup_name}': {e}")
+    return outputs
+
+class AnalysisStage:
+    """Analisa várias startups em paralelo e grava os resultados por um único writer.
+
+    As análises rodam em até `workers` threads; cada resultado concluído vai
+    para uma fila de uma thread só, então merge_and_write nunca roda em
+    paralelo consigo mesmo.
+    """
+
+    def __init__(self, workers: int):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='analise')
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='merge')
+        self.submitted = 0
+        self.started_at = time.perf_counter()
+        self.first_write_seconds = None  # tempo até a primeira startup gravada
+
+    def submit(self, startup_name: str):
+        if run_journal and startup_name in run_journal.merged:
+            # Já mesclada em uma execução anterior: só regrava (upsert idempotente), sem LLM
+            self._writer.submit(self._replay_merge, startup_name, run_journal.merged[startup_name])
+            self.submitted += 1
+            return
+        future = self._pool.submit(analyze_startup, startup_name)
+        future.add_done_callback(lambda f: self._writer.submit(self._write, startup_name, f))
+        self.submitted += 1
+
+    def _write(self, startup_name: str, future):
+        try:
+            outputs = future.result()
         except Exception as e:
-            print(f"[safe_kickoff] Erro em '{label}' tentativa {attempt}: {e}")
-        if attempt <= retries:
-            print(f"[safe_kickoff] Retentando '{label}'...")
-    print(f"[safe_kickoff] Falha definitiva em '{label}' após {retries+1} tentativas.")
-    return None
+            print(f"[Análise] Falha na análise de '{startup_name}': {e}")
+            return
+        with tracer.span('merge', startup_name):
+            merge_and_write(startup_name, outputs)
+        if self.first_write_seconds is None:
+            self.first_write_seconds = time.perf_counter() - self.started_at
+        print(f"Conclusão para '{startup_name}'.")
+
+    def _replay_merge(self, startup_name: str, entry: dict):
+        if entry['dados']:
+            result = spreadsheet_tool(json.dumps(entry['dados']))
+        else:
+            result = entry['resultado']
+        print(f"[Retomada] {startup_name}: {result}")
+
+    def close(self):
+        """Aguarda todas as análises e gravações pendentes."""
+        self._pool.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+
+# --- ATUALIZAÇÃO INCREMENTAL (por campo) ---
+# Validade de cada campo em dias; campos fora daqui (nome, site, país, setor, fundação...) não expiram
+FIELD_TTL_DAYS = {
+    'Tecnologias Utilizadas': 180, 'Nome do Investidor (VC)': 60, 'Valor da Última Rodada': 30,
+    'Status de financiamento': 30, 'Liderança Técnica (Nome)': 180, 'Liderança Técnica (LinkedIn)': 180,
+    'Integrantes do Time': 90, 'Tamanho da Startup': 90, 'Base de Clientes': 90,
+    'TAM': 90, 'SAM': 90, 'SOM': 90, 'Dinâmica do Setor': 90, 'Principais Concorrentes': 90,
+    'Previsões de Mercado': 90, 'Análise de Riscos Ambientais': 180, 'CAC': 90, 'Churn Rate': 90,
+    'Fontes da Análise de Mercado': 90,
+}
+MISSING_FIELD_TTL_DAYS = float(os.getenv('MISSING_FIELD_TTL_DAYS', '14'))  # campos 'Não encontrado' voltam antes
+REFRESH_MAX_STARTUPS = int(os.getenv('REFRESH_MAX_STARTUPS', '20'))  # startups por execução do --refresh
+EMPTY_VALUES = ('', 'Não encontrado', 'Não disponível')
+
+def column_letter(header: str) -> str:
+    """Letra da coluna da planilha (as 26 colunas cabem em A-Z)."""
+    if header == TIMESTAMP_COLUMN:
+        return TIMESTAMP_LETTER
+    return chr(ord('A') + REQUIRED_ORDER.index(header))
+
+def parse_sheet_timestamp(value):
+    try:
+        return datetime.strptime(str(value).strip(), SHEET_TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+def stale_fields(record: dict, field_stamps: dict, now: datetime) -> list:
+    """Campos voláteis da linha cuja última pesquisa passou da validade (o mais vencido primeiro)."""
+    row_stamp = parse_sheet_timestamp(record.get(TIMESTAMP_COLUMN, ''))
+    overdue = []
+    for field, ttl_days in FIELD_TTL_DAYS.items():
+        if str(record.get(field, '')).strip() in EMPTY_VALUES:
+            ttl_days = min(ttl_days, MISSING_FIELD_TTL_DAYS)
+        stamp = parse_sheet_timestamp(field_stamps[field]) if field in field_stamps else row_stamp
+        age = now - stamp if stamp else timedelta.max
+        if age >= timedelta(days=ttl_days):
+            overdue.append((age, field))
+    return [field for _, field in sorted(overdue, reverse=True)]
+
+def select_stale_startups(limit: int, now: datetime = None) -> list:
+    """[(linha, registro, campos vencidos)] das startups mais desatualizadas, no máximo `limit`."""
+    now = now or datetime.now()
+    stamps = mirror.field_stamps()
+    stale = []
+    for row, record in mirror.rows():
+        name = str(record.get('Nome da Startup', '')).strip()
+        fields = stale_fields(record, stamps.get(name, {}), now)
+        if fields:
+            stale.append((row, record, fields))
+    # Primeiro as que têm mais campos vencidos
+    stale.sort(key=lambda item: -len(item[2]))
+    return stale[:limit]
+
+def build_refresh_task(startup_name: str, record: dict, fields: list, agent: Agent):
+    """Task que pede só os campos vencidos, mostrando os valores atuais para confirmação."""
+    current = {field: record.get(field, '') for field in fields}
+    return Task(
+        description=(f"Para a startup '{startup_name}', atualize APENAS os campos abaixo. Valores atuais na base: "
+                     f"{json.dumps(current, ensure_ascii=False)}. Confirme ou corrija cada um com dados recentes. "
+                     f"Responda APENAS em JSON puro com 'Nome da Startup' e exatamente as chaves {fields}. "
+                     "Use string vazia se não encontrar."),
+        expected_output=f"JSON válido com os campos atualizados da startup '{startup_name}'",
+        agent=agent
+    )
+
+def refresh_startup(row: int, record: dict, fields: list) -> dict:
+    """Pesquisa de novo só os campos vencidos. Retorna {campo: valor novo} apenas do que mudou."""
+    startup_name = str(record['Nome da Startup']).strip()
+    groups = [(get_agent('data_analyst'), [f for f in fields if f in DATA_KEYS], 'dados'),
+              (get_agent('market_strategist'), [f for f in fields if f in MARKET_KEYS], 'mercado')]
+    found = {}
+    for agent, group, label in groups:
+        if not group:
+            continue
+        worker_agent = agent.copy()
+        crew = Crew(agents=[worker_agent], tasks=[build_refresh_task(startup_name, record, group, worker_agent)],
+                    process=Process.sequential, verbose=True)
+        with tracer.span('refresh', startup_name, agent=crew_agent(crew), task=label, fields=len(group)) as span:
+            result = llm_limiter.call(crew.kickoff, span=span)
+            add_tokens(span, result)
+        for raw in collect_outputs(result):
+            found.update(best_json_object(raw, group))
+    changes = {}
+    for field in fields:
+        value = found.get(field)
+        if isinstance(value, list):
+            value = '; '.join(str(x) for x in value)
+        if value in (None, '') or str(value).strip() in EMPTY_VALUES:
+            continue  # não apaga um valor conhecido por falta de resposta
+        value = sheet_value(value)
+        if str(value).strip() != str(record.get(field, '')).strip():
+            changes[field] = value
+    return changes
+
+def refresh_stale_startups(limit: int = REFRESH_MAX_STARTUPS) -> dict:
+    """Atualiza só os campos vencidos das startups mais desatualizadas e grava só as células alteradas."""
+    get_sheet_writer().flush()
+    mirror.sync(get_worksheet())
+    stale = select_stale_startups(limit)
+    report = {'startups': len(stale), 'fields_asked': sum(len(f) for _, _, f in stale),
+              'fields_full_analysis': len(stale) * (len(DATA_KEYS) + len(MARKET_KEYS)),
+              'cells_changed': 0, 'api_calls': 0, 'errors': 0}
+    print(f"[Refresh] {report['startups']} startup(s) desatualizada(s), {report['fields_asked']} campo(s) a pesquisar "
+          f"(análise completa: {report['fields_full_analysis']}).")
+    if not stale:
+        return report
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, ANALYSIS_WORKERS), thread_name_prefix='refresh') as pool:
+        futures = [(item, pool.submit(refresh_startup, *item)) for item in stale]
+        for (row, record, fields), future in futures:
+            try:
+                results.append((row, record, fields, future.result()))
+            except Exception as e:
+                report['errors'] += 1
+                print(f"[Refresh] Falha ao atualizar '{record.get('Nome da Startup')}': {e}")
+
+    stamp = datetime.now().strftime(SHEET_TIMESTAMP_FORMAT)
+    cell_updates = {}
+    for row, record, fields, changes in results:
+        if changes:
+            # A data da linha muda: é ela que a sincronização incremental usa para detectar a alteração
+            cell_updates[str(record['Nome da Startup']).strip()] = dict(changes, **{TIMESTAMP_COLUMN: stamp})
+    if cell_updates:
+        # As linhas lidas antes da pesquisa podem ter mudado (limpeza, outra execução): o writer
+        # sincroniza e procura cada startup pelo nome antes de gravar
+        written, skipped = get_sheet_writer().write_cells(cell_updates)
+        report['api_calls'] += 1 if written else 0
+        report['cells_changed'] = sum(len(cell_updates[name]) - 1 for name in written)
+        if skipped:
+            report['skipped'] = skipped
+            print(f"[Refresh] {len(skipped)} startup(s) saíram da planilha durante a pesquisa: {skipped}")
+
+    stamps = mirror.field_stamps()
+    for row, record, fields, changes in results:
+        name = str(record['Nome da Startup']).strip()
+        known = stamps.get(name, {})
+        # Os demais campos voláteis guardam a data antiga da linha antes de ela mudar
+        preserved = {field: record.get(TIMESTAMP_COLUMN, '') for field in FIELD_TTL_DAYS
+                     if field not in known and field not in fields and record.get(TIMESTAMP_COLUMN)}
+        mirror.record_field_stamps(name, dict(preserved, **{field: stamp for field in fields}))
+        if changes:
+            print(f"[Refresh] {name}: {len(changes)} campo(s) alterado(s): {list(changes)}")
+    print(f"[Refresh] Resumo: {report}")
+    return report
+
+# --- PROSPECÇÃO EM PIPELINE ---
+def split_names(raw: str) -> list:
+    return [n.strip() for n in raw.split(',') if n.strip()]
+
+def run_prospect_attempt(attempt: int, avoid_names: list, shard=None, stop=None) -> list:
+    """Executa uma crew de prospecção (de um shard, se informado) e devolve os nomes brutos encontrados.
+
+    Se `stop` (threading.Event) for acionado durante a crew, o resultado não vai para o diário.
+    """
+    if run_journal and attempt in run_journal.prospected:
+        print(f"[Retomada] Prospecção {attempt} recuperada do diário.")
+        return run_journal.prospected[attempt]
+    prospect_task = build_prospect_task(avoid_names, attempt, shard)
+    prospect_crew = Crew(
+        agents=[get_agent('prospector')],
+        tasks=[prospect_task],
+        process=Process.sequential,
+        verbose=False
+    )
+    label = f"Prospecção {attempt}" + (f" [{shard.key}]" if shard else '')
+    print(f"\n[Prospecção] Executando tentativa {attempt}{f' no shard {shard.key}' if shard else ''}...")
+    prospect_result = safe_kickoff(prospect_crew, label, stage='prospeccao')
+    raw_names = prospect_result.raw if (prospect_result and getattr(prospect_result,'raw', None)) else ''
+    names = split_names(raw_names)
+    if run_journal and not (stop and stop.is_set()):
+        run_journal.record('prospeccao', tentativa=attempt, nomes=names, shard=shard.key if shard else None)
+    return names
+
+def batch_names(names: list, max_chars: int = QUALIFY_BATCH_CHARS, max_names: int = QUALIFY_BATCH_MAX_NAMES) -> list:
+    """Divide os nomes em lotes de até `max_names` nomes e `max_chars` caracteres, sem cortar nenhum nome.
+
+    Um nome maior que `max_chars` vai sozinho em um lote.
+    """
+    batches, current, size = [], [], 0
+    for name in names:
+        extra = len(name) + (2 if current else 0)  # ', ' entre nomes
+        if current and (size + extra > max_chars or len(current) >= max_names):
+            batches.append(current)
+            current, size, extra = [], 0, len(name)
+        current.append(name)
+        size += extra
+    if current:
+        batches.append(current)
+    return batches
+
+# Lotes de todos os shards dividem o mesmo pool: QUALIFY_WORKERS limita as crews de qualificação simultâneas
+_qualify_pool = ThreadPoolExecutor(max_workers=max(1, QUALIFY_WORKERS), thread_name_prefix='qualificacao')
+qualify_stats = {'lotes': 0, 'lotes_com_falha': 0, 'processados': 0, 'descartados': 0, 'aprovados': 0}
+_qualify_stats_lock = threading.Lock()
+
+def qualify_batch(label: str, batch: list, stop=None):
+    """Qualifica um lote. Retorna os nomes aprovados, ou None se a crew falhou ou a prospecção já parou."""
+    if stop and stop.is_set():
+        return None  # lote ainda na fila quando a prospecção foi encerrada
+    qualify_crew = Crew(
+        agents=[get_agent('qualifier')],
+        tasks=[build_qualify_task(', '.join(batch))],
+        process=Process.sequential,
+        verbose=False
+    )
+    qualify_result = safe_kickoff(qualify_crew, label, stage='qualificacao')
+    if not qualify_result:
+        return None
+    return split_names(qualify_result.raw if getattr(qualify_result, 'raw', None) else '')
+
+def run_qualify_attempt(attempt: int, candidates: list, stop=None) -> tuple:
+    """Qualifica os candidatos em lotes paralelos. Retorna (aprovados, candidatos não qualificados).
+
+    Com `stop` acionado, os lotes restantes não são enviados e nada vai para o diário.
+    """
+    if run_journal and attempt in run_journal.qualified:
+        print(f"[Retomada] Qualificação {attempt} recuperada do diário.")
+        return run_journal.qualified[attempt], []
+    batches = batch_names(candidates)
+    print(f"[Qualificação] Verificando {len(candidates)} candidatos novos em {len(batches)} lote(s)...")
+    futures = []
+    for i, batch in enumerate(batches, start=1):
+        if stop and stop.is_set():
+            break
+        futures.append(_qualify_pool.submit(qualify_batch, f"Qualificação {attempt}.{i}", batch, stop))
+    approved, dropped, failed = [], [], 0
+    for i, batch in enumerate(batches):
+        try:
+            result = futures[i].result() if i < len(futures) else None
+        except Exception as e:
+            print(f"[Qualificação] Erro em um lote da tentativa {attempt}: {e}")
+            result = None
+        if result is None:
+            failed += 1
+            dropped.extend(batch)
+            continue
+        for name in result:
+            if name not in approved:
+                approved.append(name)
+    with _qualify_stats_lock:
+        qualify_stats['lotes'] += len(batches)
+        qualify_stats['lotes_com_falha'] += failed
+        qualify_stats['processados'] += len(candidates) - len(dropped)
+        qualify_stats['descartados'] += len(dropped)
+        qualify_stats['aprovados'] += len(approved)
+    if stop and stop.is_set():
+        return approved, dropped
+    if dropped:
+        print(f"[Qualificação] {len(dropped)} candidato(s) de {failed} lote(s) com falha não foram qualificados.")
+    if run_journal:
+        run_journal.record('qualificacao', tentativa=attempt, candidatos=candidates, aprovados=approved,
+                           nao_qualificados=dropped)
+    return approved, dropped
+
+def run_shard(attempt: int, shard, avoid_names: list, prefilter: CandidatePrefilter, prefilter_lock,
+              stop: threading.Event) -> tuple:
+    """Prospecta um shard e qualifica os nomes novos. Retorna (brutos, candidatos, aprovados, segundos).
+
+    Quando `stop` é acionado (prospecção encerrada), o shard não faz mais chamadas ao LLM nem à Serper.
+    """
+    start = time.perf_counter()
+    if stop.is_set():
+        return [], [], [], 0.0
+    raw_candidates = run_prospect_attempt(attempt, avoid_names, shard, stop)
+    if stop.is_set():
+        return raw_candidates, [], [], time.perf_counter() - start
+    # O pré-filtro é compartilhado pelos shards: um nome achado em dois shards só vai uma vez ao qualificador
+    with prefilter_lock:
+        candidates = prefilter.filter(raw_candidates)
+        print(f"[Pré-filtro] {prefilter.stats} | verificações evitadas até agora: {prefilter.calls_avoided()}")
+    approved, dropped = run_qualify_attempt(attempt, candidates, stop) if candidates else ([], [])
+    if dropped:
+        # Lote com falha: os nomes podem voltar em outro shard em vez de ficarem marcados como vistos
+        with prefilter_lock:
+            prefilter.forget(dropped)
+    return raw_candidates, candidates, approved, time.perf_counter() - start
+
+def run_prospection(existing_names: list, analysis_stage: AnalysisStage) -> list:
+    """Prospecta e qualifica shards (região × fonte) em paralelo, enviando cada aprovada direto para a análise.
+
+    Até PROSPECTION_WORKERS shards rodam ao mesmo tempo; cada vaga liberada vai
+    para o shard de maior prioridade no ShardScheduler, que aprende com o
+    rendimento de cada um. O laço para ao atingir MIN_NEW_STARTUPS_REQUIRED,
+    após MAX_PROSPECTION_ATTEMPTS tentativas ou após MAX_EMPTY_ATTEMPTS
+    tentativas seguidas sem nomes novos.
+    """
+    existing_startups = set(existing_names)
+    all_new_qualified = []
+    prefilter = CandidatePrefilter(existing_startups)
+    prefilter_lock = threading.Lock()
+    avoid_list = AvoidList(existing_names)
+    scheduler = ShardScheduler(build_shards(lista_vcs, lista_plataformas, lista_paises_latam))
+    empty_streak = 0
+    attempts_started = 0
+    in_flight = {}  # future -> (tentativa, shard, repetida do diário)
+    stop = threading.Event()  # acionado no encerramento: shards em andamento param na próxima etapa
+
+    def launch():
+        nonlocal attempts_started
+        while len(in_flight) < max(1, PROSPECTION_WORKERS) and attempts_started < MAX_PROSPECTION_ATTEMPTS:
+            attempts_started += 1
+            # Na retomada, a tentativa repete o shard registrado no diário (não o que o agendador escolheria)
+            resumed = run_journal.prospect_shards.get(attempts_started) if run_journal else None
+            shard = scheduler.resume(resumed) if resumed else \
+                scheduler.pick(exclude={shard.key for _, shard, _ in in_flight.values()})
+            # Tentativa já qualificada no diário: o rendimento dela já foi registrado na execução anterior
+            replayed = bool(run_journal) and attempts_started in run_journal.qualified
+            future = prospect_pool.submit(run_shard, attempts_started, shard, avoid_list.sample(),
+                                          prefilter, prefilter_lock, stop)
+            in_flight[future] = (attempts_started, shard, replayed)
+
+    prospect_pool = ThreadPoolExecutor(max_workers=max(1, PROSPECTION_WORKERS), thread_name_prefix='prospeccao')
+    try:
+        launch()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                attempt, shard, replayed = in_flight.pop(future)
+                try:
+                    raw_candidates, candidates, approved, seconds = future.result()
+                except Exception as e:
+                    print(f"[Prospecção] Erro na tentativa {attempt} ({shard.key}): {e}")
+                    if not replayed:
+                        scheduler.record(shard, 0, 0, 0, 0.0)
+                    continue
+                avoid_list.add(raw_candidates)
+                qualified_new_unique = [n for n in approved
+                                        if n not in existing_startups and n not in all_new_qualified]
+                if not replayed:
+                    scheduler.record(shard, len(raw_candidates), len(candidates), len(qualified_new_unique),
+                                     seconds)
+                if not candidates:
+                    print(f"Nenhum nome novo bruto na tentativa {attempt} ({shard.key}).")
+                    empty_streak += 1
+                    continue
+                empty_streak = 0
+                print(f"[Qualificação] Novos aprovados na tentativa {attempt} ({shard.key}): {qualified_new_unique}")
+                for name in qualified_new_unique:
+                    all_new_qualified.append(name)
+                    analysis_stage.submit(name)  # a análise começa sem esperar o fim da prospecção
+
+            if len(all_new_qualified) >= MIN_NEW_STARTUPS_REQUIRED:
+                print("Critério mínimo de novas startups atingido. Encerrando prospecção.")
+                break
+            if empty_streak >= MAX_EMPTY_ATTEMPTS:
+                print(f"[Prospecção] {empty_streak} tentativas seguidas sem nomes novos. Encerrando prospecção.")
+                break
+            launch()
+    finally:
+        # Não espera shards em andamento cujo resultado não será mais usado: os da fila são
+        # cancelados e os que já rodam param antes da próxima prospecção ou lote de qualificação
+        stop.set()
+        if in_flight:
+            print(f"[Prospecção] Descartando {len(in_flight)} shard(s) ainda em andamento.")
+        prospect_pool.shutdown(wait=False, cancel_futures=True)
+        print(f"[Shards] Rendimento: {scheduler.summary()}")
+        print(f"[Qualificação] Lotes: {qualify_stats}")
+
+    return all_new_qualified
 
 # --- FLUXO DE TRABALHO PRINCIPAL ---
+IMPORT_MS = (time.perf_counter() - _IMPORT_STARTED) * 1000
+
+def warm_up() -> dict:
+    """Conecta à planilha e prepara o writer; ferramentas e agentes continuam sob demanda.
+
+    Lança exceção se a planilha estiver inacessível. Retorna o relatório de cold start.
+    """
+    get_sheet_writer()
+    report = startup_report(IMPORT_MS)
+    print(f"[Startup] Cold start: {report}")
+    return report
+
 if __name__ == '__main__':
-    print("Iniciando fluxo de trabalho completo...")
+    parser = argparse.ArgumentParser(description="Pipeline de prospecção, qualificação e análise de startups.")
+    parser.add_argument('--clean-dry-run', action='store_true',
+                        help="apenas relata o que a limpeza removeria, sem alterar a planilha")
+    parser.add_argument('--resume', nargs='?', const='latest', metavar='RUN_ID',
+                        help="retoma uma execução interrompida (sem RUN_ID: a mais recente não finalizada)")
+    parser.add_argument('--refresh', nargs='?', type=int, const=REFRESH_MAX_STARTUPS, metavar='N',
+                        help="pesquisa de novo só os campos vencidos das N startups mais desatualizadas")
+    args = parser.parse_args()
+
+    try:
+        warm_up()
+    except Exception as e:
+        print(f"Erro ao conectar com a planilha: {e}")
+        sys.exit(1)
+
+    if args.clean_dry_run:
+        # Apenas relata o que a limpeza removeria, sem alterar a planilha
+        clean_invalid_startups(dry_run=True)
+        sys.exit(0)
+
+    if args.refresh is not None:
+        # Atualização por campo das linhas existentes, sem prospecção
+        refresh_stale_startups(args.refresh)
+        sys.exit(0)
+
+    if args.resume:
+        run_journal = RunJournal.latest_unfinished() if args.resume == 'latest' else RunJournal(args.resume)
+        if run_journal is None:
+            print("Nenhuma execução interrompida encontrada. Iniciando uma nova.")
+            run_journal = RunJournal.new()
+        else:
+            print(f"Retomando execução {run_journal.run_id}: {run_journal.summary()}")
+    else:
+        run_journal = RunJournal.new()
+    tracer.start_run(run_journal.run_id)
+    print(f"Iniciando fluxo de trabalho completo... (execução {run_journal.run_id})")
     
     # ETAPA 1: Limpeza de dados inválidos
-    clean_invalid_startups()
+    if run_journal.cleanup_done:
+        print("[Retomada] Limpeza já concluída nesta execução.")
+    else:
+        with tracer.span('limpeza'):
+            clean_invalid_startups()
+        run_journal.record('limpeza')
     
     # Atualiza a lista após limpeza
-    existing_startups = set(worksheet.col_values(1))
+    existing_startups = get_sheet_writer().names_by_row()
     print(f"Startups na planilha após limpeza: {len(existing_startups)}")
 
-    all_new_qualified = []
-    attempted_names = set()
-
-    for attempt in range(1, MAX_PROSPECTION_ATTEMPTS + 1):
-        prospect_task = build_prospect_task(existing_startups.union(attempted_names), attempt)
-        prospect_crew = Crew(
-            agents=[prospector_agent],
-            tasks=[prospect_task],
-            process=Process.sequential,
-            verbose=False
-        )
-        print(f"\n[Prospecção] Executando tentativa {attempt}...")
-        prospect_result = safe_kickoff(prospect_crew, f"Prospecção {attempt}")
-        raw_names = prospect_result.raw if (prospect_result and getattr(prospect_result,'raw', None)) else ''
-        # Normaliza splits
-        raw_candidates = [n.strip() for n in raw_names.split(',') if n.strip()]
-        # Remove já existentes e já tentados
-        new_candidates = [n for n in raw_candidates if n not in existing_startups and n not in attempted_names]
-        attempted_names.update(raw_candidates)
-        if not new_candidates:
-            print("Nenhum nome novo bruto nesta tentativa.")
-            continue
-        qualify_task = build_qualify_task(', '.join(new_candidates))
-        qualify_crew = Crew(
-            agents=[qualifier_agent],
-            tasks=[qualify_task],
-            process=Process.sequential,
-            verbose=False
-        )
-        print(f"[Qualificação] Verificando {len(new_candidates)} candidatos novos...")
-        qualify_result = safe_kickoff(qualify_crew, f"Qualificação {attempt}")
-        qualified_str = qualify_result.raw if (qualify_result and getattr(qualify_result,'raw', None)) else ''
-        qualified_list = [n.strip() for n in qualified_str.split(',') if n.strip()]
-        qualified_new_unique = [n for n in qualified_list if n not in existing_startups and n not in all_new_qualified]
-        print(f"[Qualificação] Novos aprovados nesta tentativa: {qualified_new_unique}")
-        all_new_qualified.extend(qualified_new_unique)
-        if len(all_new_qualified) >= MIN_NEW_STARTUPS_REQUIRED:
-            print("Critério mínimo de novas startups atingido. Encerrando prospecção.")
-            break
-
+    # ETAPA 2: Prospecção/qualificação em pipeline; cada aprovada já entra na análise (em paralelo)
+    analysis_stage = AnalysisStage(ANALYSIS_WORKERS)
+    all_new_qualified = run_prospection(existing_startups, analysis_stage)
     print(f"Total final de novas startups qualificadas: {all_new_qualified}")
 
-    # ETAPA 2: Análise Apenas das Novas
-    for name in all_new_qualified:
-        print(f"\n>>> Iniciando análise profunda para: {name} <<<")
-        task_analyze_data = build_data_task(name)
-        task_analyze_market = build_market_task(name)
-        analysis_crew = Crew(
-            agents=[data_analyst_agent, market_strategist_agent],
-            tasks=[task_analyze_data, task_analyze_market],
-            process=Process.sequential,
-            verbose=True
-        )
-        analysis_result = analysis_crew.kickoff()
-        outputs = []
-        try:
-            if analysis_result and getattr(analysis_result, 'tasks_output', None):
-                outputs = [t.raw for t in analysis_result.tasks_output if getattr(t,'raw', None)]
-            else:
-                if getattr(analysis_result, 'raw', None):
-                    outputs = [analysis_result.raw]
-        except Exception as e:
-            print(f"Falha ao coletar outputs: {e}")
-        merge_and_write(name, outputs)
-        print(f"Conclusão para '{name}'.")
+    analysis_stage.close()
+    elapsed = time.perf_counter() - analysis_stage.started_at
+    first_write = (f"{analysis_stage.first_write_seconds:.1f}s"
+                   if analysis_stage.first_write_seconds is not None else "N/A")
+    print(f"[Análise] {analysis_stage.submitted} startup(s) analisadas com {ANALYSIS_WORKERS} worker(s) "
+          f"em {elapsed:.1f}s | primeira gravação após {first_write}")
+
+    get_sheet_writer().close()
+    print(f"[SheetWriter] Resumo: {get_sheet_writer().summary()}")
+    print(f"[SearchCache] Resumo: {get_search_cache().stats()}")
+    print(f"[RateLimit] Resumo: {limiter_stats()}")
+    print(f"[Startup] Recursos criados: {startup_report(IMPORT_MS)['resources_ms']}")
+    run_journal.record('fim', novas=all_new_qualified)
+    print(f"[Tracing] Spans em {tracer.path}; métricas OpenMetrics em {tracer.export_openmetrics()}")
+    print(f"[Tracing] Relatório: python tracing.py report {tracer.path}")
 
     print("\n\n########################")
     print("## Processo finalizado!")
@@ -0,0 +1,296 @@
+"""Espelho local (SQLite) da planilha de startups.
+
+O app e o pipeline leem daqui; a planilha vira só o destino da sincronização.
+A sincronização é incremental: uma única leitura das colunas de nome e de
+data de atualização (que o spreadsheet_tool grava) mostra quais linhas são
+novas, mudaram, trocaram de posição ou sumiram, e só as novas/alteradas são
+baixadas por completo.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+# Ordem das colunas da planilha (a data de atualização vem logo depois)
+REQUIRED_ORDER = [
+    'Nome da Startup','Site','Setor de Atuação','País','Legalmente Instituída','Ano de Fundação',
+    'Tecnologias Utilizadas','Nome do Investidor (VC)','Valor da Última Rodada','Status de financiamento',
+    'Liderança Técnica (Nome)','Liderança Técnica (LinkedIn)','Integrantes do Time','Tamanho da Startup',
+    'Base de Clientes','TAM','SAM','SOM','Dinâmica do Setor','Principais Concorrentes',
+    'Previsões de Mercado','Análise de Riscos Ambientais','CAC','Churn Rate','Fontes da Análise de Mercado'
+]
+TIMESTAMP_COLUMN = 'Última Atualização'
+SHEET_COLUMNS = REQUIRED_ORDER + [TIMESTAMP_COLUMN]
+TIMESTAMP_LETTER = chr(ord('A') + len(REQUIRED_ORDER))  # coluna Z
+LAST_LETTER = TIMESTAMP_LETTER
+
+# Colunas com tipo diferente de TEXT
+COLUMN_TYPES = {'Ano de Fundação': 'INTEGER'}
+INDEXED_COLUMNS = ('Nome da Startup', 'País', 'Setor de Atuação')
+
+MIRROR_DB_PATH = os.getenv('MIRROR_DB_PATH', 'startups_mirror.db')
+MIRROR_SYNC_SECONDS = float(os.getenv('MIRROR_SYNC_SECONDS', '60'))
+MIRROR_FETCH_CHUNK = 200  # faixas por batch_get ao baixar linhas alteradas
+
+
+def column_slug(header: str) -> str:
+    """Nome SQL de uma coluna da planilha ('País' -> 'pais')."""
+    text = unicodedata.normalize('NFKD', header)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^a-z0-9]+', '_', text).strip('_')
+
+
+COLUMN_SLUGS = [column_slug(h) for h in SHEET_COLUMNS]
+TIMESTAMP_SLUG = column_slug(TIMESTAMP_COLUMN)
+
+
+def _pad(values: list) -> list:
+    values = list(values[:len(SHEET_COLUMNS)])
+    return values + [''] * (len(SHEET_COLUMNS) - len(values))
+
+
+class MirrorStore:
+    """Cópia local da planilha com índices por nome, país e setor."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()       # acesso ao SQLite (leituras e escritas locais)
+        self._sync_lock = threading.Lock()   # uma sincronização por vez; não bloqueia as leituras
+        self._db = None
+        self._db_pid = None
+        self._last_sync = 0.0
+        self.last_report = None
+
+    @property
+    def _conn(self):
+        """Conexão do processo atual, aberta no primeiro uso (e de novo depois de um fork)."""
+        if self._db_pid != os.getpid():
+            with self._lock:
+                if self._db_pid != os.getpid():
+                    self._db = self._open()
+                    self._db_pid = os.getpid()
+        return self._db
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        columns = ', '.join(f'{slug} {COLUMN_TYPES.get(header, "TEXT")}'
+                            for header, slug in zip(SHEET_COLUMNS, COLUMN_SLUGS))
+        conn.execute(
+            f'CREATE TABLE IF NOT EXISTS startups (chave TEXT PRIMARY KEY, linha INTEGER NOT NULL, {columns})')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_startups_linha ON startups (linha)')
+        for header in INDEXED_COLUMNS:
+            slug = column_slug(header)
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_startups_{slug} ON startups ({slug})')
+        # Quando cada campo foi pesquisado pela última vez (atualização por campo); sem registro vale a
+        # data de atualização da linha
+        conn.execute('CREATE TABLE IF NOT EXISTS campos_atualizados '
+                     '(nome TEXT NOT NULL, campo TEXT NOT NULL, atualizado_em TEXT NOT NULL, '
+                     'PRIMARY KEY (nome, campo))')
+        conn.commit()
+        return conn
+
+    # --- Sincronização ---
+
+    def sync(self, worksheet, full: bool = False) -> dict:
+        """Sincroniza com a planilha. Retorna um relatório com o que mudou.
+
+        As leituras da planilha acontecem sem o lock do banco: enquanto a
+        sincronização espera a rede, o espelho continua respondendo; o lock
+        só é tomado para comparar e aplicar o resultado.
+        """
+        start = time.perf_counter()
+        with self._sync_lock:
+            if full:
+                report = self._full_sync(worksheet)
+            else:
+                report = self._delta_sync(worksheet)
+            self._last_sync = time.monotonic()
+        report['ms'] = round((time.perf_counter() - start) * 1000, 1)
+        self.last_report = report
+        return report
+
+    def sync_if_due(self, worksheet, interval: float = MIRROR_SYNC_SECONDS):
+        """Sincroniza apenas se a última sincronização tiver mais de `interval` segundos."""
+        if time.monotonic() - self._last_sync < interval:
+            return None
+        return self.sync(worksheet)
+
+    def mark_due(self):
+        """Força a próxima sync_if_due a sincronizar."""
+        self._last_sync = 0.0
+
+    def _full_sync(self, worksheet) -> dict:
+        values = worksheet.get_all_values()[1:]  # linha 1 é o cabeçalho
+        rows = [(row, _pad(v)) for row, v in enumerate(values, start=2) if v and str(v[0]).strip()]
+        keys = self._keys_for(values[0] for _, values in rows)
+        with self._lock:
+            self._conn.execute('DELETE FROM startups')
+            self._write_rows([(key, row, values) for key, (row, values) in zip(keys, rows)])
+            self._conn.commit()
+        return {'mode': 'full', 'fetched': len(rows), 'moved': 0, 'removed': 0, 'unchanged': 0, 'api_calls': 1}
+
+    def _delta_sync(self, worksheet) -> dict:
+        names, stamps = worksheet.batch_get(['A2:A', f'{TIMESTAMP_LETTER}2:{TIMESTAMP_LETTER}'])
+        api_calls = 1
+        sheet_rows = []
+        for i, cell in enumerate(names):
+            name = str(cell[0]).strip() if cell else ''
+            if not name:
+                continue
+            stamp = str(stamps[i][0]).strip() if i < len(stamps) and stamps[i] else ''
+            sheet_rows.append((i + 2, name, stamp))
+
+        with self._lock:
+            local = {key: (row, stamp) for key, row, stamp in
+                     self._conn.execute(f'SELECT chave, linha, {TIMESTAMP_SLUG} FROM startups')}
+        to_fetch, moved, seen = [], [], set()
+        for key, (row, name, stamp) in zip(self._keys_for(r[1] for r in sheet_rows), sheet_rows):
+            seen.add(key)
+            current = local.get(key)
+            # Sem data de atualização não há como saber se mudou: só baixa se for nova
+            if current is None or (stamp and str(current[1] or '') != stamp):
+                to_fetch.append((key, row))
+            elif current[0] != row:
+                moved.append((key, row))
+        removed = [key for key in local if key not in seen]
+
+        fetched = []
+        for i in range(0, len(to_fetch), MIRROR_FETCH_CHUNK):
+            chunk = to_fetch[i:i + MIRROR_FETCH_CHUNK]
+            ranges = worksheet.batch_get([f'A{row}:{LAST_LETTER}{row}' for _, row in chunk])
+            api_calls += 1
+            for (key, row), value_range in zip(chunk, ranges):
+                fetched.append((key, row, _pad(value_range[0] if value_range else [])))
+
+        with self._lock:
+            self._conn.executemany('DELETE FROM startups WHERE chave = ?', [(key,) for key in removed])
+            self._conn.executemany('UPDATE startups SET linha = ? WHERE chave = ?', [(row, key) for key, row in moved])
+            self._write_rows(fetched)
+            self._conn.commit()
+        return {'mode': 'delta', 'fetched': len(fetched), 'moved': len(moved), 'removed': len(removed),
+                'unchanged': len(sheet_rows) - len(fetched) - len(moved), 'api_calls': api_calls}
+
+    @staticmethod
+    def _keys_for(names):
+        """Chave estável por linha: o nome, com sufixo '#n' para nomes repetidos."""
+        seen = {}
+        for name in names:
+            name = str(name).strip()
+            seen[name] = seen.get(name, 0) + 1
+            yield name if seen[name] == 1 else f'{name}#{seen[name]}'
+
+    def _write_rows(self, rows):
+        placeholders = ', '.join('?' for _ in range(len(COLUMN_SLUGS) + 2))
+        self._conn.executemany(
+            f'INSERT OR REPLACE INTO startups (chave, linha, {", ".join(COLUMN_SLUGS)}) VALUES ({placeholders})',
+            [(key, row, *values) for key, row, values in rows])
+
+    # --- Escrita local (write-through do SheetWriter) ---
+
+    def upsert_rows(self, rows):
+        """Grava localmente linhas já confirmadas na planilha: [(número da linha, valores), ...].
+
+        As chaves seguem a mesma regra de _keys_for (nome, '#n' para a n-ésima
+        ocorrência na ordem da planilha), então a próxima sincronização
+        reconhece as linhas gravadas aqui em vez de baixá-las de novo.
+        """
+        name_slug = column_slug('Nome da Startup')
+        with self._lock:
+            for row, values in sorted(rows, key=lambda item: item[0]):
+                name = str(values[0]).strip()
+                before = self._conn.execute(
+                    f'SELECT COUNT(*) FROM startups WHERE TRIM({name_slug}) = ? AND linha < ?', (name, row)).fetchone()[0]
+                key = list(self._keys_for([name] * (before + 1)))[-1]  # a (before + 1)-ésima ocorrência
+                # A linha passa a ser desta chave: some a chave antiga que apontava para ela
+                self._conn.execute('DELETE FROM startups WHERE linha = ? AND chave != ?', (row, key))
+                self._write_rows([(key, row, _pad(values))])
+            # Linha inteira regravada: todos os campos passam a valer a data de atualização da linha
+            self._conn.executemany('DELETE FROM campos_atualizados WHERE nome = ?',
+                                   [(str(values[0]).strip(),) for _, values in rows])
+            self._conn.commit()
+
+    def update_cells(self, row: int, values: dict):
+        """Grava localmente células já confirmadas na planilha: {cabeçalho: valor} da linha `row`."""
+        if not values:
+            return
+        assignments = ', '.join(f'{column_slug(header)} = ?' for header in values)
+        with self._lock:
+            self._conn.execute(f'UPDATE startups SET {assignments} WHERE linha = ?', (*values.values(), row))
+            self._conn.commit()
+
+    def field_stamps(self) -> dict:
+        """Nome da startup -> {campo: data da última pesquisa do campo}."""
+        stamps = {}
+        with self._lock:
+            for name, field, stamp in self._conn.execute('SELECT nome, campo, atualizado_em FROM campos_atualizados'):
+                stamps.setdefault(name, {})[field] = stamp
+        return stamps
+
+    def record_field_stamps(self, name: str, stamps: dict):
+        """Registra quando cada campo da startup foi pesquisado: {campo: data}."""
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO campos_atualizados (nome, campo, atualizado_em) VALUES (?, ?, ?)',
+                [(name, field, stamp) for field, stamp in stamps.items()])
+            self._conn.commit()
+
+    # --- Leitura ---
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM startups').fetchone()[0]
+
+    def rows(self, columns=None):
+        """[(linha, registro)] na ordem da planilha; `columns` limita as colunas lidas."""
+        headers = list(columns) if columns else SHEET_COLUMNS
+        slugs = [column_slug(h) for h in headers]
+        with self._lock:
+            cursor = self._conn.execute(f'SELECT linha, {", ".join(slugs)} FROM startups ORDER BY linha')
+            return [(values[0], dict(zip(headers, values[1:]))) for values in cursor]
+
+    def all_records(self, columns=None) -> list:
+        """Registros no mesmo formato de worksheet.get_all_records()."""
+        return [record for _, record in self.rows(columns)]
+
+    def row_stamps(self) -> dict:
+        """Chave da linha -> data de atualização (mostra linhas novas e alteradas sem ler as demais colunas)."""
+        with self._lock:
+            return dict(self._conn.execute(f'SELECT chave, {TIMESTAMP_SLUG} FROM startups'))
+
+    def keyed_records(self, columns, keys=None) -> dict:
+        """Chave da linha -> registro com `columns`; com `keys`, só essas linhas."""
+        headers = list(columns)
+        select = f'SELECT chave, {", ".join(column_slug(h) for h in headers)} FROM startups'
+        with self._lock:
+            if keys is None:
+                rows = self._conn.execute(select).fetchall()
+            else:
+                keys = list(keys)
+                rows = []
+                for i in range(0, len(keys), 500):  # limite de parâmetros do SQLite
+                    chunk = keys[i:i + 500]
+                    rows.extend(self._conn.execute(
+                        f'{select} WHERE chave IN ({", ".join("?" for _ in chunk)})', chunk))
+        return {values[0]: dict(zip(headers, values[1:])) for values in rows}
+
+    def row_index(self) -> dict:
+        """Nome da startup -> número da linha na planilha."""
+        name_slug = column_slug('Nome da Startup')
+        with self._lock:
+            cursor = self._conn.execute(f'SELECT {name_slug}, linha FROM startups ORDER BY linha DESC')
+            # ORDER BY DESC: em nomes repetidos fica a primeira ocorrência, como o worksheet.find()
+            return {str(name): row for name, row in cursor}
+
+    def find(self, column: str, value) -> list:
+        """Registros cujo valor da coluna é igual a `value` (usa os índices)."""
+        slug = column_slug(column)
+        with self._lock:
+            cursor = self._conn.execute(
+                f'SELECT {", ".join(COLUMN_SLUGS)} FROM startups WHERE {slug} = ? ORDER BY linha', (value,))
+            return [dict(zip(SHEET_COLUMNS, values)) for values in cursor]
+
+
+mirror = MirrorStore(MIRROR_DB_PATH)
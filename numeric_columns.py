@@ -0,0 +1,243 @@
+"""Colunas numéricas tipadas (NumPy) dos campos monetários e de taxa.
+
+Os valores chegam da planilha como texto livre ('2,843.18', 'US$ 1B',
+'R$ 2,5 milhões', '5-7% ao mês'). Cada snapshot é convertido uma única vez
+em arrays float64 (NaN quando não há número), com unidade (mil, milhão,
+bilhão...) e moeda resolvidas e os valores monetários levados a dólares.
+Setor e país viram códigos inteiros, então filtros, histogramas, percentis
+e somas por grupo são operações vetorizadas sobre o snapshot inteiro.
+"""
+import json
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Campo da API -> (coluna da planilha, tipo)
+NUMERIC_FIELDS = {
+    'tam': ('TAM', 'money'),
+    'sam': ('SAM', 'money'),
+    'som': ('SOM', 'money'),
+    'rodada': ('Valor da Última Rodada', 'money'),
+    'cac': ('CAC', 'money'),
+    'churn': ('Churn Rate', 'rate'),
+}
+# Campos categóricos usados para filtrar e agrupar (campo da API -> coluna)
+GROUP_FIELDS = {
+    'setor': 'Setor de Atuação',
+    'pais': 'País',
+    'status': 'Status de financiamento',
+}
+
+# Cotação aproximada para converter tudo a USD (sobrescreva com CURRENCY_TO_USD='{"BRL": 0.19}')
+CURRENCY_TO_USD = {'USD': 1.0, 'BRL': 0.19, 'EUR': 1.08, 'MXN': 0.055, 'ARS': 0.0011, 'COP': 0.00025,
+                   'CLP': 0.0011, 'PEN': 0.27, 'UYU': 0.025, 'GBP': 1.27}
+CURRENCY_TO_USD.update(json.loads(os.getenv('CURRENCY_TO_USD', '{}')))
+DEFAULT_CURRENCY = os.getenv('DEFAULT_CURRENCY', 'USD')  # moeda assumida quando o texto não diz
+
+# Símbolo/código/palavra -> moeda (os mais longos primeiro para 'US$' vencer '$'). Cada token só vale
+# isolado: 'ars' em 'dollars', 'eur' em 'Europe' ou 'cop' em 'scope' não são moeda.
+_CURRENCY_TOKENS = [(re.compile(r'(?<![a-z])' + re.escape(token) + r'(?![a-z])'), currency)
+                    for token, currency in sorted({
+    'us$': 'USD', 'usd': 'USD', 'u$s': 'USD', 'r$': 'BRL', 'brl': 'BRL', '€': 'EUR', 'eur': 'EUR',
+    'mx$': 'MXN', 'mxn': 'MXN', 'ars': 'ARS', 'cop': 'COP', 'clp': 'CLP', 'pen': 'PEN', 's/': 'PEN',
+    'uyu': 'UYU', '£': 'GBP', 'gbp': 'GBP', '$': 'USD', 'dollar': 'USD', 'dollars': 'USD',
+    'dólar': 'USD', 'dólares': 'USD', 'reais': 'BRL', 'euro': 'EUR', 'euros': 'EUR',
+}.items(), key=lambda item: -len(item[0]))]
+
+# Sufixo -> multiplicador ('mil' é milhar em português; 'm' sozinho é milhão, como em '500M')
+_UNITS = [
+    (r'trilh[aã]o|trilh[oõ]es|trillions?|tri|t', 1e12),
+    (r'bilh[aã]o|bilh[oõ]es|billions?|bn|bi|b', 1e9),
+    (r'milh[aã]o|milh[oõ]es|millions?|mm|mi|m', 1e6),
+    (r'mil|thousands?|k', 1e3),
+]
+_UNIT_RE = re.compile(r'^\s*(' + '|'.join(pattern for pattern, _ in _UNITS) + r')\b', re.IGNORECASE)
+_NUMBER_RE = re.compile(r'\d[\d.,]*')
+_RANGE_SEPARATOR_RE = re.compile(r'^\s*(-|–|a|to|até)\s*$', re.IGNORECASE)
+_YEAR_RE = re.compile(r'(19|20)\d{2}')
+
+
+def parse_number(token: str) -> float:
+    """'2,843.18', '1.234,56', '2,5', '1.234.567' -> float (o último separador com 1-2 casas é o decimal)."""
+    token = token.rstrip('.,')
+    if ',' in token and '.' in token:
+        decimal = ',' if token.rfind(',') > token.rfind('.') else '.'
+    elif ',' in token:
+        decimal = None if re.fullmatch(r'\d{1,3}(,\d{3})+', token) else ','
+    elif token.count('.') > 1:
+        decimal = None
+    else:
+        decimal = '.'
+    thousands = {',': '.', '.': ',', None: None}[decimal]
+    if thousands:
+        token = token.replace(thousands, '')
+    if decimal is None:
+        token = token.replace(',', '').replace('.', '')
+    elif decimal == ',':
+        token = token.replace(',', '.')
+    return float(token)
+
+
+def _unit_multiplier(rest: str) -> float:
+    match = _UNIT_RE.match(rest)
+    if not match:
+        return 1.0
+    word = match.group(1).lower()
+    for pattern, multiplier in _UNITS:
+        if re.fullmatch(pattern, word, re.IGNORECASE):
+            return multiplier
+    return 1.0
+
+
+def _currency(text: str) -> str:
+    lowered = text.lower()
+    for pattern, currency in _CURRENCY_TOKENS:
+        if pattern.search(lowered):
+            return currency
+    return DEFAULT_CURRENCY
+
+
+def _is_year(text: str, match) -> bool:
+    """'2030' em '2030: 5B' é ano, não valor: 4 dígitos sem unidade nem moeda colada."""
+    if not _YEAR_RE.fullmatch(match.group(0)):
+        return False
+    before = text[max(match.start() - 4, 0):match.start()]
+    after = text[match.end():match.end() + 4]
+    if _unit_multiplier(text[match.end():]) != 1.0:
+        return False
+    lowered = f'{before} {after}'.lower()
+    return not any(pattern.search(lowered) for pattern, _ in _CURRENCY_TOKENS)
+
+
+def _amounts(text: str):
+    """Números do texto com o multiplicador da unidade que os segue; intervalos viram a média.
+
+    Anos ('2030: 5B') são ignorados quando há outro número; sozinhos ('2000') continuam valendo.
+    """
+    values = []
+    for match in _NUMBER_RE.finditer(text):
+        try:
+            values.append((parse_number(match.group(0)), match))
+        except ValueError:
+            continue
+    amounts = [(value, match) for value, match in values if not _is_year(text, match)]
+    values = amounts or values
+    if not values:
+        return None
+    first, first_match = values[0]
+    first_unit = _unit_multiplier(text[first_match.end():])
+    if len(values) >= 2:
+        second, second_match = values[1]
+        between = _UNIT_RE.sub('', text[first_match.end():second_match.start()], count=1)
+        if _RANGE_SEPARATOR_RE.match(between):
+            second_unit = _unit_multiplier(text[second_match.end():])
+            # '1-2B': sem unidade própria, o primeiro número usa a do segundo
+            return (first * (first_unit if first_unit != 1.0 else second_unit) + second * second_unit) / 2
+    return first * first_unit
+
+
+@lru_cache(maxsize=65536)
+def parse_money(text) -> float:
+    """Valor monetário em USD ('US$ 1B' -> 1e9, 'R$ 2,5 milhões' -> 475000.0) ou NaN."""
+    text = str(text or '').strip()
+    amount = _amounts(text)
+    if amount is None:
+        return float('nan')
+    return amount * CURRENCY_TO_USD.get(_currency(text), 1.0)
+
+
+@lru_cache(maxsize=65536)
+def parse_rate(text) -> float:
+    """Taxa como fração ('5%' -> 0.05, '5-7% ao mês' -> 0.06, '0.03' -> 0.03) ou NaN."""
+    text = str(text or '').strip()
+    amount = _amounts(text)
+    if amount is None:
+        return float('nan')
+    if '%' in text or amount > 1:
+        return amount / 100
+    return amount
+
+
+PARSERS = {'money': parse_money, 'rate': parse_rate}
+
+
+class NumericColumns:
+    """Arrays de um snapshot: um float64 por campo numérico e um código int32 por campo categórico."""
+
+    def __init__(self, records=(), version=0):
+        records = list(records)
+        self.version = version
+        self.size = len(records)
+        self.build_ms = None  # preenchido por quem constrói, para as estatísticas
+        self.values = {}
+        for field, (column, kind) in NUMERIC_FIELDS.items():
+            parse = PARSERS[kind]
+            self.values[field] = np.fromiter((parse(record.get(column, '')) for record in records),
+                                             dtype=np.float64, count=self.size)
+        self.codes = {}
+        self.categories = {}
+        for field, column in GROUP_FIELDS.items():
+            labels = [str(record.get(column, '') or 'N/A').strip() for record in records]
+            categories, codes = np.unique(np.array(labels, dtype=object), return_inverse=True)
+            self.categories[field] = [str(c) for c in categories]
+            self.codes[field] = codes.astype(np.int32)
+
+    def coverage(self) -> dict:
+        """Quantas linhas têm número em cada campo."""
+        return {field: int(np.count_nonzero(~np.isnan(values))) for field, values in self.values.items()}
+
+    def mask(self, filters=None, field=None, minimum=None, maximum=None):
+        """Máscara booleana: filtros categóricos ({'setor': ['Fintech']}) e faixa do campo numérico."""
+        mask = np.ones(self.size, dtype=bool)
+        for group, labels in (filters or {}).items():
+            lookup = {c.casefold(): i for i, c in enumerate(self.categories[group])}
+            wanted = [lookup[label.casefold()] for label in labels if label.casefold() in lookup]
+            mask &= np.isin(self.codes[group], wanted)
+        if field is not None:
+            values = self.values[field]
+            mask &= ~np.isnan(values)
+            if minimum is not None:
+                mask &= values >= minimum
+            if maximum is not None:
+                mask &= values <= maximum
+        return mask
+
+    def histogram(self, field, bins=20, log=False, **selection) -> dict:
+        values = self.values[field][self.mask(field=field, **selection)]
+        if log:
+            values = values[values > 0]
+        if not values.size:
+            return {'count': 0, 'edges': [], 'counts': []}
+        if log:
+            edges = np.logspace(np.log10(values.min()), np.log10(values.max()), bins + 1)
+            counts, edges = np.histogram(values, bins=edges)
+        else:
+            counts, edges = np.histogram(values, bins=bins)
+        return {'count': int(values.size), 'edges': edges.tolist(), 'counts': counts.tolist()}
+
+    def percentiles(self, field, quantiles=(50, 90, 95, 99), **selection) -> dict:
+        values = self.values[field][self.mask(field=field, **selection)]
+        if not values.size:
+            return {'count': 0, 'percentiles': {}}
+        result = np.percentile(values, quantiles)
+        return {'count': int(values.size), 'min': float(values.min()), 'max': float(values.max()),
+                'mean': float(values.mean()),
+                'percentiles': {f'{q:g}': float(v) for q, v in zip(quantiles, result)}}
+
+    def sum_by(self, field, by='setor', top=None, **selection) -> dict:
+        """Soma, contagem e média do campo por grupo (np.bincount sobre os códigos)."""
+        mask = self.mask(field=field, **selection)
+        codes = self.codes[by][mask]
+        values = self.values[field][mask]
+        size = len(self.categories[by])
+        sums = np.bincount(codes, weights=values, minlength=size)
+        counts = np.bincount(codes, minlength=size)
+        order = np.argsort(-sums, kind='stable')
+        order = order[counts[order] > 0]
+        if top:
+            order = order[:top]
+        groups = [{'name': self.categories[by][i], 'sum': float(sums[i]), 'count': int(counts[i]),
+                   'mean': float(sums[i] / counts[i])} for i in order]
+        return {'count': int(values.size), 'total': float(values.sum()), 'groups': groups}
@@ -0,0 +1,192 @@
+"""Partições (shards) da prospecção e o agendador que escolhe a próxima.
+
+Em vez de um prompt com todos os VCs, plataformas e países, cada tentativa
+de prospecção cobre uma região e uma fonte (um VC ou uma plataforma). O
+rendimento de cada shard (startups novas aprovadas por chamada) é guardado
+entre execuções, e o agendador prioriza os shards produtivos sem deixar de
+experimentar os pouco testados (UCB). Shards ainda sem histórico herdam a
+média da sua região e da sua fonte.
+"""
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+from run_journal import RUNS_DIR
+
+PROSPECTION_STATS_PATH = os.getenv('PROSPECTION_STATS_PATH', os.path.join(RUNS_DIR, 'prospeccao_shards.json'))
+SHARD_PRIOR_WEIGHT = 2.0      # chamadas "fictícias" com o rendimento médio dadas a cada shard
+SHARD_DEFAULT_YIELD = 1.0     # aprovadas por chamada assumidas antes de qualquer histórico
+SHARD_EXPLORATION = float(os.getenv('SHARD_EXPLORATION', '0.5'))  # peso do bônus de exploração (UCB)
+
+# Grafias de lista_paises_latam agrupadas por região; as que não estiverem aqui viram uma região própria
+REGIOES = {
+    'Brasil': ('Brasil', 'Brazil'),
+    'México': ('México', 'Mexico'),
+    'Argentina': ('Argentina',),
+    'Colômbia': ('Colômbia', 'Colombia'),
+    'Chile': ('Chile',),
+    'Peru': ('Peru', 'Perú'),
+    'Uruguai e Paraguai': ('Uruguai', 'Uruguay', 'Paraguai', 'Paraguay'),
+    'Andes e Guianas': ('Bolívia', 'Bolivia', 'Equador', 'Ecuador', 'Venezuela', 'Guiana', 'Guyana', 'Suriname'),
+    'América Central e Caribe': ('Belize', 'Costa Rica', 'El Salvador', 'Guatemala', 'Honduras', 'Nicarágua',
+                                 'Nicaragua', 'Panamá', 'Panama', 'Cuba', 'Haiti', 'República Dominicana',
+                                 'Dominican Republic'),
+}
+
+
+class Shard:
+    """Uma região (com as grafias dos seus países) e uma fonte: portfólio de VC ou plataforma ('site:')."""
+
+    def __init__(self, region: str, countries: tuple, source: str, kind: str):
+        self.region = region
+        self.countries = countries
+        self.source = source
+        self.kind = kind  # 'vc' ou 'plataforma'
+        self.key = f'{region} | {source}'
+
+    def __repr__(self):
+        return f'Shard({self.key!r})'
+
+
+def build_shards(vcs, platforms, countries) -> list:
+    """Todas as combinações região × fonte, em diagonal: os primeiros shards variam região e fonte."""
+    regions = {}
+    covered = set()
+    for region, spellings in REGIOES.items():
+        present = tuple(c for c in spellings if c in countries)
+        if present:
+            regions[region] = present
+            covered.update(present)
+    for country in countries:
+        if country not in covered:
+            regions[country] = (country,)
+    sources = [(vc, 'vc') for vc in dict.fromkeys(vcs)] + [(p, 'plataforma') for p in dict.fromkeys(platforms)]
+    names = list(regions)
+    pairs = sorted(((i, j) for i in range(len(names)) for j in range(len(sources))),
+                   key=lambda ij: ((ij[1] - ij[0]) % len(sources), ij[0]))
+    return [Shard(names[i], regions[names[i]], *sources[j]) for i, j in pairs]
+
+
+class ShardScheduler:
+    """Escolhe o próximo shard pela estimativa de rendimento + bônus de exploração e registra os resultados."""
+
+    def __init__(self, shards, path: str = PROSPECTION_STATS_PATH):
+        self.shards = list(shards)
+        self._by_key = {shard.key: shard for shard in self.shards}
+        self.path = path
+        self._lock = threading.Lock()
+        self.stats = self._load()
+        self.run = {'calls': 0, 'raw': 0, 'candidates': 0, 'approved': 0, 'seconds': 0.0}
+        self.started_at = time.perf_counter()
+
+    def _load(self) -> dict:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f).get('shards', {})
+        except (OSError, ValueError) as e:
+            print(f"[Shards] Histórico de rendimento ilegível ({e}); começando do zero.")
+            return {}
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'atualizado_em': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'shards': self.stats},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    def get(self, key: str):
+        return self._by_key.get(key)
+
+    def resume(self, key: str) -> Shard:
+        """O shard registrado no diário com esta chave, mesmo que as listas de VCs/plataformas tenham mudado."""
+        shard = self._by_key.get(key)
+        if shard is not None:
+            return shard
+        region, _, source = key.partition(' | ')
+        kinds = {known.source: known.kind for known in self.shards}
+        countries = next((known.countries for known in self.shards if known.region == region),
+                         REGIOES.get(region, (region,)))
+        return Shard(region, countries, source, kinds.get(source, 'vc'))
+
+    def _group_rates(self, global_rate: float):
+        """Rendimento suavizado por região e por fonte (a priori dos shards sem histórico)."""
+        totals = {}
+        for key, entry in self.stats.items():
+            shard = self._by_key.get(key)
+            if shard is None:
+                continue
+            for group in (('region', shard.region), ('source', shard.source)):
+                calls, approved = totals.get(group, (0, 0))
+                totals[group] = (calls + entry['calls'], approved + entry['approved'])
+        return {group: (approved + SHARD_PRIOR_WEIGHT * global_rate) / (calls + SHARD_PRIOR_WEIGHT)
+                for group, (calls, approved) in totals.items()}
+
+    def expected_yield(self, shard: Shard, global_rate: float = None, group_rates: dict = None) -> float:
+        """Aprovadas por chamada esperadas do shard (histórico suavizado pela média da região e da fonte)."""
+        if global_rate is None:
+            global_rate = self._global_rate()
+        if group_rates is None:
+            group_rates = self._group_rates(global_rate)
+        prior = (group_rates.get(('region', shard.region), global_rate)
+                 + group_rates.get(('source', shard.source), global_rate)) / 2
+        entry = self.stats.get(shard.key, {'calls': 0, 'approved': 0})
+        return (entry['approved'] + SHARD_PRIOR_WEIGHT * prior) / (entry['calls'] + SHARD_PRIOR_WEIGHT)
+
+    def _global_rate(self) -> float:
+        calls = sum(entry['calls'] for entry in self.stats.values())
+        approved = sum(entry['approved'] for entry in self.stats.values())
+        return (approved + SHARD_PRIOR_WEIGHT * SHARD_DEFAULT_YIELD) / (calls + SHARD_PRIOR_WEIGHT)
+
+    def pick(self, exclude=()) -> Shard:
+        """O shard de maior prioridade fora de `exclude` (chaves em andamento)."""
+        with self._lock:
+            global_rate = self._global_rate()
+            group_rates = self._group_rates(global_rate)
+            total_calls = sum(entry['calls'] for entry in self.stats.values())
+            best, best_score = None, None
+            for shard in self.shards:
+                if shard.key in exclude:
+                    continue
+                calls = self.stats.get(shard.key, {}).get('calls', 0)
+                bonus = SHARD_EXPLORATION * math.sqrt(math.log(total_calls + 2) / (calls + 1))
+                score = self.expected_yield(shard, global_rate, group_rates) + bonus
+                if best_score is None or score > best_score:
+                    best, best_score = shard, score
+            return best
+
+    def record(self, shard: Shard, raw: int, candidates: int, approved: int, seconds: float):
+        """Registra uma chamada do shard: nomes brutos, novos após o pré-filtro e aprovados inéditos."""
+        with self._lock:
+            entry = self.stats.setdefault(shard.key, {'calls': 0, 'raw': 0, 'candidates': 0, 'approved': 0,
+                                                      'seconds': 0.0})
+            for totals in (entry, self.run):
+                totals['calls'] += 1
+                totals['raw'] += raw
+                totals['candidates'] += candidates
+                totals['approved'] += approved
+                totals['seconds'] = round(totals['seconds'] + seconds, 2)
+            try:
+                self._save()
+            except OSError as e:
+                print(f"[Shards] Não foi possível salvar o histórico de rendimento: {e}")
+
+    def summary(self, top: int = 5) -> dict:
+        """Rendimento desta execução (por chamada e por minuto de relógio) e os shards mais produtivos do histórico."""
+        with self._lock:
+            run = dict(self.run)
+            ranked = sorted(self.stats.items(), key=lambda item: item[1]['approved'] / max(item[1]['calls'], 1),
+                            reverse=True)
+        minutes = (time.perf_counter() - self.started_at) / 60
+        run['aprovadas_por_chamada'] = round(run['approved'] / run['calls'], 2) if run['calls'] else None
+        run['aprovadas_por_minuto'] = round(run['approved'] / minutes, 2) if minutes else None
+        run['melhores_shards'] = [{'shard': key, 'chamadas': entry['calls'], 'aprovadas': entry['approved']}
+                                  for key, entry in ranked[:top]]
+        return run
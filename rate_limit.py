@@ -0,0 +1,244 @@
+"""Limite de taxa, retentativas e disjuntor compartilhados pelas chamadas externas.
+
+Cada backend (planilha, Serper, LLM) tem um token bucket, retentativas com
+backoff exponencial + jitter (respeitando o Retry-After quando a resposta
+traz um) e um circuit breaker: depois de CIRCUIT_FAILURE_THRESHOLD falhas
+seguidas o backend fica aberto por CIRCUIT_RESET_SECONDS e as chamadas falham
+na hora, sem gerar novas requisições; em seguida uma chamada de teste decide
+se ele volta a fechar.
+"""
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+BACKOFF_BASE_SECONDS = float(os.getenv('BACKOFF_BASE_SECONDS', '1'))
+BACKOFF_MAX_SECONDS = float(os.getenv('BACKOFF_MAX_SECONDS', '60'))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_SECONDS = float(os.getenv('CIRCUIT_RESET_SECONDS', '30'))
+
+
+class CircuitOpenError(RuntimeError):
+    """O backend está com o disjuntor aberto; a chamada nem foi feita."""
+
+    def __init__(self, backend: str, retry_after: float):
+        super().__init__(f"Backend '{backend}' indisponível (disjuntor aberto por mais {retry_after:.0f}s)")
+        self.backend = backend
+        self.retry_after = retry_after
+
+
+def status_of(exc):
+    """Status HTTP de uma exceção (requests, gspread ou clientes de LLM), se houver."""
+    response = getattr(exc, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is None:
+        status = getattr(exc, 'status_code', None)
+    return status
+
+
+def retry_after_of(exc):
+    """Segundos pedidos pelo cabeçalho Retry-After da resposta (ou None)."""
+    headers = getattr(getattr(exc, 'response', None), 'headers', None) or {}
+    value = headers.get('Retry-After') if hasattr(headers, 'get') else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc) -> bool:
+    """Erros transitórios: status de sobrecarga/indisponibilidade ou falha de conexão."""
+    status = status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(exc, (ConnectionError, TimeoutError)) or type(exc).__name__ in (
+        'ConnectionError', 'Timeout', 'ReadTimeout', 'ConnectTimeout', 'RateLimitError', 'APIConnectionError')
+
+
+def is_rate_limited(exc) -> bool:
+    """Só o 429: garantia de que a requisição não foi aplicada (seguro para escritas não idempotentes)."""
+    return status_of(exc) == 429
+
+
+class TokenBucket:
+    """`rate` chamadas por segundo, com rajadas de até `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Consome um token, esperando se preciso. Retorna o tempo esperado (s)."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class CircuitBreaker:
+    """Abre após `threshold` falhas seguidas; meio-aberto após `reset_seconds`."""
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.opens = 0
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self, backend: str):
+        with self._lock:
+            if self.state == 'open':
+                remaining = self.reset_seconds - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(backend, remaining)
+                self.state = 'half_open'
+                self._trial_in_flight = False
+            if self.state == 'half_open':
+                if self._trial_in_flight:
+                    raise CircuitOpenError(backend, self.reset_seconds)
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half_open' or self._failures >= self.threshold:
+                if self.state != 'open':
+                    self.opens += 1
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class Backend:
+    """Limite de taxa + retentativas + disjuntor de um serviço externo."""
+
+    def __init__(self, name: str, rate: float, burst: int, max_retries: int,
+                 base_delay: float = BACKOFF_BASE_SECONDS, max_delay: float = BACKOFF_MAX_SECONDS):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.counters = {'calls': 0, 'retries': 0, 'failures': 0, 'rejected': 0,
+                         'throttled_seconds': 0.0, 'backoff_seconds': 0.0}
+
+    def _count(self, key: str, value=1):
+        with self._lock:
+            self.counters[key] += value
+
+    def acquire(self, span: dict = None):
+        """Verifica o disjuntor e espera um token. Lança CircuitOpenError se o backend estiver aberto."""
+        try:
+            self.breaker.before_call(self.name)
+        except CircuitOpenError:
+            self._count('rejected')
+            raise
+        waited = self.bucket.acquire()
+        self._count('calls')
+        if waited:
+            self._count('throttled_seconds', waited)
+        if span is not None:
+            span['throttled_ms'] = round(span.get('throttled_ms', 0) + waited * 1000, 3)
+
+    def backoff_delay(self, attempt: int, retry_after: float = None) -> float:
+        """Backoff exponencial com jitter completo; o Retry-After do servidor é o piso."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def wait_before_retry(self, attempt: int, exc=None, span: dict = None):
+        """Dorme o backoff da tentativa `attempt` (1 = primeira retentativa)."""
+        delay = self.backoff_delay(attempt, retry_after_of(exc) if exc is not None else None)
+        self._count('retries')
+        self._count('backoff_seconds', delay)
+        if span is not None:
+            span['retries'] = span.get('retries', 0) + 1
+            span['throttled_ms'] = round(span.get('throttled_ms', 0) + delay * 1000, 3)
+        time.sleep(delay)
+
+    def record_failure(self):
+        """Registra uma falha do backend: conta nas estatísticas e no disjuntor."""
+        self.breaker.record_failure()
+        self._count('failures')
+
+    def call(self, fn, span: dict = None, retry_on=is_retryable):
+        """Executa `fn()` respeitando o limite, com retentativas para os erros aceitos por `retry_on`."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(span)
+            try:
+                result = fn()
+            except Exception as e:
+                if not retry_on(e):
+                    # Erro da própria requisição (ex.: 400): não diz nada sobre a saúde do backend
+                    self.breaker.record_success()
+                    raise
+                self.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                self.wait_before_retry(attempt + 1, e, span)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+        stats['throttled_seconds'] = round(stats['throttled_seconds'], 3)
+        stats['backoff_seconds'] = round(stats['backoff_seconds'], 3)
+        stats['circuit'] = self.breaker.state
+        stats['circuit_opens'] = self.breaker.opens
+        return stats
+
+
+def _backend_from_env(name: str, rate: float, burst: int, max_retries: int) -> Backend:
+    prefix = name.upper()
+    return Backend(
+        name,
+        rate=float(os.getenv(f'{prefix}_RATE_PER_SECOND', str(rate))),
+        burst=int(os.getenv(f'{prefix}_BURST', str(burst))),
+        max_retries=int(os.getenv(f'{prefix}_MAX_RETRIES', str(max_retries))),
+    )
+
+
+# Google Sheets: 60 requisições de leitura/escrita por minuto por usuário
+sheets_limiter = _backend_from_env('sheets', rate=1.0, burst=10, max_retries=5)
+serper_limiter = _backend_from_env('serper', rate=5.0, burst=10, max_retries=3)
+llm_limiter = _backend_from_env('llm', rate=1.0, burst=4, max_retries=2)
+backends = {b.name: b for b in (sheets_limiter, serper_limiter, llm_limiter)}
+
+
+def limiter_stats() -> dict:
+    return {name: backend.stats() for name, backend in backends.items()}
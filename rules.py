@@ -0,0 +1,85 @@
+"""Regras de país e setor usadas para validar startups.
+
+As listas são compiladas uma única vez, na importação, em expressões
+regulares com limite de palavra (sem acento e sem diferenciar maiúsculas).
+Assim 'us' não casa com 'Honduras' ou 'Belarus', e validar a planilha inteira
+é uma única passada pelas linhas.
+"""
+import re
+import unicodedata
+
+lista_paises_latam = ["Brasil", "Brazil", "México", "Mexico", "Argentina", "Colômbia", "Colombia", "Chile", "Peru", "Perú", "Bolívia", "Bolivia", "Equador", "Ecuador", "Guiana", "Guyana", "Paraguai", "Paraguay", "Suriname", "Uruguai", "Uruguay", "Venezuela", "Belize", "Costa Rica", "El Salvador", "Guatemala", "Honduras", "Nicarágua", "Nicaragua", "Panamá", "Panama", "Cuba", "Haiti", "República Dominicana", "Dominican Republic"]
+
+paises_rejeitados = ['estados unidos', 'eua', 'usa', 'us', 'u.s.', 'u.s.a.', 'united states', 'silicon valley']
+
+# Lista de setores rejeitados (empresas de investimento, não startups)
+setores_rejeitados_global = [
+    'venture capital', 'vc', 'venture builder', 'investment', 'investor', 'fund', 'capital',
+    'private equity', 'asset management', 'investment management', 'investment fund',
+    'venture fund', 'growth capital', 'seed fund', 'accelerator fund', 'incubator fund',
+    'investment company', 'investment firm', 'capital management', 'wealth management',
+    'investment banking', 'merchant banking', 'development finance', 'investment vehicle'
+]
+
+# Motivos de rejeição
+PAIS_EUA = 'pais_eua'
+PAIS_FORA_LATAM = 'pais_fora_latam'
+SETOR_INVESTIMENTO = 'setor_investimento'
+
+
+def fold_text(text) -> str:
+    """Remove acentos e normaliza a caixa."""
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    return ''.join(c for c in text if not unicodedata.combining(c)).casefold().strip()
+
+
+def _compile_terms(terms, plural=False):
+    """Uma regex com todos os termos (os mais longos primeiro), respeitando limite de palavra."""
+    folded = sorted({fold_text(t) for t in terms}, key=len, reverse=True)
+    alternation = '|'.join(re.escape(t) for t in folded)
+    suffix = 's?' if plural else ''
+    return re.compile(rf'(?<!\w)(?:{alternation}){suffix}(?!\w)')
+
+
+_RE_PAIS_REJEITADO = _compile_terms(paises_rejeitados)
+_RE_PAIS_LATAM = _compile_terms(lista_paises_latam)
+_RE_SETOR_REJEITADO = _compile_terms(setores_rejeitados_global, plural=True)
+
+
+def match_rejected_country(text):
+    match = _RE_PAIS_REJEITADO.search(fold_text(text))
+    return match.group(0) if match else None
+
+
+def match_latam_country(text):
+    match = _RE_PAIS_LATAM.search(fold_text(text))
+    return match.group(0) if match else None
+
+
+def match_rejected_sector(text):
+    match = _RE_SETOR_REJEITADO.search(fold_text(text))
+    return match.group(0) if match else None
+
+
+def classify(pais, setor, check_latam: bool = True) -> list:
+    """Lista de motivos de rejeição para um país/setor (vazia se a startup é válida).
+
+    Cada motivo é um dict {'regra', 'campo', 'termo', 'valor'}. Com
+    check_latam=False um país fora da lista da América Latina não é motivo
+    de rejeição (só EUA e setor de investimento).
+    """
+    reasons = []
+    termo = match_rejected_country(pais)
+    if termo:
+        reasons.append({'regra': PAIS_EUA, 'campo': 'País', 'termo': termo, 'valor': pais})
+    elif check_latam and fold_text(pais) and not match_latam_country(pais):
+        reasons.append({'regra': PAIS_FORA_LATAM, 'campo': 'País', 'termo': None, 'valor': pais})
+    termo = match_rejected_sector(setor)
+    if termo:
+        reasons.append({'regra': SETOR_INVESTIMENTO, 'campo': 'Setor de Atuação', 'termo': termo, 'valor': setor})
+    return reasons
+
+
+def classify_rows(rows, check_latam: bool = True) -> list:
+    """Classifica um lote de linhas da planilha em uma passada: [(linha, motivos), ...]."""
+    return [(row, classify(row.get('País', ''), row.get('Setor de Atuação', ''), check_latam)) for row in rows]
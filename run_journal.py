@@ -0,0 +1,102 @@
+"""Diário de execuções do main.py, para retomar uma execução interrompida.
+
+Cada execução tem um arquivo JSONL em RUNS_DIR com um evento por linha
+(limpeza, prospecção, qualificação, output bruto de cada task de análise,
+JSON mesclado de cada startup e fim). Ao retomar, os eventos são relidos e
+as etapas já registradas não são executadas de novo.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+RUNS_DIR = os.getenv('RUNS_DIR', 'runs')
+
+
+class RunJournal:
+    """Registro append-only dos resultados de cada etapa de uma execução."""
+
+    def __init__(self, run_id: str, directory: str = RUNS_DIR):
+        self.run_id = run_id
+        self.path = os.path.join(directory, f'{run_id}.jsonl')
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.cleanup_done = False
+        self.finished = False
+        self.prospected = {}  # tentativa -> nomes brutos
+        self.prospect_shards = {}  # tentativa -> chave do shard prospectado
+        self.qualified = {}   # tentativa -> nomes aprovados
+        self.analysis = {}    # startup -> {task: outputs}
+        self.merged = {}      # startup -> {'dados': dict | None, 'resultado': str}
+        self._needs_newline = False
+        if os.path.exists(self.path):
+            self._replay()
+
+    @classmethod
+    def new(cls, directory: str = RUNS_DIR):
+        return cls(datetime.now().strftime('%Y%m%d-%H%M%S'), directory)
+
+    @classmethod
+    def latest_unfinished(cls, directory: str = RUNS_DIR):
+        """A execução mais recente que não chegou ao fim (ou None)."""
+        if not os.path.isdir(directory):
+            return None
+        for filename in sorted(os.listdir(directory), reverse=True):
+            if filename.endswith('.jsonl'):
+                journal = cls(filename[:-len('.jsonl')], directory)
+                if not journal.finished:
+                    return journal
+        return None
+
+    def _replay(self):
+        line = ''
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError):
+                    # Última linha pode ter ficado pela metade se o processo morreu escrevendo
+                    continue
+        # Se a última linha ficou incompleta, o próximo evento começa em uma linha nova
+        self._needs_newline = bool(line) and not line.endswith('\n')
+
+    def _apply(self, entry: dict):
+        event = entry['evento']
+        if event == 'limpeza':
+            self.cleanup_done = True
+        elif event == 'prospeccao':
+            self.prospected[entry['tentativa']] = entry['nomes']
+            if entry.get('shard'):
+                self.prospect_shards[entry['tentativa']] = entry['shard']
+        elif event == 'qualificacao':
+            self.qualified[entry['tentativa']] = entry['aprovados']
+        elif event == 'analise_task':
+            self.analysis.setdefault(entry['startup'], {})[entry['task']] = entry['outputs']
+        elif event == 'merge':
+            self.merged[entry['startup']] = {'dados': entry['dados'], 'resultado': entry['resultado']}
+        elif event == 'fim':
+            self.finished = True
+
+    def record(self, event: str, **data):
+        """Grava um evento (fsync) e atualiza o estado em memória."""
+        entry = {'evento': event, 'ts': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), **data}
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                if self._needs_newline:
+                    f.write('\n')
+                    self._needs_newline = False
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(entry)
+
+    def summary(self) -> dict:
+        return {
+            'run_id': self.run_id,
+            'limpeza': self.cleanup_done,
+            'tentativas_prospectadas': len(self.prospected),
+            'tentativas_qualificadas': len(self.qualified),
+            'startups_com_analise': len(self.analysis),
+            'startups_mescladas': len(self.merged),
+            'finalizado': self.finished,
+        }
@@ -0,0 +1,173 @@
+"""Cache persistente (SQLite) para os resultados das ferramentas de busca do main.py.
+
+Cada busca é identificada pelo hash da ferramenta + argumentos normalizados.
+As entradas expiram por TTL e, acima do limite de tamanho, as menos usadas
+recentemente são descartadas (LRU). Com SEARCH_CACHE_OFFLINE=1 nenhuma busca
+nova é feita: só o que já está em cache é respondido (replay offline).
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from crewai_tools import SerperDevTool, WebsiteSearchTool
+
+from lazy import Lazy
+from tracing import tracer
+from rate_limit import serper_limiter
+
+SEARCH_CACHE_PATH = os.getenv('SEARCH_CACHE_PATH', 'search_cache.db')
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv('SEARCH_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', '20000'))
+SEARCH_CACHE_OFFLINE = os.getenv('SEARCH_CACHE_OFFLINE', '').lower() in ('1', 'true', 'sim')
+
+OFFLINE_MISS_MESSAGE = "[cache offline] Nenhum resultado em cache para esta busca."
+
+
+def _normalize_args(args: dict) -> dict:
+    """Normaliza espaços (e caixa da consulta) para que buscas equivalentes tenham a mesma chave."""
+    normalized = {}
+    for key, value in args.items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = re.sub(r'\s+', ' ', value).strip()
+            if key == 'search_query':
+                value = value.casefold()
+        normalized[key] = value
+    return normalized
+
+
+class SearchCache:
+    """Armazena resultados de busca em SQLite com TTL por entrada e despejo LRU."""
+
+    def __init__(self, path: str, ttl: float, max_entries: int, offline: bool = False):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS search_cache ('
+            ' key TEXT PRIMARY KEY, tool TEXT NOT NULL, args TEXT NOT NULL, value TEXT NOT NULL,'
+            ' created_at REAL NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL,'
+            ' hits INTEGER NOT NULL DEFAULT 0)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_search_cache_last_access ON search_cache (last_access)')
+        self._conn.commit()
+        self._entries = self._conn.execute('SELECT COUNT(*) FROM search_cache').fetchone()[0]
+        self.counters = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'stores': 0, 'offline_misses': 0}
+
+    @staticmethod
+    def make_key(tool: str, args: dict) -> str:
+        payload = json.dumps({'tool': tool, 'args': args}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        """Retorna (encontrado, valor)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT value, expires_at FROM search_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.counters['misses'] += 1
+                return False, None
+            value, expires_at = row
+            if expires_at < now:
+                self._conn.execute('DELETE FROM search_cache WHERE key = ?', (key,))
+                self._conn.commit()
+                self._entries -= 1
+                self.counters['expired'] += 1
+                self.counters['misses'] += 1
+                return False, None
+            self._conn.execute('UPDATE search_cache SET last_access = ?, hits = hits + 1 WHERE key = ?', (now, key))
+            self._conn.commit()
+            self.counters['hits'] += 1
+        return True, json.loads(value)
+
+    def set(self, key: str, tool: str, args: dict, value, ttl: float = None):
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        encoded = json.dumps(value, ensure_ascii=False, default=str)
+        with self._lock:
+            exists = self._conn.execute('SELECT 1 FROM search_cache WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO search_cache (key, tool, args, value, created_at, expires_at, last_access, hits)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, 0)',
+                (key, tool, json.dumps(args, ensure_ascii=False, default=str), encoded, now, now + ttl, now),
+            )
+            if not exists:
+                self._entries += 1
+            self.counters['stores'] += 1
+            overflow = self._entries - self.max_entries
+            if overflow > 0:
+                # Remove primeiro as entradas expiradas, depois as menos usadas recentemente
+                self._conn.execute('DELETE FROM search_cache WHERE expires_at < ?', (now,))
+                self._entries = self._conn.execute('SELECT COUNT(*) FROM search_cache').fetchone()[0]
+                overflow = self._entries - self.max_entries
+                if overflow > 0:
+                    self._conn.execute(
+                        'DELETE FROM search_cache WHERE key IN '
+                        '(SELECT key FROM search_cache ORDER BY last_access ASC LIMIT ?)', (overflow,))
+                    self._entries -= overflow
+                    self.counters['evictions'] += overflow
+            self._conn.commit()
+
+    def get_or_compute(self, tool: str, args: dict, compute, ttl: float = None, limiter=None):
+        """Responde do cache ou executa `compute()` (pelo `limiter`, se houver) e guarda o resultado."""
+        args = _normalize_args(args)
+        key = self.make_key(tool, args)
+        with tracer.span('search', tool) as span:
+            found, value = self.get(key)
+            span['cache_hit'] = found
+            if found:
+                return value
+            if self.offline:
+                self.counters['offline_misses'] += 1
+                return OFFLINE_MISS_MESSAGE
+            value = limiter.call(compute, span=span) if limiter else compute()
+            if value:
+                self.set(key, tool, args, value, ttl)
+            return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+            stats['entries'] = self._entries
+            return stats
+
+
+# O arquivo só é aberto (e criado) na primeira busca, não na importação
+_search_cache = Lazy('search_cache', lambda: SearchCache(SEARCH_CACHE_PATH, SEARCH_CACHE_TTL_SECONDS,
+                                                         SEARCH_CACHE_MAX_ENTRIES, offline=SEARCH_CACHE_OFFLINE))
+
+
+def get_search_cache() -> SearchCache:
+    return _search_cache.get()
+
+
+class CachedSerperDevTool(SerperDevTool):
+    """SerperDevTool que consulta o cache antes de chamar a API."""
+
+    def _run(self, **kwargs):
+        # A configuração da ferramenta também muda o resultado, então entra na chave
+        args = dict(kwargs, search_type=self.search_type, n_results=self.n_results,
+                    country=self.country, location=self.location, locale=self.locale)
+        return get_search_cache().get_or_compute(
+            self.name, args, lambda: super(CachedSerperDevTool, self)._run(**kwargs), limiter=serper_limiter)
+
+
+class CachedWebsiteSearchTool(WebsiteSearchTool):
+    """WebsiteSearchTool que consulta o cache antes de buscar no site."""
+
+    def _run(self, search_query: str, website: str = None, **kwargs):
+        args = dict(kwargs, search_query=search_query, website=website)
+        return get_search_cache().get_or_compute(
+            self.name, args,
+            lambda: super(CachedWebsiteSearchTool, self)._run(search_query, website, **kwargs))
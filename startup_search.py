@@ -0,0 +1,327 @@
+"""Busca local na base de startups, usada pelo chat antes de recorrer à Serper.
+
+Um índice invertido (BM25) cobre os campos de texto das startups e, à parte,
+os valores de setor, país, status e investidor viram filtros: em "quais
+fintechs no México levantaram Seed?" as palavras 'fintech', 'méxico' e
+'seed' são reconhecidas como valores desses campos. O índice é atualizado
+por linha (só as startups novas, alteradas ou removidas mexem nas listas
+invertidas). answer() só responde quando a pergunta é sobre a base (pede uma
+lista ou contagem, cita valores de filtro ou o nome de uma startup) e a
+confiança é alta; caso contrário devolve None e o chat segue para a busca na
+web ('o que é bitcoin?' não vira uma lista de startups).
+"""
+import math
+import re
+import threading
+from collections import Counter
+
+from rules import fold_text
+
+# Campo da resposta -> coluna; os valores desses campos podem ser citados na pergunta como filtros
+FILTER_FIELDS = {
+    'setor': 'Setor de Atuação',
+    'pais': 'País',
+    'status': 'Status de financiamento',
+    'investidor': 'Nome do Investidor (VC)',
+}
+# Colunas indexadas no BM25 e o peso de cada uma (repetição dos termos)
+TEXT_FIELDS = {
+    'Nome da Startup': 3,
+    'Setor de Atuação': 2,
+    'País': 1,
+    'Status de financiamento': 1,
+    'Nome do Investidor (VC)': 1,
+    'Tecnologias Utilizadas': 1,
+    'Base de Clientes': 1,
+    'Principais Concorrentes': 1,
+    'Dinâmica do Setor': 1,
+    'Previsões de Mercado': 1,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_LISTED = 10  # startups citadas na resposta (o total vem à parte)
+SNIPPET_CHARS = 160
+
+# Palavras sem valor de busca (já sem acento e no singular, como saem de tokenize)
+STOPWORDS = frozenset('''
+a o as os de da do das dos e em no na nos nas um uma uns umas que qual quai quem como com para por pelo pela
+se ao aos ou mai meno muito sao foi ser tem ha entre sobre ja nao sim sua seu suas seus esta este isso isto
+the of in and for with which what who is are on to by an or from how many much list
+startup empresa companhia company base planilha levantaram levantou captaram captou rodada receberam recebeu
+investimento investida investidas financiamento usam utiliza utilizam atua atuam trabalha trabalham
+faz fazem oferece oferecem possui possuem sediada sediadas use uses using work
+'''.split())
+# Pedidos de listagem/contagem: com filtros reconhecidos, a resposta sai da base
+LIST_INTENT = frozenset('quai quanta quanto lista liste listar mostre mostrar existem exist which list many'.split())
+COUNT_INTENT = frozenset('quanta quanto many'.split())
+# Grafias em inglês dos países, para casar com os valores da planilha
+TOKEN_ALIASES = {'brazil': 'brasil', 'ecuador': 'equador', 'uruguay': 'uruguai', 'paraguay': 'paraguai',
+                 'guyana': 'guiana', 'mexican': 'mexico', 'brazilian': 'brasil'}
+# Valores que não servem de filtro
+IGNORED_VALUES = frozenset({'', 'n/a', 'na', 'nao encontrado', 'nao disponivel'})
+
+
+def tokenize(text) -> list:
+    """Tokens sem acento, em minúsculas e sem o 's' do plural ('Fintechs' -> 'fintech')."""
+    tokens = []
+    for token in re.findall(r'\w+', fold_text(text)):
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(TOKEN_ALIASES.get(token, token))
+    return tokens
+
+
+class StartupSearchIndex:
+    """Índice BM25 + filtros por valor, atualizado linha a linha a partir do snapshot."""
+
+    def __init__(self, text_fields=TEXT_FIELDS, filter_fields=FILTER_FIELDS):
+        self.text_fields = text_fields
+        self.filter_fields = filter_fields
+        self._lock = threading.RLock()
+        self._docs = {}        # chave -> registro (só as colunas indexadas + Site)
+        self._terms = {}       # chave -> Counter dos termos
+        self._lengths = {}     # chave -> número de termos (com pesos)
+        self._postings = {}    # termo -> {chave: frequência}
+        self._total_length = 0
+        self._values = {field: {} for field in filter_fields}  # campo -> tupla de tokens -> {chaves}
+        self._labels = {field: {} for field in filter_fields}  # campo -> tupla de tokens -> valor como na planilha
+        self._max_phrase = 1
+        self.stamps = {}       # chave -> data de atualização indexada
+        self.version = 0
+        self.stats = {'upserts': 0, 'removals': 0, 'queries': 0, 'local_answers': 0, 'fallbacks': 0}
+
+    @property
+    def size(self) -> int:
+        return len(self._docs)
+
+    # --- Atualização ---
+
+    def upsert(self, key: str, record: dict, stamp=None):
+        with self._lock:
+            self._remove(key)
+            terms = Counter()
+            for column, weight in self.text_fields.items():
+                for token in tokenize(record.get(column, '')):
+                    if token not in STOPWORDS:
+                        terms[token] += weight
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[key] = count
+            self._lengths[key] = sum(terms.values())
+            self._total_length += self._lengths[key]
+            self._terms[key] = terms
+            self._docs[key] = record
+            for field, column in self.filter_fields.items():
+                phrase = self._phrase(record.get(column, ''))
+                if phrase:
+                    self._values[field].setdefault(phrase, set()).add(key)
+                    self._labels[field].setdefault(phrase, str(record.get(column)).strip())
+                    self._max_phrase = max(self._max_phrase, len(phrase))
+            self.stamps[key] = stamp
+            self.stats['upserts'] += 1
+
+    def remove(self, key: str):
+        with self._lock:
+            if self._remove(key):
+                self.stats['removals'] += 1
+
+    def _remove(self, key: str) -> bool:
+        terms = self._terms.pop(key, None)
+        if terms is None:
+            return False
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(key)
+        record = self._docs.pop(key)
+        for field, column in self.filter_fields.items():
+            phrase = self._phrase(record.get(column, ''))
+            keys = self._values[field].get(phrase)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._values[field][phrase]
+                    del self._labels[field][phrase]
+        self.stamps.pop(key, None)
+        return True
+
+    @staticmethod
+    def _phrase(value):
+        if fold_text(value) in IGNORED_VALUES:
+            return None
+        phrase = tuple(tokenize(value))
+        # Valores feitos só de palavras vazias ('A', 'VC' em 'Série A' sozinho) não viram filtro
+        if not phrase or all(token in STOPWORDS or len(token) < 2 for token in phrase):
+            return None
+        return phrase
+
+    # --- Consulta ---
+
+    def match_filters(self, tokens: list) -> dict:
+        """Valores de setor/país/status/investidor citados na pergunta: {campo: {valor: chaves}}.
+
+        Frases mais longas têm prioridade ('pre seed' antes de 'seed'); cada
+        token da pergunta vale para um único valor.
+        """
+        matched = {}
+        used = set()
+        for size in range(min(self._max_phrase, len(tokens)), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                span = range(start, start + size)
+                if any(i in used for i in span):
+                    continue
+                phrase = tuple(tokens[start:start + size])
+                hits = [(field, values[phrase]) for field, values in self._values.items() if phrase in values]
+                if hits:
+                    used.update(span)
+                    for field, keys in hits:
+                        matched.setdefault(field, {})[self._labels[field][phrase]] = keys
+        return matched
+
+    def _bm25(self, terms, candidates=None):
+        n = len(self._docs)
+        average = self._total_length / n if n else 0.0
+        scores = Counter()
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, tf in postings.items():
+                if candidates is not None and key not in candidates:
+                    continue
+                length = self._lengths[key]
+                scores[key] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average))
+        return scores
+
+    def _idf(self, term) -> float:
+        n = len(self._docs)
+        df = len(self._postings.get(term, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, question: str, limit: int = MAX_LISTED) -> dict:
+        """Filtros reconhecidos, startups encontradas (chave, score) e a confiança da busca textual."""
+        with self._lock:
+            tokens = tokenize(question)
+            filters = self.match_filters(tokens)
+            filtered = None
+            for field, values in filters.items():
+                keys = set().union(*values.values())  # mesmo campo: qualquer um dos valores
+                filtered = keys if filtered is None else filtered & keys
+            filter_tokens = {token for values in filters.values() for value in values for token in tokenize(value)}
+            terms = [t for t in dict.fromkeys(tokens) if t not in STOPWORDS and t not in filter_tokens
+                     and t not in LIST_INTENT and len(t) > 1]
+            scores = self._bm25(terms, filtered)
+            if filtered is not None and not terms:
+                ranked = sorted(filtered)
+            else:
+                # Termos além dos filtros restringem o resultado às startups que também os mencionam
+                ranked = [key for key, _ in scores.most_common()]
+            # Cobertura: fração do peso (idf) dos termos da pergunta presente no melhor resultado
+            # (no documento inteiro e só no nome); margem: quanto o melhor score supera o segundo
+            coverage = name_coverage = margin = None
+            if terms and ranked:
+                top_terms = self._terms[ranked[0]]
+                name_terms = set(tokenize(self._docs[ranked[0]].get('Nome da Startup', '')))
+                total = sum(self._idf(t) for t in terms)
+                coverage = sum(self._idf(t) for t in terms if t in top_terms) / total if total else 0.0
+                name_coverage = sum(self._idf(t) for t in terms if t in name_terms) / total if total else 0.0
+                best = scores.get(ranked[0], 0.0)
+                runner_up = scores.get(ranked[1], 0.0) if len(ranked) > 1 else 0.0
+                margin = (best - runner_up) / best if best else 0.0
+            return {
+                'tokens': tokens,
+                'filters': {field: sorted(values) for field, values in filters.items()},
+                'terms': terms,
+                'total': len(ranked),
+                'results': [(key, round(scores.get(key, 0.0), 4)) for key in ranked[:limit]],
+                'coverage': coverage,
+                'name_coverage': name_coverage,
+                'margin': margin,
+            }
+
+    def answer(self, question: str, min_confidence: float) -> dict:
+        """Resposta montada da base ({answer, sources, matches, ...}) ou None se a confiança for baixa."""
+        with self._lock:
+            self.stats['queries'] += 1
+            if not self._docs:
+                self.stats['fallbacks'] += 1
+                return None
+            found = self.search(question)
+            tokens = set(found['tokens'])
+            list_intent = bool(tokens & LIST_INTENT)
+            confidence = None
+            if found['filters'] and list_intent and found['total']:
+                # Pedido de lista/contagem com valores de filtro: os termos restantes precisam estar no resultado
+                mode = 'filtros'
+                confidence = 1.0 if not found['terms'] else found['coverage']
+            elif not found['filters'] and found['total'] and list_intent:
+                # 'quais startups trabalham com blockchain?': lista pela busca textual
+                mode = 'texto'
+                confidence = found['coverage']
+            elif not found['filters'] and found['total']:
+                # Sem intenção de listar, só responde quando a pergunta cita o nome de uma startup e o
+                # melhor resultado se destaca do segundo; perguntas gerais seguem para a web
+                mode = 'texto'
+                confidence = found['name_coverage'] * (0.5 + 0.5 * found['margin'])
+            if confidence is None or confidence < min_confidence:
+                self.stats['fallbacks'] += 1
+                return None
+            records = [(key, self._docs[key]) for key, _ in found['results']]
+            self.stats['local_answers'] += 1
+        return {
+            'answer': self._format(found, records, mode, bool(tokens & COUNT_INTENT)),
+            'sources': [{'title': record.get('Nome da Startup', key), 'link': record['Site']}
+                        for key, record in records if str(record.get('Site', '')).startswith('http')],
+            'matches': [{'nome': record.get('Nome da Startup', key), 'score': score,
+                         **{field: record.get(column, '') for field, column in self.filter_fields.items()}}
+                        for (key, record), (_, score) in zip(records, found['results'])],
+            'filters': found['filters'],
+            'total': found['total'],
+            'confidence': round(confidence, 3),
+            'mode': mode,
+        }
+
+    def _format(self, found, records, mode, count_intent) -> str:
+        total = found['total']
+        if mode == 'filtros':
+            criteria = ', '.join(value for values in found['filters'].values() for value in values)
+            head = (f"Há {total} startup(s) na base com {criteria}" if count_intent
+                    else f"Encontrei {total} startup(s) na base com {criteria}")
+        else:
+            head = "Na base de startups, os resultados mais relevantes são"
+        items = []
+        for key, record in records:
+            details = ', '.join(str(record.get(column)) for column in
+                                ('Setor de Atuação', 'País', 'Status de financiamento', 'Nome do Investidor (VC)')
+                                if record.get(column) and fold_text(record.get(column)) not in IGNORED_VALUES)
+            item = f"{record.get('Nome da Startup', key)} ({details})" if details else record.get('Nome da Startup', key)
+            if mode == 'texto':
+                snippet = self._snippet(record, set(found['terms']))
+                if snippet:
+                    item += f" — {snippet}"
+            items.append(item)
+        text = f"{head}: " + '; '.join(items)
+        if total > len(records):
+            text += f"; e mais {total - len(records)}"
+        return text + '.'
+
+    def _snippet(self, record, terms) -> str:
+        """Trecho do campo de texto longo com mais termos da pergunta."""
+        best, best_hits = '', 0
+        for column in self.text_fields:
+            if column in self.filter_fields.values() or column == 'Nome da Startup':
+                continue
+            value = str(record.get(column) or '')
+            hits = len(terms & set(tokenize(value)))
+            if hits > best_hits:
+                best, best_hits = value, hits
+        best = re.sub(r'\s+', ' ', best).strip()
+        return best if len(best) <= SNIPPET_CHARS else best[:SNIPPET_CHARS].rsplit(' ', 1)[0] + '…'
+
+    def snapshot_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({'documents': len(self._docs), 'terms': len(self._postings), 'version': self.version})
+            return stats
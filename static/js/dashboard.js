@@ -23,30 +23,112 @@ function updateDateTime() {
     
     const dateTimeString = now.toLocaleDateString('pt-BR', options);
     document.getElementById('current-datetime').textContent = dateTimeString;
+
+    // O texto relativo da última atualização muda com o tempo, mesmo sem dados novos
+    if (dashboardStatistics) {
+        updateStatistics(dashboardStatistics);
+    }
 }
 
-async function loadDashboardData() {
-    try {
-        // Carregar estatísticas (com cache-busting)
-        const statsResponse = await fetch(`/api/statistics?t=${Date.now()}`);
-        const stats = await statsResponse.json();
-        updateStatistics(stats);
+// Linhas exibidas por vez na tabela (os dados ficam todos no cliente)
+const STARTUPS_PAGE_SIZE = 100;
+let renderedStartups = STARTUPS_PAGE_SIZE;
 
-        // Carregar dados das startups (com cache-busting)
-        const startupsResponse = await fetch(`/api/startups?t=${Date.now()}`);
-        const startups = await startupsResponse.json();
-        updateStartupsTable(startups);
+// Estado local do dashboard: versão dos dados, estatísticas e linhas por chave
+let dashboardVersion = null;
+let dashboardStatistics = null;
+let dashboardRows = new Map();
+let dashboardStream = null;
+let dashboardPolling = null;
+const DASHBOARD_POLL_MS = 60000; // sem vaga no stream: revalida o payload (ETag) a cada minuto
 
+async function loadDashboardData() {
+    try {
+        // Um único payload (comprimido) com estatísticas e tabela; 'no-cache' revalida com ETag
+        const response = await fetch('/api/dashboard', { cache: 'no-cache' });
+        const payload = await response.json();
+        dashboardVersion = payload.version;
+        dashboardStatistics = payload.statistics;
+        dashboardRows = new Map(payload.startups.map(startup => [startup.key, startup]));
+        renderedStartups = STARTUPS_PAGE_SIZE;
+        updateStatistics(dashboardStatistics);
+        renderStartups();
+        connectDashboardStream();
     } catch (error) {
         console.error('Erro ao carregar dados:', error);
         showError('Erro ao carregar dados do dashboard');
     }
 }
 
+function connectDashboardStream() {
+    if (dashboardStream || !window.EventSource) {
+        return;
+    }
+    // O servidor só envia algo quando os dados mudam; ao reconectar o navegador manda o Last-Event-ID
+    dashboardStream = new EventSource(`/api/dashboard/stream?since=${encodeURIComponent(dashboardVersion ?? '')}`);
+    dashboardStream.addEventListener('delta', event => applyDashboardDelta(JSON.parse(event.data)));
+    dashboardStream.addEventListener('reset', () => loadDashboardData());
+    dashboardStream.onopen = () => {
+        if (dashboardPolling) {
+            clearInterval(dashboardPolling);
+            dashboardPolling = null;
+        }
+    };
+    dashboardStream.onerror = () => {
+        // Erros de rede reconectam sozinhos; um 503 (limite de streams no servidor) fecha o EventSource
+        if (dashboardStream.readyState !== EventSource.CLOSED) {
+            return;
+        }
+        dashboardStream = null;
+        if (!dashboardPolling) {
+            // Cada recarga tenta o stream de novo e volta a ele quando houver vaga
+            dashboardPolling = setInterval(loadDashboardData, DASHBOARD_POLL_MS);
+        }
+    };
+}
+
+function applyDashboardDelta(delta) {
+    if (delta.base_version !== dashboardVersion) {
+        loadDashboardData();
+        return;
+    }
+    delta.removed.forEach(key => dashboardRows.delete(key));
+    delta.upserted.forEach(startup => dashboardRows.set(startup.key, startup));
+    dashboardVersion = delta.version;
+    dashboardStatistics = delta.statistics;
+    updateStatistics(dashboardStatistics);
+    renderStartups();
+}
+
+function renderStartups() {
+    const startups = Array.from(dashboardRows.values());
+    updateStartupsTable(startups.slice(0, renderedStartups), false);
+    updateLoadMoreButton(renderedStartups < startups.length);
+}
+
+function updateLoadMoreButton(hasMore) {
+    let button = document.getElementById('load-more-startups');
+    if (!hasMore) {
+        if (button) button.remove();
+        return;
+    }
+    if (!button) {
+        button = document.createElement('button');
+        button.id = 'load-more-startups';
+        button.className = 'action-btn small';
+        button.textContent = 'Carregar mais';
+        button.addEventListener('click', () => {
+            renderedStartups += STARTUPS_PAGE_SIZE;
+            renderStartups();
+        });
+        document.querySelector('.table-container').appendChild(button);
+    }
+}
+
 function updateStatistics(stats) {
     // Atualizar total de startups
     document.getElementById('total-startups').textContent = stats.total_startups;
-    // document.getElementById('last-update').textContent = `Última atualização ${stats.last_update}`;
+    document.getElementById('last-update').textContent = `Última atualização ${formatRelativeTime(stats.last_update_at)}`;
 
     // Atualizar top setores
     const sectorsContainer = document.getElementById('top-sectors');
@@ -79,9 +161,24 @@ function updateStatistics(stats) {
     });
 }
 
-function updateStartupsTable(startups) {
+// 'AAAA-MM-DD HH:MM:SS' -> 'há X min' / 'há X h' / 'há X dias' (mesmo texto do servidor)
+function formatRelativeTime(timestamp) {
+    if (!timestamp) {
+        return 'N/A';
+    }
+    const seconds = (Date.now() - new Date(timestamp.replace(' ', 'T')).getTime()) / 1000;
+    if (seconds < 60) return 'agora mesmo';
+    if (seconds < 3600) return `há ${Math.floor(seconds / 60)} min`;
+    if (seconds < 86400) return `há ${Math.floor(seconds / 3600)} h`;
+    const days = Math.floor(seconds / 86400);
+    return days === 1 ? 'há 1 dia' : `há ${days} dias`;
+}
+
+function updateStartupsTable(startups, append = false) {
     const tbody = document.getElementById('startups-table-body');
-    tbody.innerHTML = '';
+    if (!append) {
+        tbody.innerHTML = '';
+    }
 
     startups.forEach(startup => {
         const row = document.createElement('tr');
@@ -181,7 +278,9 @@ function showError(message) {
     }, 5000);
 }
 
-// Função para atualizar dados periodicamente
-setInterval(() => {
-    loadDashboardData();
-}, 300000); // Atualiza a cada 5 minutos
+// Sem suporte a Server-Sent Events: volta a atualizar periodicamente
+if (!window.EventSource) {
+    setInterval(() => {
+        loadDashboardData();
+    }, 300000); // Atualiza a cada 5 minutos
+}
@@ -30,7 +30,7 @@ document.addEventListener('DOMContentLoaded', function(){
             const resp = await fetch('/api/chat', {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({message: text})
+                body: JSON.stringify({message: text, include_raw: false})
             });
             const data = await resp.json();
             messagesContainer.removeChild(loading);
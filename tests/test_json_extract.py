@@ -0,0 +1,79 @@
+from json_extract import best_json_object, extract_json_objects, missing_keys
+
+
+def test_plain_object():
+    assert extract_json_objects('{"a": 1}') == [{'a': 1}]
+
+
+def test_object_surrounded_by_text_and_fences():
+    raw = 'Segue o resultado:\n```json\n{"Nome": "Pagaí", "País": "México"}\n```\nQualquer dúvida, avise.'
+    assert extract_json_objects(raw) == [{'Nome': 'Pagaí', 'País': 'México'}]
+
+
+def test_nested_braces_count_as_one_object():
+    raw = 'x {"a": {"b": {"c": 1}}, "d": [ {"e": 2} ]} y'
+    assert extract_json_objects(raw) == [{'a': {'b': {'c': 1}}, 'd': [{'e': 2}]}]
+
+
+def test_braces_inside_strings_are_ignored():
+    raw = 'nota {"texto": "use { e } à vontade", "aspas": "ele disse \\"}\\""} fim'
+    assert extract_json_objects(raw) == [{'texto': 'use { e } à vontade', 'aspas': 'ele disse "}"'}]
+
+
+def test_several_top_level_objects_in_order():
+    raw = 'Exemplo: {"a": 1} Resposta: {"a": 2, "b": 3}'
+    assert extract_json_objects(raw) == [{'a': 1}, {'a': 2, 'b': 3}]
+
+
+def test_stray_brace_before_real_object():
+    raw = 'Veja { o objeto: {"a": 1}'
+    assert extract_json_objects(raw) == [{'a': 1}]
+
+
+def test_truncated_object_is_closed():
+    raw = 'Resultado: {"Nome": "Pagaí", "Fontes": ["https://a.com", "https://b'
+    assert extract_json_objects(raw) == [{'Nome': 'Pagaí', 'Fontes': ['https://a.com', 'https://b']}]
+
+
+def test_truncated_after_key():
+    assert extract_json_objects('{"a": 1, "b": {"c": 2,') == [{'a': 1, 'b': {'c': 2}}]
+
+
+def test_repairs_trailing_comma_smart_quotes_and_python_literals():
+    raw = '{“a”: True, "b": None, "c": [1, 2,],}'
+    assert extract_json_objects(raw) == [{'a': True, 'b': None, 'c': [1, 2]}]
+
+
+def test_non_text_inputs():
+    assert extract_json_objects({'a': 1}) == [{'a': 1}]
+    assert extract_json_objects(None) == []
+    assert extract_json_objects('   ') == []
+    assert extract_json_objects('sem json aqui') == []
+
+
+def test_best_json_object_merges_relevant_objects():
+    raw = '{"exemplo": true} {"Nome": "Pagaí", "CAC": ""} {"CAC": "US$ 10", "Nome": ""}'
+    assert best_json_object(raw, ['Nome', 'CAC']) == {'Nome': 'Pagaí', 'CAC': 'US$ 10'}
+
+
+def test_missing_keys():
+    assert missing_keys({'Nome': '', 'CAC': 'x'}, ['Nome', 'CAC', 'Churn']) == ['Churn']
+
+
+def test_python_literals_inside_strings_are_kept():
+    raw = '{"frase": "True story, None left", "ok": True,}'
+    assert extract_json_objects(raw) == [{'frase': 'True story, None left', 'ok': True}]
+
+
+def test_unbalanced_braces_do_not_recurse():
+    # Milhares de '{' soltas: antes estourava a recursão
+    assert extract_json_objects('{' * 3000) == []
+    assert extract_json_objects('{ ' * 900 + '{"a": 1}') == [{'a': 1}]
+
+
+def test_unbalanced_braces_are_linear_enough():
+    import time
+
+    start = time.perf_counter()
+    extract_json_objects('{ ' * 20000)
+    assert time.perf_counter() - start < 1.0
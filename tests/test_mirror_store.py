@@ -0,0 +1,151 @@
+import pytest
+
+from bench.fakes import FakeWorksheet
+from mirror_store import REQUIRED_ORDER, SHEET_COLUMNS, MirrorStore
+
+
+def make_row(name, stamp, **fields):
+    row = {header: '' for header in REQUIRED_ORDER}
+    row.update({'Nome da Startup': name, 'País': 'Brasil', 'Setor de Atuação': 'Fintech'}, **fields)
+    return [row[header] for header in REQUIRED_ORDER] + [stamp]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MirrorStore(str(tmp_path / 'mirror.db'))
+
+
+def sheet_records(worksheet):
+    values = worksheet.get_all_values()
+    return [dict(zip(SHEET_COLUMNS, row + [''] * (len(SHEET_COLUMNS) - len(row)))) for row in values[1:]]
+
+
+def assert_mirrors(store, worksheet):
+    assert store.all_records() == sheet_records(worksheet)
+
+
+def test_first_sync_fetches_everything(store):
+    sheet = FakeWorksheet([make_row('Alfa', '2026-01-01 10:00:00'), make_row('Beta', '2026-01-02 10:00:00')])
+    report = store.sync(sheet)
+    assert (report['mode'], report['fetched'], report['removed']) == ('delta', 2, 0)
+    assert_mirrors(store, sheet)
+
+
+def test_unchanged_sheet_costs_one_call(store):
+    sheet = FakeWorksheet([make_row('Alfa', '2026-01-01 10:00:00'), make_row('Beta', '2026-01-02 10:00:00')])
+    store.sync(sheet)
+    report = store.sync(sheet)
+    assert (report['fetched'], report['moved'], report['unchanged'], report['api_calls']) == (0, 0, 2, 1)
+
+
+def test_changed_stamp_refetches_only_that_row(store):
+    rows = [make_row('Alfa', '2026-01-01 10:00:00'), make_row('Beta', '2026-01-02 10:00:00')]
+    sheet = FakeWorksheet(rows)
+    store.sync(sheet)
+    rows[1] = make_row('Beta', '2026-02-01 10:00:00', **{'País': 'Chile'})
+    sheet.load(rows)
+    report = store.sync(sheet)
+    assert (report['fetched'], report['unchanged']) == (1, 1)
+    assert store.find('Nome da Startup', 'Beta')[0]['País'] == 'Chile'
+
+
+def test_deleted_row_is_removed_and_rows_below_move(store):
+    rows = [make_row(name, f'2026-01-0{i + 1} 10:00:00') for i, name in enumerate(['Alfa', 'Beta', 'Gama'])]
+    sheet = FakeWorksheet(rows)
+    store.sync(sheet)
+    sheet.load([rows[0], rows[2]])
+    report = store.sync(sheet)
+    assert (report['fetched'], report['moved'], report['removed']) == (0, 1, 1)
+    assert store.row_index() == {'Alfa': 2, 'Gama': 3}
+    assert_mirrors(store, sheet)
+
+
+def test_duplicate_names_are_kept_apart(store):
+    first = make_row('Acme', '2026-01-01 10:00:00', **{'País': 'México'})
+    second = make_row('Acme', '2026-01-02 10:00:00', **{'País': 'Peru'})
+    sheet = FakeWorksheet([first, make_row('Beta', '2026-01-03 10:00:00'), second])
+    store.sync(sheet)
+    assert [r['País'] for r in store.find('Nome da Startup', 'Acme')] == ['México', 'Peru']
+    assert set(store.row_stamps()) == {'Acme', 'Acme#2', 'Beta'}
+    # Como o worksheet.find(), o índice aponta para a primeira ocorrência
+    assert store.row_index()['Acme'] == 2
+
+    second = make_row('Acme', '2026-02-01 10:00:00', **{'País': 'Chile'})
+    sheet.load([first, make_row('Beta', '2026-01-03 10:00:00'), second])
+    report = store.sync(sheet)
+    assert report['fetched'] == 1
+    assert_mirrors(store, sheet)
+
+
+def test_deleting_first_duplicate_keeps_the_second(store):
+    first = make_row('Acme', '2026-01-01 10:00:00', **{'País': 'México'})
+    second = make_row('Acme', '2026-01-02 10:00:00', **{'País': 'Peru'})
+    sheet = FakeWorksheet([first, second])
+    store.sync(sheet)
+    sheet.load([second])
+    report = store.sync(sheet)
+    assert report['removed'] == 1
+    assert [r['País'] for r in store.find('Nome da Startup', 'Acme')] == ['Peru']
+    assert_mirrors(store, sheet)
+
+
+def test_blank_rows_are_skipped(store):
+    sheet = FakeWorksheet([make_row('Alfa', '2026-01-01 10:00:00'), [''] * len(SHEET_COLUMNS),
+                           make_row('Beta', '2026-01-02 10:00:00')])
+    store.sync(sheet)
+    assert store.row_index() == {'Alfa': 2, 'Beta': 4}
+
+
+def test_row_without_stamp_is_not_refetched(store):
+    rows = [make_row('Alfa', '')]
+    sheet = FakeWorksheet(rows)
+    store.sync(sheet)
+    sheet.load([make_row('Alfa', '', **{'País': 'Chile'})])
+    # Sem data de atualização não há como saber que mudou; a sincronização completa corrige
+    assert store.sync(sheet)['fetched'] == 0
+    store.sync(sheet, full=True)
+    assert_mirrors(store, sheet)
+
+
+def test_upsert_rows_writes_through(store):
+    sheet = FakeWorksheet([make_row('Alfa', '2026-01-01 10:00:00')])
+    store.sync(sheet)
+    store.upsert_rows([(2, make_row('Alfa', '2026-03-01 10:00:00', **{'País': 'Uruguai'})),
+                       (3, make_row('Beta', '2026-03-01 10:00:00'))])
+    assert store.row_index() == {'Alfa': 2, 'Beta': 3}
+    assert store.find('Nome da Startup', 'Alfa')[0]['País'] == 'Uruguai'
+
+
+def test_reads_do_not_wait_for_the_network(store):
+    import threading
+
+    class SlowSheet(FakeWorksheet):
+        def batch_get(self, ranges):
+            entered.set()
+            release.wait(5)
+            return super().batch_get(ranges)
+
+    entered, release = threading.Event(), threading.Event()
+    sheet = SlowSheet([make_row('Alfa', '2026-01-01 10:00:00')])
+    syncing = threading.Thread(target=store.sync, args=(sheet,))
+    syncing.start()
+    assert entered.wait(5)
+    # A sincronização está presa na rede: as leituras locais respondem mesmo assim
+    assert store.count() == 0
+    assert store.row_stamps() == {}
+    release.set()
+    syncing.join(5)
+    assert store.row_index() == {'Alfa': 2}
+
+
+def test_written_duplicates_use_sync_keys(store):
+    sheet = FakeWorksheet([make_row('Acme', '2026-01-01 10:00:00')])
+    store.sync(sheet)
+    duplicate = make_row('Acme', '2026-03-01 10:00:00', **{'País': 'Peru'})
+    response = sheet.append_rows([duplicate])
+    assert response['updates']['updatedRange'].endswith('A3:Z3')
+    store.upsert_rows([(3, duplicate)])
+    assert set(store.row_stamps()) == {'Acme', 'Acme#2'}
+    # A sincronização seguinte reconhece a linha escrita localmente: nada a baixar nem remover
+    report = store.sync(sheet)
+    assert (report['fetched'], report['removed'], report['unchanged']) == (0, 0, 2)
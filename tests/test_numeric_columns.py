@@ -0,0 +1,64 @@
+import math
+
+import pytest
+
+from numeric_columns import NumericColumns, parse_money, parse_number, parse_rate
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('5 billion dollars', 5e9),             # 'ars' dentro de 'dollars' não é peso argentino
+    ('1.5 billion in Europe', 1.5e9),       # 'eur' dentro de 'Europe' não é euro
+    ('3 billion (scope: LATAM)', 3e9),      # 'cop' dentro de 'scope' não é peso colombiano
+    ('5 years', 5.0),                       # 'ars' dentro de 'years'
+    ('2030: 5B', 5e9),                      # o ano não é o valor
+    ('$5B by 2030', 5e9),
+    ('US$ 1B', 1e9),
+    ('US$ 2000', 2000.0),                   # número de ano com moeda colada é valor
+    ('2000', 2000.0),                       # sozinho, continua valendo
+    ('1-2B', 1.5e9),
+    ('2,843.18', 2843.18),
+    ('10 mil dólares', 1e4),
+])
+def test_parse_money_usd(text, expected):
+    assert parse_money(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('text, currency_rate', [
+    ('R$ 2,5 milhões', 0.19 * 2.5e6),
+    ('€ 3M', 1.08 * 3e6),
+    ('ARS 1000', 0.0011 * 1000),
+    ('3M EUR', 1.08 * 3e6),
+])
+def test_parse_money_converts_currency(text, currency_rate):
+    assert parse_money(text) == pytest.approx(currency_rate)
+
+
+@pytest.mark.parametrize('text', ['', None, 'N/A', 'não informado'])
+def test_parse_money_without_number_is_nan(text):
+    assert math.isnan(parse_money(text))
+
+
+@pytest.mark.parametrize('token, expected', [
+    ('2,843.18', 2843.18), ('1.234,56', 1234.56), ('2,5', 2.5), ('1.234.567', 1234567.0), ('1,000', 1000.0),
+])
+def test_parse_number_separators(token, expected):
+    assert parse_number(token) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('5%', 0.05), ('5-7% ao mês', 0.06), ('0.03', 0.03), ('2024: 3%', 0.03),
+])
+def test_parse_rate(text, expected):
+    assert parse_rate(text) == pytest.approx(expected)
+
+
+def test_columns_filter_and_sum_by_sector():
+    records = [
+        {'TAM': 'US$ 1B', 'Setor de Atuação': 'Fintech', 'País': 'Brasil'},
+        {'TAM': '5 billion dollars', 'Setor de Atuação': 'Fintech', 'País': 'México'},
+        {'TAM': '', 'Setor de Atuação': 'Edtech', 'País': 'Brasil'},
+    ]
+    columns = NumericColumns(records)
+    assert columns.coverage()['tam'] == 2
+    result = columns.sum_by('tam', filters={'pais': ['brasil']})
+    assert result['groups'] == [{'name': 'Fintech', 'sum': 1e9, 'count': 1, 'mean': 1e9}]
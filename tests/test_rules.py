@@ -0,0 +1,73 @@
+import pytest
+
+from rules import (PAIS_EUA, PAIS_FORA_LATAM, SETOR_INVESTIMENTO, classify, classify_rows, fold_text,
+                   match_latam_country, match_rejected_country, match_rejected_sector)
+
+
+def test_fold_text_strips_accents_and_case():
+    assert fold_text('  Colômbia ') == 'colombia'
+    assert fold_text(None) == ''
+
+
+@pytest.mark.parametrize('text', ['Honduras', 'Belarus', 'Russia', 'Campus Party', 'Mauritius'])
+def test_us_does_not_match_inside_words(text):
+    assert match_rejected_country(text) is None
+
+
+@pytest.mark.parametrize('text, term', [
+    ('USA', 'usa'),
+    ('US', 'us'),
+    ('Austin, US', 'us'),
+    ('(EUA)', 'eua'),
+    ('Estados Unidos.', 'estados unidos'),
+    ('San Francisco - United States', 'united states'),
+    ('U.S.', 'u.s.'),
+])
+def test_rejected_country_with_punctuation(text, term):
+    assert match_rejected_country(text) == term
+
+
+@pytest.mark.parametrize('text, country', [
+    ('México', 'mexico'),
+    ('Bogotá, Colômbia', 'colombia'),
+    ('PERÚ', 'peru'),
+    ('São Paulo/Brasil', 'brasil'),
+    ('República Dominicana', 'republica dominicana'),
+])
+def test_latam_country_accented_and_punctuated(text, country):
+    assert match_latam_country(text) == country
+
+
+def test_latam_country_needs_whole_word():
+    assert match_latam_country('Chilean Peppers Inc') is None
+    assert match_latam_country('Cubano') is None
+
+
+@pytest.mark.parametrize('text, term', [
+    ('Venture Capital', 'venture capital'),
+    ('VCs', 'vcs'),
+    ('Fintech (investment)', 'investment'),
+    ('Funds', 'funds'),
+])
+def test_rejected_sector(text, term):
+    assert match_rejected_sector(text) == term
+
+
+@pytest.mark.parametrize('text', ['Fintech', 'Capitalização de PMEs', 'Refund automation', 'Healthtech'])
+def test_sector_terms_need_whole_word(text):
+    assert match_rejected_sector(text) is None
+
+
+def test_classify_reasons():
+    assert classify('Brasil', 'Fintech') == []
+    assert [r['regra'] for r in classify('USA', 'Venture Capital')] == [PAIS_EUA, SETOR_INVESTIMENTO]
+    assert [r['regra'] for r in classify('Portugal', 'Edtech')] == [PAIS_FORA_LATAM]
+    assert classify('Portugal', 'Edtech', check_latam=False) == []
+    assert classify('', 'Edtech') == []
+
+
+def test_classify_rows_keeps_row_order():
+    rows = [{'País': 'Chile', 'Setor de Atuação': 'Agtech'}, {'País': 'Honduras', 'Setor de Atuação': 'Fund'}]
+    result = classify_rows(rows)
+    assert [row for row, _ in result] == rows
+    assert [r['regra'] for r in result[1][1]] == [SETOR_INVESTIMENTO]
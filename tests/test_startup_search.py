@@ -0,0 +1,53 @@
+from startup_search import StartupSearchIndex
+
+MIN_CONFIDENCE = 0.6
+
+
+def build_index():
+    index = StartupSearchIndex()
+    rows = [
+        ('Pagaí', 'Fintech', 'México', 'Seed', 'Kaszek', 'Pagamentos com bitcoin e Pix para varejo'),
+        ('Cripto Verde', 'Fintech', 'Brasil', 'Série A', 'Monashees', 'Custódia de bitcoin para empresas'),
+        ('Aula Viva', 'Edtech', 'Brasil', 'Seed', 'Bossanova', 'Plataforma de cursos online'),
+        ('Nuvem Saúde', 'Healthtech', 'USA', 'Série B', 'a16z', 'Prontuário eletrônico na nuvem'),
+    ]
+    for name, sector, country, status, vc, text in rows:
+        index.upsert(name, {'Nome da Startup': name, 'Setor de Atuação': sector, 'País': country,
+                            'Status de financiamento': status, 'Nome do Investidor (VC)': vc,
+                            'Dinâmica do Setor': text, 'Site': f'https://{name.lower().replace(" ", "")}.com'})
+    return index
+
+
+def test_filters_with_list_intent_answer_locally():
+    result = build_index().answer('quais fintechs no México levantaram Seed?', MIN_CONFIDENCE)
+    assert result['mode'] == 'filtros'
+    assert [match['nome'] for match in result['matches']] == ['Pagaí']
+
+
+def test_count_intent():
+    result = build_index().answer('quantas startups no Brasil?', MIN_CONFIDENCE)
+    assert result['total'] == 2
+    assert result['answer'].startswith('Há 2 startup(s)')
+
+
+def test_general_question_falls_back_to_web():
+    # Um termo que aparece no texto de uma startup não faz de uma pergunta geral uma pergunta sobre a base
+    assert build_index().answer('o que é bitcoin?', MIN_CONFIDENCE) is None
+
+
+def test_startup_name_answers_locally():
+    result = build_index().answer('Aula Viva', MIN_CONFIDENCE)
+    assert result['mode'] == 'texto'
+    assert result['matches'][0]['nome'] == 'Aula Viva'
+
+
+def test_usa_is_a_country_filter():
+    result = build_index().answer('quais startups nos USA?', MIN_CONFIDENCE)
+    assert [match['nome'] for match in result['matches']] == ['Nuvem Saúde']
+
+
+def test_remove_updates_filters():
+    index = build_index()
+    index.remove('Pagaí')
+    assert index.answer('quais fintechs no México?', MIN_CONFIDENCE) is None
+    assert index.size == 3
@@ -0,0 +1,237 @@
+"""Rastreamento (spans) das etapas do pipeline e do app.
+
+Cada span registra etapa, nome, agente, duração, status, retentativas,
+tempo retido pelo limite de taxa, tokens e acerto de cache. Os spans vão para um arquivo JSONL por execução
+(TRACE_DIR) e podem ser exportados no formato OpenMetrics.
+
+Relatório de p50/p95 por etapa e por agente:
+
+    python tracing.py report traces/<execução>.jsonl [...]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from rate_limit import is_rate_limited, is_retryable
+
+TRACE_DIR = os.getenv('TRACE_DIR', 'traces')
+TRACE_WINDOW = int(os.getenv('TRACE_WINDOW', '2000'))  # durações guardadas por etapa para os quantis
+
+
+def percentile(values, q: float):
+    """Percentil por interpolação linear (q entre 0 e 100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def token_usage(result) -> dict:
+    """Tokens de um resultado de crew (CrewOutput.token_usage), se houver."""
+    usage = getattr(result, 'token_usage', None)
+    if usage is None:
+        return {}
+    return {
+        'total': getattr(usage, 'total_tokens', 0) or 0,
+        'prompt': getattr(usage, 'prompt_tokens', 0) or 0,
+        'completion': getattr(usage, 'completion_tokens', 0) or 0,
+        'requests': getattr(usage, 'successful_requests', 0) or 0,
+    }
+
+
+def add_tokens(span: dict, result):
+    """Soma os tokens de `result` aos já registrados no span (útil com retentativas)."""
+    usage = token_usage(result)
+    if usage:
+        totals = span.setdefault('tokens', {})
+        for key, value in usage.items():
+            totals[key] = totals.get(key, 0) + value
+
+
+def crew_agent(crew) -> str:
+    """Papel do(s) agente(s) de uma crew, para agrupar os spans por agente."""
+    roles = [getattr(a, 'role', '') for a in getattr(crew, 'agents', None) or []]
+    return ', '.join(r for r in roles if r) or None
+
+
+class Tracer:
+    """Coleta spans em memória (janela limitada) e, se houver execução ativa, em JSONL."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.run_id = None
+        self.path = None
+        self._durations = defaultdict(lambda: deque(maxlen=TRACE_WINDOW))  # etapa -> durações (ms)
+        self._totals = defaultdict(lambda: {'count': 0, 'sum_ms': 0.0, 'errors': 0, 'retries': 0,
+                                            'tokens': 0, 'cache_hits': 0, 'throttled_ms': 0.0})
+
+    def start_run(self, run_id: str, directory: str = TRACE_DIR):
+        """Passa a gravar os spans em <directory>/<run_id>.jsonl."""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self.run_id = run_id
+            self.path = os.path.join(directory, f'{run_id}.jsonl')
+
+    @contextmanager
+    def span(self, stage: str, name: str = None, **attrs):
+        """Mede o bloco. O dict entregue pode receber 'tokens', 'retries', 'cache_hit', etc."""
+        record = {'stage': stage, 'name': name or stage, **attrs}
+        start = time.perf_counter()
+        record['start'] = time.time()
+        try:
+            yield record
+            record.setdefault('status', 'ok')
+        except BaseException as e:
+            record['status'] = 'error'
+            record['error'] = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            record['duration_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            record['thread'] = threading.current_thread().name
+            self._finish(record)
+
+    def _finish(self, record: dict):
+        stage = record['stage']
+        tokens = record.get('tokens') or {}
+        with self._lock:
+            record['run_id'] = self.run_id
+            self._durations[stage].append(record['duration_ms'])
+            totals = self._totals[stage]
+            totals['count'] += 1
+            totals['sum_ms'] += record['duration_ms']
+            totals['errors'] += record['status'] != 'ok'
+            totals['retries'] += record.get('retries', 0) or 0
+            totals['tokens'] += tokens.get('total', 0) if isinstance(tokens, dict) else 0
+            totals['cache_hits'] += bool(record.get('cache_hit'))
+            totals['throttled_ms'] += record.get('throttled_ms', 0) or 0
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+    def openmetrics(self) -> str:
+        """Resumo dos spans no formato de exposição OpenMetrics."""
+        lines = [
+            '# TYPE inception_span_duration_seconds summary',
+            '# UNIT inception_span_duration_seconds seconds',
+            '# HELP inception_span_duration_seconds Duração dos spans por etapa.',
+        ]
+        with self._lock:
+            stages = sorted(self._totals)
+            for stage in stages:
+                durations = list(self._durations[stage])
+                for q in (0.5, 0.95):
+                    value = percentile(durations, q * 100) or 0.0
+                    lines.append(f'inception_span_duration_seconds{{stage="{stage}",quantile="{q}"}} {value / 1000:.6f}')
+                lines.append(f'inception_span_duration_seconds_sum{{stage="{stage}"}} {self._totals[stage]["sum_ms"] / 1000:.6f}')
+                lines.append(f'inception_span_duration_seconds_count{{stage="{stage}"}} {self._totals[stage]["count"]}')
+            lines.append('# TYPE inception_throttled_seconds counter')
+            lines.append('# HELP inception_throttled_seconds Tempo retido pelo limite de taxa e pelo backoff.')
+            for stage in stages:
+                lines.append(f'inception_throttled_seconds_total{{stage="{stage}"}} {self._totals[stage]["throttled_ms"] / 1000:.6f}')
+            for metric, key, help_text in (
+                ('inception_span_errors', 'errors', 'Spans que terminaram com erro.'),
+                ('inception_span_retries', 'retries', 'Retentativas registradas nos spans.'),
+                ('inception_tokens', 'tokens', 'Tokens consumidos pelos spans.'),
+                ('inception_cache_hits', 'cache_hits', 'Spans respondidos por cache.'),
+            ):
+                lines.append(f'# TYPE {metric} counter')
+                lines.append(f'# HELP {metric} {help_text}')
+                for stage in stages:
+                    lines.append(f'{metric}_total{{stage="{stage}"}} {self._totals[stage][key]}')
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def export_openmetrics(self, path: str = None) -> str:
+        path = path or (os.path.splitext(self.path)[0] + '.prom' if self.path else 'metrics.prom')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.openmetrics())
+        return path
+
+
+tracer = Tracer()
+
+
+class TracedWorksheet:
+    """Envolve um worksheet/spreadsheet do gspread e registra um span por chamada.
+
+    Com `limiter` (um rate_limit.Backend), cada chamada passa pelo limite de
+    taxa e é retentada em erros transitórios; inserções (e os métodos em
+    `non_idempotent`) só são retentadas em 429, quando é certo que a
+    requisição não foi aplicada.
+    """
+
+    NON_IDEMPOTENT = ('append_row', 'append_rows', 'insert_row', 'insert_rows')
+
+    def __init__(self, target, stage: str = 'sheets', limiter=None, non_idempotent=()):
+        self._target = target
+        self._stage = stage
+        self._limiter = limiter
+        self._non_idempotent = frozenset(self.NON_IDEMPOTENT + tuple(non_idempotent))
+
+    def __getattr__(self, attr):
+        value = getattr(self._target, attr)
+        if not callable(value):
+            return value
+
+        def traced_call(*args, **kwargs):
+            with tracer.span(self._stage, attr) as span:
+                if self._limiter is None:
+                    return value(*args, **kwargs)
+                retry_on = is_rate_limited if attr in self._non_idempotent else is_retryable
+                return self._limiter.call(lambda: value(*args, **kwargs), span=span, retry_on=retry_on)
+        return traced_call
+
+    def __bool__(self):
+        return self._target is not None
+
+
+def _load_spans(paths):
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _print_table(title: str, groups: dict):
+    print(f'\n{title}')
+    print(f"{'':<32} {'n':>6} {'p50 (s)':>9} {'p95 (s)':>9} {'total (s)':>10} {'tokens':>9} {'retries':>8} {'retido (s)':>10} {'erros':>6} {'cache':>6}")
+    for key, spans in sorted(groups.items(), key=lambda item: -sum(s['duration_ms'] for s in item[1])):
+        durations = [s['duration_ms'] / 1000 for s in spans]
+        tokens = sum((s.get('tokens') or {}).get('total', 0) for s in spans if isinstance(s.get('tokens'), dict))
+        print(f"{str(key)[:32]:<32} {len(spans):>6} {percentile(durations, 50):>9.2f} {percentile(durations, 95):>9.2f} "
+              f"{sum(durations):>10.1f} {tokens:>9} {sum(s.get('retries', 0) or 0 for s in spans):>8} "
+              f"{sum(s.get('throttled_ms', 0) or 0 for s in spans) / 1000:>10.1f} "
+              f"{sum(s.get('status') != 'ok' for s in spans):>6} {sum(bool(s.get('cache_hit')) for s in spans):>6}")
+
+
+def report(paths):
+    """Imprime p50/p95, tokens, retentativas, tempo retido, erros e cache por etapa e por agente."""
+    spans = list(_load_spans(paths))
+    if not spans:
+        print('Nenhum span encontrado.')
+        return
+    by_stage, by_agent = defaultdict(list), defaultdict(list)
+    for span in spans:
+        by_stage[span['stage']].append(span)
+        if span.get('agent'):
+            by_agent[span['agent']].append(span)
+    _print_table('Por etapa', by_stage)
+    if by_agent:
+        _print_table('Por agente', by_agent)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] != 'report':
+        print('Uso: python tracing.py report <arquivo.jsonl> [...]')
+        sys.exit(1)
+    report(sys.argv[2:])